@@ -1,5 +1,4 @@
 from django.contrib import admin
-from django.db.models import Sum, Case, When, F, Value, DecimalField
 from .models import Unidad, Residente, Cuota, Movimiento
 
 @admin.register(Unidad)
@@ -8,13 +7,13 @@ class UnidadAdmin(admin.ModelAdmin):
     search_fields = ("codigo", "piso")
     list_filter = ("activo",)
 
+    list_select_related = ("saldo",)
+
     def saldo_actual(self, obj):
-        agg = obj.movimientos.aggregate(
-            cargos=Sum(Case(When(tipo="cargo", then=F("monto")), default=Value(0), output_field=DecimalField())),
-            pagos =Sum(Case(When(tipo="pago",  then=F("monto")), default=Value(0), output_field=DecimalField())),
-        )
-        return (agg["cargos"] or 0) - (agg["pagos"] or 0)
+        saldo = getattr(obj, "saldo", None)
+        return saldo.saldo if saldo else 0
     saldo_actual.short_description = "Saldo"
+    saldo_actual.admin_order_field = "saldo__saldo"
 
 @admin.register(Residente)
 class ResidenteAdmin(admin.ModelAdmin):
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class CondominioConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'condominio'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from condominio.services.cargos import generar_cargos
+
+
+class Command(BaseCommand):
+    help = "Genera los cargos del periodo para todas las unidades activas según las cuotas vigentes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("periodo", help="Periodo en formato YYYY-MM")
+
+    def handle(self, *args, **options):
+        try:
+            result = generar_cargos(options["periodo"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(
+            f"Periodo {result['periodo']}: {result['unidades']} unidades, {result['cuotas']} cuotas vigentes."
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Cargos creados: {result['creados']} (ya existentes: {result['existentes']}), total {result['total']}."
+        ))
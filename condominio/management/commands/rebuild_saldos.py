@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from condominio.services.saldos import recalcular_saldos
+
+
+class Command(BaseCommand):
+    help = "Reconstruye las tablas de saldos (por unidad y por periodo) desde los movimientos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--unidad", type=int, action="append", dest="unidades",
+                            help="ID de unidad a recalcular (repetible). Por defecto, todas.")
+
+    def handle(self, *args, **options):
+        result = recalcular_saldos(options["unidades"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Saldos reconstruidos: {result['unidades']} unidades, {result['periodos']} periodos."
+        ))
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:07
+
+import django.db.models.deletion
+import django.db.models.expressions
+from django.db import migrations, models
+from django.db.models import Case, F, Sum, Value, When
+
+
+def poblar_saldos(apps, schema_editor):
+    Movimiento = apps.get_model('condominio', 'Movimiento')
+    SaldoPeriodo = apps.get_model('condominio', 'SaldoPeriodo')
+    SaldoUnidad = apps.get_model('condominio', 'SaldoUnidad')
+    monto = models.DecimalField(max_digits=14, decimal_places=2)
+    cargos = Sum(Case(When(tipo='cargo', then=F('monto')), default=Value(0), output_field=monto))
+    pagos = Sum(Case(When(tipo='pago', then=F('monto')), default=Value(0), output_field=monto))
+    SaldoPeriodo.objects.bulk_create(
+        SaldoPeriodo(unidad_id=row['unidad_id'], periodo=row['periodo'], cargos=row['cargos'], pagos=row['pagos'])
+        for row in Movimiento.objects.values('unidad_id', 'periodo').annotate(cargos=cargos, pagos=pagos)
+    )
+    SaldoUnidad.objects.bulk_create(
+        SaldoUnidad(unidad_id=row['unidad_id'], cargos=row['cargos'], pagos=row['pagos'])
+        for row in Movimiento.objects.values('unidad_id').annotate(cargos=cargos, pagos=pagos)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('condominio', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoUnidad',
+            fields=[
+                ('unidad', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='saldo', serialize=False, to='condominio.unidad')),
+                ('cargos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('pagos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('saldo', models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('cargos'), '-', models.F('pagos')), output_field=models.DecimalField(decimal_places=2, max_digits=14))),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'saldos_unidad',
+            },
+        ),
+        migrations.CreateModel(
+            name='SaldoPeriodo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.DateField()),
+                ('cargos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('pagos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('saldo', models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('cargos'), '-', models.F('pagos')), output_field=models.DecimalField(decimal_places=2, max_digits=14))),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('unidad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_periodo', to='condominio.unidad')),
+            ],
+            options={
+                'db_table': 'saldos_periodo',
+                'constraints': [models.UniqueConstraint(fields=('unidad', 'periodo'), name='uniq_saldo_periodo')],
+            },
+        ),
+        migrations.RunPython(poblar_saldos, migrations.RunPython.noop),
+    ]
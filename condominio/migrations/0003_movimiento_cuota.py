@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def _vigencia(cuota):
+    # Periodos (primer día del mes) en los que la cuota estuvo vigente
+    window = Q(periodo__gte=cuota.vigente_desde.replace(day=1))
+    return window & Q(periodo__lte=cuota.vigente_hasta) if cuota.vigente_hasta else window
+
+
+def asignar_cuota(apps, schema_editor):
+    # Los cargos ya generados se atan a su cuota para que generar_cargos no los repita; si otra
+    # cuota del mismo nombre estaba vigente en ese periodo no se sabe cuál fue y quedan sin cuota
+    Cuota = apps.get_model('condominio', 'Cuota')
+    Movimiento = apps.get_model('condominio', 'Movimiento')
+    cuotas = list(Cuota.objects.order_by('id'))
+    for cuota in cuotas:
+        cargos = Movimiento.objects.filter(_vigencia(cuota), tipo='cargo', cuota__isnull=True, concepto=cuota.nombre)
+        for otra in cuotas:
+            if otra.pk != cuota.pk and otra.nombre == cuota.nombre:
+                cargos = cargos.exclude(_vigencia(otra))
+        cargos.update(cuota=cuota)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('condominio', '0002_saldos'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='movimiento',
+            name='uniq_cargo_mes',
+        ),
+        migrations.AddField(
+            model_name='movimiento',
+            name='cuota',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='cargos', to='condominio.cuota'),
+        ),
+        migrations.RunPython(asignar_cuota, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='movimiento',
+            constraint=models.UniqueConstraint(condition=models.Q(('cuota__isnull', True), ('tipo', 'cargo')), fields=('unidad', 'periodo', 'concepto'), name='uniq_cargo_mes'),
+        ),
+        migrations.AddConstraint(
+            model_name='movimiento',
+            constraint=models.UniqueConstraint(condition=models.Q(('cuota__isnull', False), ('tipo', 'cargo')), fields=('unidad', 'periodo', 'cuota'), name='uniq_cargo_cuota_mes'),
+        ),
+    ]
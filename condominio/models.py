@@ -41,6 +41,8 @@ class Movimiento(models.Model):
     periodo = models.DateField()
     tipo = models.CharField(max_length=5, choices=TIPO)
     concepto = models.CharField(max_length=255)
+    # Cuota que originó el cargo (generar_cargos); vacía en cargos manuales y en pagos
+    cuota = models.ForeignKey(Cuota, on_delete=models.PROTECT, null=True, blank=True, related_name="cargos")
     monto = models.DecimalField(max_digits=12, decimal_places=2)
     medio_pago = models.CharField(max_length=100, blank=True, null=True)
     referencia = models.CharField(max_length=100, blank=True, null=True)
@@ -51,7 +53,45 @@ class Movimiento(models.Model):
         constraints = [
             models.UniqueConstraint(
                 fields=["unidad", "periodo", "concepto"],
-                condition=models.Q(tipo="cargo"),
+                condition=models.Q(tipo="cargo", cuota__isnull=True),
                 name="uniq_cargo_mes",
-            )
+            ),
+            # Dos cuotas pueden llamarse igual: los cargos generados se distinguen por la cuota
+            models.UniqueConstraint(
+                fields=["unidad", "periodo", "cuota"],
+                condition=models.Q(tipo="cargo", cuota__isnull=False),
+                name="uniq_cargo_cuota_mes",
+            ),
+        ]
+
+class SaldoUnidad(models.Model):
+    """Saldo acumulado por unidad, mantenido de forma incremental desde Movimiento."""
+    unidad = models.OneToOneField(Unidad, on_delete=models.CASCADE, primary_key=True, related_name="saldo")
+    cargos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    pagos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    saldo = models.GeneratedField(
+        expression=models.F("cargos") - models.F("pagos"),
+        output_field=models.DecimalField(max_digits=14, decimal_places=2),
+        db_persist=True,
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    class Meta:
+        db_table = "saldos_unidad"
+
+class SaldoPeriodo(models.Model):
+    """Saldo de una unidad en un periodo, mantenido de forma incremental desde Movimiento."""
+    unidad = models.ForeignKey(Unidad, on_delete=models.CASCADE, related_name="saldos_periodo")
+    periodo = models.DateField()
+    cargos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    pagos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    saldo = models.GeneratedField(
+        expression=models.F("cargos") - models.F("pagos"),
+        output_field=models.DecimalField(max_digits=14, decimal_places=2),
+        db_persist=True,
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    class Meta:
+        db_table = "saldos_periodo"
+        constraints = [
+            models.UniqueConstraint(fields=["unidad", "periodo"], name="uniq_saldo_periodo"),
         ]
@@ -0,0 +1,84 @@
+# condominio/services/cargos.py
+from __future__ import annotations
+import calendar
+import datetime
+from collections import Counter
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import transaction
+from django.db.models import Q
+from condominio.models import Cuota, Movimiento, Unidad
+from condominio.services.saldos import sincronizar_periodo
+
+CARGOS_BATCH_SIZE = 1000
+_CENTAVOS = Decimal("0.01")
+
+
+def normalizar_periodo(periodo) -> datetime.date:
+    """Acepta 'YYYY-MM', 'YYYY-MM-DD' o una fecha y devuelve el primer día del mes."""
+    if isinstance(periodo, str):
+        try:
+            periodo = datetime.date.fromisoformat(periodo if len(periodo) > 7 else f"{periodo}-01")
+        except ValueError:
+            raise ValueError("periodo debe ser 'YYYY-MM'")
+    return periodo.replace(day=1)
+
+
+@transaction.atomic
+def generar_cargos(periodo, batch_size: int = CARGOS_BATCH_SIZE) -> dict:
+    """
+    Genera los cargos mensuales de todas las unidades activas para las cuotas vigentes
+    en ``periodo``. El monto es ``monto_base`` o ``monto_base * alicuota`` según
+    ``aplica_alicuota``. Cada cargo queda atado a su cuota (``Movimiento.cuota``) y los ya
+    existentes (restricción ``uniq_cargo_cuota_mes``) se omiten, así que puede ejecutarse de
+    nuevo sin duplicar nada; dos cuotas con el mismo nombre generan cargos distintos.
+    """
+    inicio = normalizar_periodo(periodo)
+    fin = inicio.replace(day=calendar.monthrange(inicio.year, inicio.month)[1])
+
+    cuotas = list(
+        Cuota.objects.filter(vigente_desde__lte=fin)
+        .filter(Q(vigente_hasta__isnull=True) | Q(vigente_hasta__gte=inicio))
+        .order_by("id").values_list("id", "nombre", "monto_base", "aplica_alicuota")
+    )
+    # Bloquear las unidades frena cualquier otro INSERT de movimientos suyos (la FK toma
+    # FOR KEY SHARE) hasta el final: los existentes leídos después son definitivos y
+    # ``creados`` no cuenta filas que ignore_conflicts haya omitido
+    unidades = list(Unidad.objects.select_for_update().filter(activo=True).order_by("id").values_list("id", "alicuota"))
+    existentes = set(
+        Movimiento.objects.filter(periodo=inicio, tipo="cargo", cuota_id__in=[c[0] for c in cuotas])
+        .values_list("unidad_id", "cuota_id")
+    )
+    # Un cargo manual (sin cuota) con el nombre de una cuota cuenta como de esa cuota, salvo
+    # que el nombre sea ambiguo en el periodo
+    nombres = Counter(c[1] for c in cuotas)
+    por_nombre = {nombre: cuota_id for cuota_id, nombre, *_ in cuotas if nombres[nombre] == 1}
+    existentes |= {
+        (unidad_id, por_nombre[concepto])
+        for unidad_id, concepto in Movimiento.objects.filter(
+            periodo=inicio, tipo="cargo", cuota__isnull=True, concepto__in=list(por_nombre),
+        ).values_list("unidad_id", "concepto")
+    }
+
+    nuevos = []
+    for cuota_id, nombre, monto_base, aplica_alicuota in cuotas:
+        for unidad_id, alicuota in unidades:
+            if (unidad_id, cuota_id) in existentes:
+                continue
+            monto = (monto_base * alicuota if aplica_alicuota else monto_base).quantize(_CENTAVOS, ROUND_HALF_UP)
+            if monto > 0:
+                nuevos.append(Movimiento(
+                    unidad_id=unidad_id, periodo=inicio, tipo="cargo", concepto=nombre, cuota_id=cuota_id, monto=monto,
+                ))
+
+    Movimiento.objects.bulk_create(nuevos, batch_size=batch_size, ignore_conflicts=True)
+    # bulk_create no dispara señales: los saldos se sincronizan en bloque
+    sincronizar_periodo(inicio, {m.unidad_id for m in nuevos})
+
+    return {
+        "periodo": inicio.isoformat(),
+        "unidades": len(unidades),
+        "cuotas": len(cuotas),
+        "creados": len(nuevos),
+        "existentes": len(existentes),
+        "total": sum((m.monto for m in nuevos), Decimal("0")),
+    }
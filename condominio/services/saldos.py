@@ -0,0 +1,95 @@
+# condominio/services/saldos.py
+from __future__ import annotations
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.utils import timezone
+from condominio.models import Movimiento, SaldoPeriodo, SaldoUnidad
+
+_MONTO = DecimalField(max_digits=14, decimal_places=2)
+_CARGOS = Sum(Case(When(tipo="cargo", then=F("monto")), default=Value(0), output_field=_MONTO))
+_PAGOS = Sum(Case(When(tipo="pago", then=F("monto")), default=Value(0), output_field=_MONTO))
+
+
+def _acumular(model, cargos: Decimal, pagos: Decimal, crear: bool = True, **keys) -> None:
+    """
+    UPDATE atómico con F(); si la fila no existe y ``crear`` la crea (reintentando ante una
+    carrera). Sin ``crear`` una fila inexistente se deja así.
+    """
+    changes = {"cargos": F("cargos") + cargos, "pagos": F("pagos") + pagos, "updated_at": timezone.now()}
+    if model.objects.filter(**keys).update(**changes) or not crear:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(cargos=cargos, pagos=pagos, **keys)
+    except IntegrityError:
+        model.objects.filter(**keys).update(**changes)
+
+
+def aplicar_movimiento(unidad_id: int, periodo, tipo: str, monto, signo: int = 1) -> None:
+    """
+    Aplica un cargo o pago (``signo=-1`` para revertirlo) a los saldos de la unidad. Revertir
+    nunca crea filas: sin saldo previo no hay nada que descontar.
+    """
+    monto = Decimal(str(monto)) * signo
+    cargos = monto if tipo == "cargo" else Decimal("0")
+    pagos = monto if tipo == "pago" else Decimal("0")
+    _acumular(SaldoUnidad, cargos, pagos, crear=signo > 0, unidad_id=unidad_id)
+    _acumular(SaldoPeriodo, cargos, pagos, crear=signo > 0, unidad_id=unidad_id, periodo=periodo)
+
+
+def sincronizar_periodo(periodo, unidad_ids) -> None:
+    """
+    Recalcula el saldo de ``periodo`` para las unidades indicadas y el total de cada una,
+    con un número fijo de consultas (upserts por lotes). Pensado para escrituras masivas
+    que no disparan señales, como ``bulk_create``.
+    """
+    unidad_ids = list(unidad_ids)
+    if not unidad_ids:
+        return
+    filas = (
+        Movimiento.objects.filter(periodo=periodo, unidad_id__in=unidad_ids)
+        .values("unidad_id").annotate(cargos=_CARGOS, pagos=_PAGOS)
+    )
+    SaldoPeriodo.objects.bulk_create(
+        [SaldoPeriodo(unidad_id=f["unidad_id"], periodo=periodo, cargos=f["cargos"], pagos=f["pagos"]) for f in filas],
+        batch_size=1000, update_conflicts=True,
+        unique_fields=["unidad", "periodo"], update_fields=["cargos", "pagos", "updated_at"],
+    )
+    totales = (
+        SaldoPeriodo.objects.filter(unidad_id__in=unidad_ids)
+        .values("unidad_id").annotate(total_cargos=Sum("cargos"), total_pagos=Sum("pagos"))
+    )
+    SaldoUnidad.objects.bulk_create(
+        [SaldoUnidad(unidad_id=t["unidad_id"], cargos=t["total_cargos"], pagos=t["total_pagos"]) for t in totales],
+        batch_size=1000, update_conflicts=True,
+        unique_fields=["unidad"], update_fields=["cargos", "pagos", "updated_at"],
+    )
+
+
+@transaction.atomic
+def recalcular_saldos(unidad_ids=None) -> dict:
+    """
+    Reconstruye los saldos desde ``Movimiento`` con dos agregaciones.
+    Sin ``unidad_ids`` recalcula todas las unidades.
+    """
+    movimientos = Movimiento.objects.all()
+    periodos = SaldoPeriodo.objects.all()
+    unidades = SaldoUnidad.objects.all()
+    if unidad_ids is not None:
+        unidad_ids = list(unidad_ids)
+        movimientos = movimientos.filter(unidad_id__in=unidad_ids)
+        periodos = periodos.filter(unidad_id__in=unidad_ids)
+        unidades = unidades.filter(unidad_id__in=unidad_ids)
+
+    periodos.delete()
+    unidades.delete()
+    nuevos_periodos = SaldoPeriodo.objects.bulk_create(
+        SaldoPeriodo(unidad_id=row["unidad_id"], periodo=row["periodo"], cargos=row["cargos"], pagos=row["pagos"])
+        for row in movimientos.values("unidad_id", "periodo").annotate(cargos=_CARGOS, pagos=_PAGOS)
+    )
+    nuevas_unidades = SaldoUnidad.objects.bulk_create(
+        SaldoUnidad(unidad_id=row["unidad_id"], cargos=row["cargos"], pagos=row["pagos"])
+        for row in movimientos.values("unidad_id").annotate(cargos=_CARGOS, pagos=_PAGOS)
+    )
+    return {"unidades": len(nuevas_unidades), "periodos": len(nuevos_periodos)}
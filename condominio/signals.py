@@ -0,0 +1,32 @@
+# condominio/signals.py
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Movimiento
+from .services.saldos import aplicar_movimiento
+
+
+@receiver(pre_save, sender=Movimiento)
+def recordar_movimiento_previo(sender, instance, **kwargs):
+    # Guarda el estado anterior para revertirlo si el movimiento se edita
+    instance._previo = None
+    if instance.pk:
+        instance._previo = (
+            Movimiento.objects.filter(pk=instance.pk).values_list("unidad_id", "periodo", "tipo", "monto").first()
+        )
+
+
+@receiver(post_save, sender=Movimiento)
+def movimiento_guardado(sender, instance, created, **kwargs):
+    previo = getattr(instance, "_previo", None)
+    if previo:
+        aplicar_movimiento(*previo, signo=-1)
+    aplicar_movimiento(instance.unidad_id, instance.periodo, instance.tipo, instance.monto)
+
+
+@receiver(post_delete, sender=Movimiento)
+def movimiento_eliminado(sender, instance, origin=None, **kwargs):
+    # Borrado en cascada de la unidad: sus saldos se borran con ella, no hay nada que descontar
+    if isinstance(origin, Movimiento) or (isinstance(origin, QuerySet) and origin.model is Movimiento):
+        aplicar_movimiento(instance.unidad_id, instance.periodo, instance.tipo, instance.monto, signo=-1)
@@ -1,3 +1,99 @@
+import datetime
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from .models import Cuota, Movimiento, SaldoPeriodo, SaldoUnidad, Unidad
+from .services.cargos import generar_cargos
+
+ENERO = datetime.date(2025, 1, 1)
+
+
+class SaldoTests(TestCase):
+    def setUp(self):
+        self.unidad = Unidad.objects.create(codigo="A-1", alicuota=Decimal("0.5"))
+
+    def movimiento(self, tipo, monto, concepto="Expensas"):
+        return Movimiento.objects.create(unidad=self.unidad, periodo=ENERO, tipo=tipo, concepto=concepto, monto=monto)
+
+    def saldos(self):
+        unidad = SaldoUnidad.objects.get(unidad=self.unidad)
+        periodos = {row.periodo: (row.cargos, row.pagos, row.saldo) for row in SaldoPeriodo.objects.filter(unidad=self.unidad)}
+        return (unidad.cargos, unidad.pagos, unidad.saldo), periodos
+
+    def test_movimientos_mantienen_los_saldos(self):
+        cargo = self.movimiento("cargo", 100)
+        self.movimiento("pago", 40, concepto="Pago")
+        self.assertEqual(self.saldos(), ((100, 40, 60), {ENERO: (100, 40, 60)}))
+        febrero = datetime.date(2025, 2, 1)
+        cargo.periodo, cargo.monto = febrero, Decimal("120")
+        cargo.save()
+        self.assertEqual(self.saldos(), ((120, 40, 80), {ENERO: (0, 40, -40), febrero: (120, 0, 120)}))
+        cargo.delete()
+        self.assertEqual(self.saldos(), ((0, 40, -40), {ENERO: (0, 40, -40), febrero: (0, 0, 0)}))
+        Movimiento.objects.filter(tipo="pago").delete()
+        self.assertEqual(self.saldos(), ((0, 0, 0), {ENERO: (0, 0, 0), febrero: (0, 0, 0)}))
+
+    def test_deleting_a_unit_with_movimientos(self):
+        self.movimiento("cargo", 100)
+        self.movimiento("pago", 40, concepto="Pago")
+        self.unidad.delete()
+        self.assertFalse(Movimiento.objects.exists())
+        self.assertFalse(SaldoUnidad.objects.exists())
+        self.assertFalse(SaldoPeriodo.objects.exists())
+
+
+class GenerarCargosTests(TestCase):
+    def setUp(self):
+        self.a = Unidad.objects.create(codigo="A-1", alicuota=Decimal("0.2500"))
+        self.b = Unidad.objects.create(codigo="B-1", alicuota=Decimal("0.3333"))
+        Unidad.objects.create(codigo="C-1", alicuota=Decimal("0.5000"), activo=False)
+
+    def cuota(self, nombre, monto, aplica_alicuota=True, desde=datetime.date(2024, 1, 1), hasta=None):
+        return Cuota.objects.create(nombre=nombre, monto_base=monto, aplica_alicuota=aplica_alicuota, vigente_desde=desde, vigente_hasta=hasta)
+
+    def cargos(self):
+        return {(m.unidad.codigo, m.cuota_id): m.monto for m in Movimiento.objects.select_related("unidad")}
+
+    def test_montos_por_alicuota(self):
+        expensas = self.cuota("Expensas", 1000)
+        seguridad = self.cuota("Seguridad", 80, aplica_alicuota=False)
+        result = generar_cargos("2025-01")
+        self.assertEqual(result["creados"], 4)
+        self.assertEqual(result["total"], Decimal("250.00") + Decimal("333.30") + 160)
+        self.assertEqual(self.cargos(), {
+            ("A-1", expensas.pk): Decimal("250.00"), ("B-1", expensas.pk): Decimal("333.30"),
+            ("A-1", seguridad.pk): Decimal("80.00"), ("B-1", seguridad.pk): Decimal("80.00"),
+        })
+
+    def test_solo_cuotas_vigentes_en_el_mes(self):
+        vigente = self.cuota("Desde mitad de mes", 100, desde=datetime.date(2025, 1, 20))
+        self.cuota("Vencida", 100, hasta=datetime.date(2024, 12, 31))
+        self.cuota("Futura", 100, desde=datetime.date(2025, 2, 1))
+        hasta_el_uno = self.cuota("Hasta el 1", 100, hasta=datetime.date(2025, 1, 1))
+        generar_cargos("2025-01")
+        self.assertEqual({cuota_id for _, cuota_id in self.cargos()}, {vigente.pk, hasta_el_uno.pk})
+
+    def test_cuotas_con_el_mismo_nombre_generan_cargos_distintos(self):
+        primera, segunda = self.cuota("Expensas", 1000), self.cuota("Expensas", 400)
+        self.assertEqual(generar_cargos("2025-01")["creados"], 4)
+        self.assertEqual(self.cargos()[("A-1", primera.pk)], Decimal("250.00"))
+        self.assertEqual(self.cargos()[("A-1", segunda.pk)], Decimal("100.00"))
+
+    def test_repetir_no_duplica_y_respeta_cargos_manuales(self):
+        expensas = self.cuota("Expensas", 1000)
+        Movimiento.objects.create(unidad=self.a, periodo=ENERO, tipo="cargo", concepto="Expensas", monto=250)
+        self.assertEqual(generar_cargos("2025-01")["creados"], 1)
+        result = generar_cargos("2025-01")
+        self.assertEqual((result["creados"], result["existentes"]), (0, 2))
+        self.assertEqual(Movimiento.objects.filter(cuota=expensas).count(), 1)
+
+    def test_sincroniza_saldos(self):
+        self.cuota("Expensas", 1000)
+        Movimiento.objects.create(unidad=self.a, periodo=ENERO, tipo="pago", concepto="Pago", monto=100)
+        generar_cargos("2025-01")
+        generar_cargos("2025-02")
+        saldo = SaldoUnidad.objects.get(unidad=self.a)
+        self.assertEqual((saldo.cargos, saldo.pagos), (Decimal("500.00"), Decimal("100.00")))
+        enero = SaldoPeriodo.objects.get(unidad=self.b, periodo=ENERO)
+        self.assertEqual((enero.cargos, enero.pagos), (Decimal("333.30"), Decimal("0")))
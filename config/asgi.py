@@ -13,4 +13,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Se importa después de inicializar Django: usa modelos y settings
+from core.views_events import EVENT_ROUTES  # noqa: E402
+
+
+async def application(scope, receive, send):
+    # Las notificaciones en vivo se atienden sin el handler de Django (ver core/views_events.py)
+    if scope["type"] == "http" and scope["method"] == "GET" and scope["path"] in EVENT_ROUTES:
+        return await EVENT_ROUTES[scope["path"]](scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -59,7 +59,7 @@ INSTALLED_APPS = [
 # ------------------------------------------------------------------------------
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "core.authentication.RoleJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
@@ -74,9 +74,14 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 10,
 }
 
+# Login por email o username (sin distinguir mayúsculas) con una sola consulta indexada
+AUTHENTICATION_BACKENDS = ["core.backends.EmailOrUsernameBackend"]
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
+    "TOKEN_OBTAIN_SERIALIZER": "core.serializers.RoleTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "core.serializers.RoleTokenRefreshSerializer",
 }
 
 # ------------------------------------------------------------------------------
@@ -145,6 +150,16 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Adjuntos de mantenimiento: tamaño máximo por archivo, en bytes (core.uploads.AttachmentUploadHandler)
+ATTACHMENT_MAX_UPLOAD_SIZE = int(os.getenv("ATTACHMENT_MAX_UPLOAD_SIZE", str(10 * 1024 * 1024)))
+
+# Entrega de adjuntos por /api/maintenance-attachments/<id>/file/ (core.views_media), tras validar el acceso:
+#   django   -> FileResponse con Range (sendfile bajo gunicorn)
+#   nginx    -> X-Accel-Redirect a MEDIA_ACCEL_PREFIX; requiere `location /protected-media/ { internal; alias <MEDIA_ROOT>/; }`
+#   sendfile -> X-Sendfile con la ruta absoluta (Apache mod_xsendfile, lighttpd)
+MEDIA_SERVE_MODE = os.getenv("MEDIA_SERVE_MODE", "django")
+MEDIA_ACCEL_PREFIX = os.getenv("MEDIA_ACCEL_PREFIX", "/protected-media/")
+
 # ------------------------------------------------------------------------------
 # CORS / CSRF (ajusta dominios de tu frontend en producción)
 # ------------------------------------------------------------------------------
@@ -167,5 +182,48 @@ CORS_ALLOW_CREDENTIALS = False  # pon True si vas a usar cookies/sesiones
 # ------------------------------------------------------------------------------
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Cachés: "default" en memoria y "responses" para las respuestas versionadas de los catálogos.
+# RESPONSE_CACHE_BACKEND = locmem | file | db (db requiere `python manage.py createcachetable`)
+_RESPONSE_CACHE_BACKENDS = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "responses"),
+    "file": ("django.core.cache.backends.filebased.FileBasedCache", str(BASE_DIR / "cache" / "responses")),
+    "db": ("django.core.cache.backends.db.DatabaseCache", "response_cache"),
+}
+_response_backend, _response_location = _RESPONSE_CACHE_BACKENDS[os.getenv("RESPONSE_CACHE_BACKEND", "locmem")]
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "responses": {
+        "BACKEND": _response_backend,
+        "LOCATION": os.getenv("RESPONSE_CACHE_LOCATION", _response_location),
+        # Las claves llevan la versión de las tablas: no hace falta expirar por tiempo
+        "TIMEOUT": None,
+        "OPTIONS": {"MAX_ENTRIES": int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))},
+    },
+}
+RESPONSE_CACHE_ALIAS = "responses"
+
+# Buffer de escritura de ActivityLog (FLUSH_SIZE=1 escribe cada registro directamente)
+ACTIVITY_LOG_FLUSH_SIZE = int(os.getenv("ACTIVITY_LOG_FLUSH_SIZE", "50"))
+ACTIVITY_LOG_FLUSH_SECONDS = float(os.getenv("ACTIVITY_LOG_FLUSH_SECONDS", "5"))
+ACTIVITY_LOG_MAX_BUFFER = int(os.getenv("ACTIVITY_LOG_MAX_BUFFER", "1000"))
+# Retención de ActivityLog: meses que se conservan y carpeta de archivos exportados
+ACTIVITY_LOG_RETENTION_MONTHS = int(os.getenv("ACTIVITY_LOG_RETENTION_MONTHS", "12"))
+ACTIVITY_LOG_ARCHIVE_DIR = os.getenv("ACTIVITY_LOG_ARCHIVE_DIR", str(BASE_DIR / "archive" / "activitylog"))
+
 # Ejemplo de var opcional (si la usas):
 MERCADOPAGO_ACCESS_TOKEN = os.getenv("MERCADOPAGO_ACCESS_TOKEN", "")
+# Notificaciones en vivo (core.views_events, proceso ASGI "events"): latido del stream SSE y
+# espera máxima del long-poll
+NOTIFICATION_STREAM_HEARTBEAT = int(os.getenv("NOTIFICATION_STREAM_HEARTBEAT", "15"))
+NOTIFICATION_POLL_TIMEOUT = int(os.getenv("NOTIFICATION_POLL_TIMEOUT", "25"))
+# Reintentos antes de marcar un webhook como fallido, con espera exponencial desde
+# WEBHOOK_RETRY_BASE_SECONDS (tope WEBHOOK_RETRY_MAX_SECONDS). Un evento reclamado por un worker
+# que no termina vuelve a estar disponible tras WEBHOOK_PROCESSING_TIMEOUT segundos.
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "5"))
+WEBHOOK_RETRY_BASE_SECONDS = int(os.getenv("WEBHOOK_RETRY_BASE_SECONDS", "30"))
+WEBHOOK_RETRY_MAX_SECONDS = int(os.getenv("WEBHOOK_RETRY_MAX_SECONDS", "3600"))
+WEBHOOK_PROCESSING_TIMEOUT = int(os.getenv("WEBHOOK_PROCESSING_TIMEOUT", "300"))
+# Trabajos en segundo plano (core.services.jobs): un trabajo RUNNING sin progreso durante
+# JOB_RUNNING_TIMEOUT segundos se da por abandonado y se retoma, hasta JOB_MAX_ATTEMPTS veces
+JOB_RUNNING_TIMEOUT = int(os.getenv("JOB_RUNNING_TIMEOUT", "600"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
@@ -4,8 +4,6 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from core import views as v
-from django.conf import settings # 👈 Importa settings
-from django.conf.urls.static import static # 👈 Importa static
 
 router = DefaultRouter()
 router.register(r"me", v.MeViewSet, basename="me")
@@ -26,6 +24,7 @@ router.register(r"pets", v.PetViewSet, basename="pet")
 router.register(r"family-members", v.FamilyMemberViewSet, basename="familymember")
 router.register(r"notifications", v.NotificationViewSet, basename="notification")
 router.register(r"maintenance-attachments", v.MaintenanceRequestAttachmentViewSet, basename="maintenanceattachment")
+router.register(r"jobs", v.JobViewSet)
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -40,6 +39,7 @@ urlpatterns = [
     path("api/reports/finance/", v.FinanceReportView.as_view()),  # <-- NUEVO
     # Rutas de DRF y apps
     path("api/reports/dashboard-stats/", v.DashboardStatsView.as_view()),
+    path("api/reports/response-cache/", v.ResponseCacheStatsView.as_view()),
     path("api/fees/<int:fee_id>/create-payment-preference/", v.FeePaymentPreferenceView.as_view()),
     path("api/payments/webhook/mercadopago/", v.MercadoPagoWebhookView.as_view()),
     
@@ -48,5 +48,5 @@ urlpatterns = [
   #  path("api/", include("todos.urls")),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# Los adjuntos no se publican en MEDIA_URL: se entregan por /api/maintenance-attachments/<id>/file/
+# tras validar el acceso (MEDIA_SERVE_MODE en settings).
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from .models import Profile, Unit, ExpenseType, Fee, Payment, Notice
 from .models import MaintenanceRequest # <-- Añadir
+from .models import Job
 
 @admin.register(ExpenseType)
 class ExpenseTypeAdmin(admin.ModelAdmin):
@@ -15,9 +16,10 @@ class UnitAdmin(admin.ModelAdmin):
 
 @admin.register(Fee)
 class FeeAdmin(admin.ModelAdmin):
-    list_display = ("id", "unit", "expense_type", "period", "amount", "status", "issued_at", "due_date")
+    list_display = ("id", "unit", "expense_type", "period", "amount", "paid_total", "balance", "status", "issued_at", "due_date")
     list_filter = ("status", "period", "expense_type")
     search_fields = ("unit__code", "unit__owner__username")
+    readonly_fields = ("paid_total",)
 
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
@@ -60,4 +62,10 @@ class ReservationAdmin(admin.ModelAdmin):
 @admin.register(MaintenanceRequest)
 class MaintenanceRequestAdmin(admin.ModelAdmin):
     list_display = ('title', 'status', 'unit', 'reported_by', 'created_at')
-    list_filter = ('status', 'unit')    
\ No newline at end of file
+    list_filter = ('status', 'unit')    
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "progress", "total", "created_by", "created_at", "finished_at")
+    list_filter = ("status", "kind")
+    readonly_fields = ("result", "error", "started_at", "finished_at")
@@ -0,0 +1,81 @@
+# core/authentication.py
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .permissions import get_role
+
+User = get_user_model()
+
+# Claims firmados que permiten resolver permisos sin consultar la base
+ROLE_CLAIMS = ("role", "is_staff", "is_superuser")
+
+
+def set_role_claims(token, user) -> None:
+    token["role"] = get_role(user)
+    token["is_staff"] = user.is_staff
+    token["is_superuser"] = user.is_superuser
+
+
+def tokens_for_user(user) -> RefreshToken:
+    """Refresh token (y su access token derivado) con el rol y los flags de staff como claims."""
+    refresh = RefreshToken.for_user(user)
+    set_role_claims(refresh, user)
+    return refresh
+
+
+def token_user(user_id, claims) -> User:
+    """
+    Instancia de ``User`` construida solo con los claims del token: ``pk``, ``is_staff``,
+    ``is_superuser`` y ``token_role`` no consultan la base. El resto de los campos queda
+    diferido y el primer acceso a cualquiera de ellos los carga todos en una sola consulta.
+    """
+    known = {
+        User._meta.pk.attname: User._meta.pk.to_python(user_id),
+        "is_staff": bool(claims["is_staff"]),
+        "is_superuser": bool(claims["is_superuser"]),
+        "is_active": True,
+    }
+    # from_db asigna los valores en el orden de concrete_fields, no en el de field_names
+    names = [field.attname for field in User._meta.concrete_fields if field.attname in known]
+    user = User.from_db(DEFAULT_DB_ALIAS, names, [known[name] for name in names])
+    user.token_role = claims["role"]
+
+    def refresh_from_db(using=None, fields=None, **kwargs):
+        deferred = user.get_deferred_fields()
+        if fields and set(fields) <= deferred:
+            fields = deferred
+        User.refresh_from_db(user, using=using, fields=fields, **kwargs)
+
+    user.refresh_from_db = refresh_from_db
+    return user
+
+
+class RoleJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication que, si el token trae los claims de rol, entrega un usuario liviano sin
+    consultar la base. Los tokens emitidos antes de agregar los claims siguen cargando el usuario.
+    Un usuario desactivado conserva el acceso hasta que vence su access token.
+    """
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in ROLE_CLAIMS):
+            return super().get_user(validated_token)
+        return token_user(validated_token[api_settings.USER_ID_CLAIM], validated_token)
+
+
+class QueryTokenJWTAuthentication(RoleJWTAuthentication):
+    """
+    Además de ``Authorization: Bearer`` acepta ``?token=<access>`` para recursos que el
+    navegador pide sin cabeceras (``<img src>``, descargas). Solo se usa en esas vistas.
+    """
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            return result
+        raw = request.query_params.get("token")
+        if not raw:
+            return None
+        validated_token = self.get_validated_token(raw.encode())
+        return self.get_user(validated_token), validated_token
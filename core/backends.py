@@ -0,0 +1,34 @@
+# core/backends.py
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models.functions import Lower
+
+User = get_user_model()
+
+
+class EmailOrUsernameBackend(ModelBackend):
+    """
+    Autentica con email (si el identificador contiene '@') o username, sin distinguir
+    mayúsculas. La búsqueda compara ``LOWER(campo)`` para usar los índices funcionales
+    ``auth_user_email_lower_idx`` / ``auth_user_username_lower_idx`` y trae el perfil en la
+    misma consulta, así el login emite el token sin otra lectura.
+    """
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        identifier = (username or kwargs.get("email") or "").strip()
+        if not identifier or password is None:
+            return None
+        field = "email" if "@" in identifier else User.USERNAME_FIELD
+        user = (
+            User.objects.select_related("profile")
+            .alias(identifier_lower=Lower(field))
+            .filter(identifier_lower=identifier.lower())
+            .order_by("pk")
+            .first()
+        )
+        if user is None:
+            # Igual que ModelBackend: se calcula un hash para no revelar qué usuarios existen
+            User().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,15 @@
+# core/exceptions.py
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class Conflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "El recurso fue modificado por otra solicitud."
+    default_code = "conflict"
+
+
+class PayloadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "El archivo supera el tamaño máximo permitido."
+    default_code = "payload_too_large"
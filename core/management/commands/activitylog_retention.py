@@ -0,0 +1,33 @@
+# EN: core/management/commands/activitylog_retention.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.services.activity import archive_old_activity, ensure_partitions
+
+
+class Command(BaseCommand):
+    help = ('Crea las particiones mensuales próximas de ActivityLog y exporta a JSONL comprimido '
+            '(y elimina) los meses que exceden la retención.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-months', type=int, default=settings.ACTIVITY_LOG_RETENTION_MONTHS,
+                            help='Meses completos que se conservan además del actual.')
+        parser.add_argument('--archive-dir', default=settings.ACTIVITY_LOG_ARCHIVE_DIR,
+                            help='Carpeta donde se guardan los archivos exportados.')
+        parser.add_argument('--ahead', type=int, default=2, help='Particiones futuras a crear por adelantado.')
+        parser.add_argument('--dry-run', action='store_true', help='Solo muestra qué meses se archivarían.')
+
+    def handle(self, *args, **options):
+        if not options['dry_run']:
+            for name in ensure_partitions(options['ahead']):
+                self.stdout.write(f'  - Partición creada: {name}')
+
+        results = archive_old_activity(options['keep_months'], options['archive_dir'], dry_run=options['dry_run'])
+        for item in results:
+            if options['dry_run']:
+                self.stdout.write(f'  - {item["month"]}: se archivaría en {item["archive"]}')
+            elif item['rows']:
+                self.stdout.write(f'  - {item["month"]}: {item["rows"]} registros archivados en {item["archive"]}')
+            else:
+                self.stdout.write(f'  - {item["month"]}: sin registros')
+        self.stdout.write(self.style.SUCCESS(f'Proceso completado. Meses procesados: {len(results)}.'))
@@ -0,0 +1,105 @@
+# EN: core/management/commands/bench_login.py
+
+import statistics
+import threading
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, connections, reset_queries
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from core.models import Profile
+from core.services.activity import activity_buffer
+from core.views import LoginView
+
+User = get_user_model()
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = ('Mide la latencia de POST /api/auth/login/ con usuarios temporales y varios hilos '
+            'concurrentes; informa p50, p99 y consultas por login.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help='Usuarios temporales a crear.')
+        parser.add_argument('--requests', type=int, default=200, help='Logins totales a ejecutar.')
+        parser.add_argument('--concurrency', type=int, default=8, help='Hilos concurrentes.')
+        parser.add_argument('--by', choices=['email', 'username'], default='email', help='Identificador usado en el login.')
+
+    def handle(self, *args, **options):
+        prefix = f'bench-{uuid.uuid4().hex[:8]}'
+        password = uuid.uuid4().hex
+        template = User(username='template')
+        template.set_password(password)
+        # create() uno a uno para que las señales mantengan los contadores del dashboard
+        users = [
+            User.objects.create(username=f'{prefix}-{i}', email=f'{prefix}-{i}@Bench.Example', password=template.password)
+            for i in range(options['users'])
+        ]
+        Profile.objects.bulk_create([Profile(user=user, role='RESIDENT') for user in users])
+        identifiers = [
+            (user.email.upper() if options['by'] == 'email' else user.username.upper()) for user in users
+        ]
+        self.stdout.write(f'Usuarios creados: {len(users)} ({prefix}-*)')
+
+        factory, view = APIRequestFactory(), LoginView.as_view()
+
+        def login(identifier):
+            return view(factory.post('/api/auth/login/', {'username': identifier, 'password': password}, format='json'))
+
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                response = login(identifiers[0])
+            if response.status_code != 200:
+                self.stderr.write(self.style.ERROR(f'El login de prueba falló: {response.status_code} {response.data}'))
+                return
+            self.stdout.write(f'Consultas por login: {len(queries)}')
+
+            latencies, errors, lock = [], [], threading.Lock()
+            counter = iter(range(options['requests']))
+
+            def worker():
+                try:
+                    while True:
+                        with lock:
+                            i = next(counter, None)
+                        if i is None:
+                            return
+                        start = time.perf_counter()
+                        r = login(identifiers[i % len(identifiers)])
+                        elapsed = (time.perf_counter() - start) * 1000
+                        with lock:
+                            (latencies if r.status_code == 200 else errors).append(elapsed)
+                finally:
+                    connections.close_all()
+
+            started = time.perf_counter()
+            threads = [threading.Thread(target=worker) for _ in range(options['concurrency'])]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            total = time.perf_counter() - started
+            reset_queries()
+
+            if not latencies:
+                self.stderr.write(self.style.ERROR(f'Ningún login exitoso ({len(errors)} errores).'))
+                return
+            self.stdout.write(
+                f'Logins: {len(latencies)} ok, {len(errors)} con error, {len(latencies) / total:.1f}/s '
+                f'con {options["concurrency"]} hilos'
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'p50 = {_percentile(latencies, 50):.1f} ms | p99 = {_percentile(latencies, 99):.1f} ms | '
+                f'media = {statistics.fmean(latencies):.1f} ms | máx = {max(latencies):.1f} ms'
+            ))
+        finally:
+            activity_buffer.flush()
+            User.objects.filter(username__startswith=f'{prefix}-').delete()
@@ -0,0 +1,18 @@
+# EN: core/management/commands/build_attachment_variants.py
+
+from django.core.management.base import BaseCommand
+from core.services.attachments import build_pending_variants
+
+
+class Command(BaseCommand):
+    help = ('Genera la miniatura y la versión reducida de los adjuntos de mantenimiento que aún no '
+            'las tienen (incluye los subidos antes del almacenamiento por contenido).')
+
+    def handle(self, *args, **options):
+        result = build_pending_variants()
+
+        self.stdout.write(f'Adjuntos pendientes: {result["pending"]}')
+        self.stdout.write(f'Originales procesados: {result["built"]}')
+        if result["failed"]:
+            self.stdout.write(self.style.WARNING(f'Originales ilegibles: {result["failed"]}'))
+        self.stdout.write(self.style.SUCCESS('Proceso completado.'))
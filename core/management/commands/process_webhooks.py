@@ -0,0 +1,34 @@
+# EN: core/management/commands/process_webhooks.py
+
+import signal
+import time
+from django.core.management.base import BaseCommand
+from core.services.webhooks import process_next
+
+
+class Command(BaseCommand):
+    help = 'Aplica los webhooks de pago pendientes (WebhookEvent) mediante register_payment.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Procesa los pendientes y termina en lugar de quedarse esperando.')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Segundos de espera cuando no hay eventos pendientes.')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        self.stdout.write('Worker de webhooks iniciado.')
+        while not self.stopping:
+            event = process_next()
+            if event is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+            style = self.style.ERROR if event.status in ('FAILED', 'PENDING') else self.style.SUCCESS
+            self.stdout.write(style(f'  - {event}'))
+        self.stdout.write('Worker detenido.')
+
+    def stop(self, signum, frame):
+        self.stopping = True
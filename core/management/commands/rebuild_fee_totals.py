@@ -0,0 +1,18 @@
+# EN: core/management/commands/rebuild_fee_totals.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.services.fees import rebuild_paid_totals
+
+
+class Command(BaseCommand):
+    help = 'Recalcula Fee.paid_total desde los pagos registrados y corrige los estados desfasados.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            result = rebuild_paid_totals()
+
+        self.stdout.write(f'Cuotas con total pagado corregido: {result["fixed"]}')
+        self.stdout.write(f'Cuotas marcadas como pagadas: {result["paid"]}')
+        self.stdout.write(f'Cuotas reabiertas: {result["reopened"]}')
+        self.stdout.write(self.style.SUCCESS('Proceso completado.'))
@@ -0,0 +1,12 @@
+# EN: core/management/commands/rebuild_finance_rollups.py
+
+from django.core.management.base import BaseCommand
+from core.services.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los totales financieros precalculados (FinanceRollup) desde cuotas y pagos.'
+
+    def handle(self, *args, **options):
+        count = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f'Proceso completado. Se generaron {count} filas de resumen.'))
@@ -0,0 +1,13 @@
+# EN: core/management/commands/reconcile_dashboard_counters.py
+
+from django.core.management.base import BaseCommand
+from core.services.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los contadores del dashboard desde las tablas de origen (corrige desvíos).'
+
+    def handle(self, *args, **options):
+        for name, value in reconcile().items():
+            self.stdout.write(f'  - {name}: {value}')
+        self.stdout.write(self.style.SUCCESS('Contadores reconciliados.'))
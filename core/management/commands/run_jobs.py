@@ -0,0 +1,41 @@
+# EN: core/management/commands/run_jobs.py
+
+import signal
+import time
+from django.core.management.base import BaseCommand
+from core.services.jobs import claim_next, run_job
+from core.services.notices import announce_due_notices
+
+
+class Command(BaseCommand):
+    help = 'Procesa los trabajos en segundo plano de la cola (Job).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Vacía la cola y termina en lugar de quedarse esperando.')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Segundos de espera cuando la cola está vacía.')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        self.stdout.write('Worker de trabajos iniciado.')
+        while not self.stopping:
+            job = claim_next()
+            if job is None:
+                # Avisos programados que ya llegaron a su fecha: encolan su envío y se vuelve a mirar la cola
+                if announce_due_notices():
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+            self.stdout.write(f'  - Ejecutando {job}')
+            job = run_job(job)
+            style = self.style.SUCCESS if job.status == 'DONE' else self.style.ERROR
+            self.stdout.write(style(f'    {job.kind} #{job.pk}: {job.status}'))
+        self.stdout.write('Worker detenido.')
+
+    def stop(self, signum, frame):
+        # Termina el trabajo en curso antes de salir
+        self.stopping = True
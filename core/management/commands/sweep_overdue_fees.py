@@ -0,0 +1,17 @@
+# EN: core/management/commands/sweep_overdue_fees.py
+
+import datetime
+from django.core.management.base import BaseCommand
+from core.services.fees import sweep_overdue_fees
+
+
+class Command(BaseCommand):
+    help = 'Marca como vencidas (OVERDUE) las cuotas emitidas cuya fecha de vencimiento ya pasó.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=datetime.date.fromisoformat, help='Fecha de referencia (YYYY-MM-DD). Por defecto, hoy.')
+        parser.add_argument('--batch-size', type=int, help='Actualiza por lotes de este tamaño en lugar de un único UPDATE.')
+
+    def handle(self, *args, **options):
+        changed = sweep_overdue_fees(today=options['date'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Cuotas marcadas como vencidas: {changed}'))
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:06
+
+import django.db.models.expressions
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_paid_total(apps, schema_editor):
+    Fee = apps.get_model('core', 'Fee')
+    Payment = apps.get_model('core', 'Payment')
+    totals = Payment.objects.filter(fee=OuterRef('pk')).values('fee').annotate(s=Sum('amount')).values('s')
+    Fee.objects.update(paid_total=Coalesce(Subquery(totals), Value(Decimal('0')), output_field=models.DecimalField(max_digits=10, decimal_places=2)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_maintenancerequestattachment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fee',
+            name='paid_total',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.RunPython(backfill_paid_total, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='fee',
+            name='balance',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('amount'), '-', models.F('paid_total')), output_field=models.DecimalField(decimal_places=2, max_digits=10)),
+        ),
+        migrations.AddIndex(
+            model_name='fee',
+            index=models.Index(fields=['balance'], name='fee_balance_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_job'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fee',
+            index=models.Index(condition=models.Q(('status', 'ISSUED')), fields=['due_date'], name='fee_issued_due_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_rollups(apps, schema_editor):
+    Fee = apps.get_model('core', 'Fee')
+    Payment = apps.get_model('core', 'Payment')
+    FinanceRollup = apps.get_model('core', 'FinanceRollup')
+    keys = ('fee__period', 'fee__expense_type_id', 'fee__status')
+    payment_counts = {
+        tuple(row[k] for k in keys): row['n']
+        for row in Payment.objects.values(*keys).annotate(n=Count('id'))
+    }
+    FinanceRollup.objects.bulk_create(
+        (
+            FinanceRollup(
+                period=row['period'], expense_type_id=row['expense_type_id'], status=row['status'],
+                issued_amount=row['issued'] or 0, paid_amount=row['paid'] or 0, fee_count=row['fees'],
+                payment_count=payment_counts.get((row['period'], row['expense_type_id'], row['status']), 0),
+            )
+            for row in Fee.objects.values('period', 'expense_type_id', 'status').annotate(
+                issued=Sum('amount'), paid=Sum('paid_total'), fees=Count('id'),
+            )
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_fee_issued_due_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(max_length=7)),
+                ('status', models.CharField(choices=[('ISSUED', 'Emitida'), ('PAID', 'Pagada'), ('OVERDUE', 'Vencida')], max_length=8)),
+                ('issued_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('fee_count', models.PositiveIntegerField(default=0)),
+                ('payment_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['period', 'expense_type', 'status'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='fee',
+            index=models.Index(fields=['period'], name='fee_period_idx'),
+        ),
+        migrations.AddField(
+            model_name='financerollup',
+            name='expense_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='core.expensetype'),
+        ),
+        migrations.AddConstraint(
+            model_name='financerollup',
+            constraint=models.UniqueConstraint(fields=('period', 'expense_type', 'status'), name='uniq_finance_rollup'),
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
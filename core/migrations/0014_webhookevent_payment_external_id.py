@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_dashboardcounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=30)),
+                ('event_id', models.CharField(max_length=100)),
+                ('topic', models.CharField(blank=True, max_length=50)),
+                ('resource_id', models.CharField(blank=True, max_length=100)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('PENDING', 'Pendiente'), ('PROCESSED', 'Procesado'), ('IGNORED', 'Ignorado'), ('FAILED', 'Fallido')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-received_at'],
+                'indexes': [models.Index(condition=models.Q(('status', 'PENDING')), fields=['received_at'], name='webhook_pending_idx')],
+                'constraints': [models.UniqueConstraint(fields=('provider', 'event_id'), name='uniq_webhook_event')],
+            },
+        ),
+    ]
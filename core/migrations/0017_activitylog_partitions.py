@@ -0,0 +1,114 @@
+# Convierte core_activitylog en una tabla particionada por mes (solo PostgreSQL).
+# En otros motores no hace nada: la retención borra por rangos de fecha.
+
+import datetime
+from django.conf import settings
+from django.db import migrations
+
+TABLE = 'core_activitylog'
+
+
+def _month_starts(first, last):
+    month = first.replace(day=1)
+    while month <= last:
+        yield month
+        month = (month + datetime.timedelta(days=32)).replace(day=1)
+
+
+def _next_month(month):
+    return (month + datetime.timedelta(days=32)).replace(day=1)
+
+
+def partition_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    user_table = User._meta.db_table
+    user_pk_type = User._meta.pk.rel_db_type(connection)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT MIN("timestamp"), MAX("timestamp") FROM {TABLE}')
+        first, last = cursor.fetchone()
+        today = datetime.date.today()
+        first = first.date() if first else today
+        last = max(last.date() if last else today, today)
+
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {TABLE}_old')
+        cursor.execute(f'ALTER TABLE {TABLE}_old ALTER COLUMN id DROP IDENTITY IF EXISTS')
+        cursor.execute(f'ALTER TABLE {TABLE}_old RENAME CONSTRAINT {TABLE}_pkey TO {TABLE}_old_pkey')
+        cursor.execute('DROP INDEX IF EXISTS activitylog_timestamp_idx')
+        cursor.execute(f'DROP INDEX IF EXISTS {TABLE}_user_id_idx')
+        cursor.execute(f'''
+            CREATE TABLE {TABLE} (
+                id bigint GENERATED BY DEFAULT AS IDENTITY,
+                action varchar(255) NOT NULL,
+                "timestamp" timestamp with time zone NOT NULL,
+                details text NULL,
+                user_id {user_pk_type} NOT NULL REFERENCES "{user_table}" (id) DEFERRABLE INITIALLY DEFERRED,
+                PRIMARY KEY (id, "timestamp")
+            ) PARTITION BY RANGE ("timestamp")
+        ''')
+        cursor.execute(f'CREATE INDEX activitylog_timestamp_idx ON {TABLE} ("timestamp" DESC, id DESC)')
+        cursor.execute(f'CREATE INDEX {TABLE}_user_id_idx ON {TABLE} (user_id)')
+        cursor.execute(f'CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT')
+        for month in _month_starts(first, _next_month(_next_month(last))):
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_p{month:%Y%m} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') TO ('{_next_month(month):%Y-%m-%d} 00:00:00+00')"
+            )
+        cursor.execute(f'''
+            INSERT INTO {TABLE} (id, action, "timestamp", details, user_id) OVERRIDING SYSTEM VALUE
+            SELECT id, action, "timestamp", details, user_id FROM {TABLE}_old
+        ''')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), COALESCE((SELECT MAX(id) FROM {TABLE}), 0) + 1, false)"
+        )
+        cursor.execute(f'DROP TABLE {TABLE}_old')
+
+
+def unpartition_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    user_table = User._meta.db_table
+    user_pk_type = User._meta.pk.rel_db_type(connection)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {TABLE}_partitioned')
+        cursor.execute(f'ALTER TABLE {TABLE}_partitioned ALTER COLUMN id DROP IDENTITY IF EXISTS')
+        cursor.execute(f'ALTER TABLE {TABLE}_partitioned RENAME CONSTRAINT {TABLE}_pkey TO {TABLE}_partitioned_pkey')
+        cursor.execute('DROP INDEX IF EXISTS activitylog_timestamp_idx')
+        cursor.execute(f'DROP INDEX IF EXISTS {TABLE}_user_id_idx')
+        cursor.execute(f'''
+            CREATE TABLE {TABLE} (
+                id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                action varchar(255) NOT NULL,
+                "timestamp" timestamp with time zone NOT NULL,
+                details text NULL,
+                user_id {user_pk_type} NOT NULL REFERENCES "{user_table}" (id) DEFERRABLE INITIALLY DEFERRED
+            )
+        ''')
+        cursor.execute(f'CREATE INDEX activitylog_timestamp_idx ON {TABLE} ("timestamp" DESC, id DESC)')
+        cursor.execute(f'CREATE INDEX {TABLE}_user_id_idx ON {TABLE} (user_id)')
+        cursor.execute(f'''
+            INSERT INTO {TABLE} (id, action, "timestamp", details, user_id) OVERRIDING SYSTEM VALUE
+            SELECT id, action, "timestamp", details, user_id FROM {TABLE}_partitioned
+        ''')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), COALESCE((SELECT MAX(id) FROM {TABLE}), 0) + 1, false)"
+        )
+        cursor.execute(f'DROP TABLE {TABLE}_partitioned CASCADE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_activitylog_timestamp_default'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_table, unpartition_table),
+    ]
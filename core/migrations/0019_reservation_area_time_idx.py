@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_tableversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['area', 'start_time', 'end_time'], name='reservation_area_time_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Índices funcionales para el login por email o username sin distinguir mayúsculas
+# (core.backends.EmailOrUsernameBackend filtra por LOWER(campo)).
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0019_reservation_area_time_idx'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS auth_user_email_lower_idx ON auth_user (LOWER(email))',
+            'DROP INDEX IF EXISTS auth_user_email_lower_idx',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS auth_user_username_lower_idx ON auth_user (LOWER(username))',
+            'DROP INDEX IF EXISTS auth_user_username_lower_idx',
+        ),
+    ]
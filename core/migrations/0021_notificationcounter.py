@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_unread(apps, schema_editor):
+    Notification = apps.get_model('core', 'Notification')
+    NotificationCounter = apps.get_model('core', 'NotificationCounter')
+    rows = Notification.objects.filter(is_read=False).values('user_id').annotate(n=Count('id')).values_list('user_id', 'n')
+    NotificationCounter.objects.bulk_create([NotificationCounter(user_id=user_id, unread=n) for user_id, n in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0020_auth_user_lower_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_unread, migrations.RunPython.noop),
+    ]
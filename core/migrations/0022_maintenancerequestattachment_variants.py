@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_notificationcounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maintenancerequestattachment',
+            name='content_type',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='maintenancerequestattachment',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='maintenancerequestattachment',
+            name='medium',
+            field=models.ImageField(blank=True, max_length=200, upload_to='maintenance/variants/'),
+        ),
+        migrations.AddField(
+            model_name='maintenancerequestattachment',
+            name='sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='maintenancerequestattachment',
+            name='size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='maintenancerequestattachment',
+            name='thumbnail',
+            field=models.ImageField(blank=True, max_length=200, upload_to='maintenance/variants/'),
+        ),
+        migrations.AddField(
+            model_name='maintenancerequestattachment',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
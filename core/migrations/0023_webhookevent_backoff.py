@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:46
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_maintenancerequestattachment_variants'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='webhookevent',
+            name='webhook_pending_idx',
+        ),
+        migrations.AddField(
+            model_name='webhookevent',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='webhookevent',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pendiente'), ('PROCESSING', 'Procesando'), ('PROCESSED', 'Procesado'), ('IGNORED', 'Ignorado'), ('FAILED', 'Fallido')], default='PENDING', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='webhookevent',
+            index=models.Index(condition=models.Q(('status__in', ['PENDING', 'PROCESSING'])), fields=['next_attempt_at'], name='webhook_due_idx'),
+        ),
+    ]
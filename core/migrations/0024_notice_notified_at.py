@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:48
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def mark_published(apps, schema_editor):
+    # Los avisos ya publicados se anunciaron al crearse; solo quedan pendientes los programados
+    Notice = apps.get_model('core', 'Notice')
+    Notice.objects.filter(publish_date__lte=timezone.now()).update(notified_at=F('publish_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_webhookevent_backoff'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notice',
+            name='notified_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(mark_published, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='notice',
+            index=models.Index(condition=models.Q(('notified_at__isnull', True)), fields=['publish_date'], name='notice_unannounced_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:49
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def drop_duplicates(apps, schema_editor):
+    # Copias de la misma foto en la misma solicitud: se conserva la primera (el archivo es compartido)
+    Attachment = apps.get_model('core', 'MaintenanceRequestAttachment')
+    keep = Attachment.objects.exclude(sha256='').values('request_id', 'sha256').annotate(first=Min('id')).values('first')
+    Attachment.objects.exclude(sha256='').exclude(id__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_notice_notified_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='maintenancerequestattachment',
+            constraint=models.UniqueConstraint(condition=models.Q(('sha256', ''), _negated=True), fields=('request', 'sha256'), name='attachment_request_sha256_uniq'),
+        ),
+    ]
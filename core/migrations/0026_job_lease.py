@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:01
+
+from django.conf import settings
+import datetime
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def lease_running(apps, schema_editor):
+    # Los RUNNING de antes no tienen concesión: si su worker ya no existe se retoman al vencer
+    Job = apps.get_model('core', 'Job')
+    expires = timezone.now() + datetime.timedelta(seconds=settings.JOB_RUNNING_TIMEOUT)
+    Job.objects.filter(status='RUNNING').update(lease_expires_at=expires, attempts=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_attachment_request_sha256_uniq'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(lease_running, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'RUNNING')), fields=['lease_expires_at'], name='job_running_lease_idx'),
+        ),
+    ]
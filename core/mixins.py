@@ -0,0 +1,144 @@
+# core/mixins.py
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from .services import response_cache, versions
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Recorta los campos del serializer según el contexto que arma ``SparseFieldsViewMixin``:
+    ``fields`` (conjunto pedido o None = todos), ``expand`` (relaciones anidadas a incluir)
+    y ``expandable`` (relaciones anidadas que solo se emiten si están en ``expand``).
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get("fields")
+        expand = self.context.get("expand", set())
+        expandable = self.context.get("expandable", set())
+        for name in list(self.fields):
+            if name in expandable and name not in expand:
+                self.fields.pop(name)
+            elif fields is not None and name not in fields and name not in expand:
+                self.fields.pop(name)
+
+
+class SparseFieldsViewMixin:
+    """
+    ``?fields=a,b`` limita los campos de la respuesta y ``?expand=x,y`` elige las relaciones
+    anidadas. Sin parámetros se emite todo, como antes. Los mismos conjuntos deciden qué
+    ``select_related``/``prefetch_related`` se aplican, así que lo no pedido no se consulta:
+
+    - ``select_related_fields``: campo -> rutas de ``select_related`` que necesita.
+    - ``prefetch_fields``: relación anidada -> lookups de ``prefetch_related`` (str o ``Prefetch``).
+
+    Solo aplica a lecturas; en escrituras el serializer conserva todos sus campos.
+    """
+    select_related_fields = {}
+    prefetch_fields = {}
+    expand_params = ("expand",)
+
+    def _param_set(self, name):
+        raw = self.request.query_params.get(name) if self.request is not None else None
+        if raw is None:
+            return None
+        return {part.strip() for part in raw.split(",") if part.strip()}
+
+    def sparse_fields_enabled(self):
+        return self.request is not None and self.request.method in SAFE_METHODS
+
+    def requested_fields(self):
+        return self._param_set("fields") if self.sparse_fields_enabled() else None
+
+    def expanded_fields(self):
+        expandable = set(self.prefetch_fields)
+        if not self.sparse_fields_enabled():
+            return expandable
+        for param in self.expand_params:
+            expand = self._param_set(param)
+            if expand is not None:
+                return expand & expandable
+        fields = self.requested_fields()
+        return expandable if fields is None else fields & expandable
+
+    def field_is_visible(self, name, fields, expand):
+        if name in self.prefetch_fields:
+            return name in expand
+        return fields is None or name in fields
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.sparse_fields_enabled():
+            context["fields"] = self.requested_fields()
+            context["expand"] = self.expanded_fields()
+            context["expandable"] = set(self.prefetch_fields)
+        return context
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        fields, expand = self.requested_fields(), self.expanded_fields()
+        related = [
+            path
+            for name, paths in self.select_related_fields.items()
+            if self.field_is_visible(name, fields, expand)
+            for path in paths
+        ]
+        if related:
+            qs = qs.select_related(*related)
+        lookups = [lookup for name in expand for lookup in self.prefetch_fields[name]]
+        if lookups:
+            qs = qs.prefetch_related(*lookups)
+        return qs
+
+
+class ConditionalGetMixin:
+    """
+    Agrega ETag y Last-Modified a ``list``/``retrieve`` a partir de la versión de las tablas
+    de ``version_models`` (una consulta a ``TableVersion``) y responde 304 a
+    ``If-None-Match``/``If-Modified-Since`` sin consultar ni serializar los datos.
+    ``get_version_parts`` puede extenderse con otras partes baratas de calcular.
+
+    Con ``cache_list_responses`` el listado serializado se guarda en la caché
+    ``RESPONSE_CACHE_ALIAS`` bajo el mismo ETag, así que un cambio en las tablas
+    invalida la entrada sin depender de un TTL.
+    """
+    version_models = ()
+    cache_list_responses = False
+
+    def get_version_parts(self):
+        state = versions.current(self.version_models)
+        parts = [f"{name}:{version}" for name, (version, _) in state.items()]
+        last_modified = max((updated_at for _, updated_at in state.values() if updated_at), default=None)
+        return parts, last_modified
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        parts, last_modified = self.get_version_parts()
+        etag = versions.make_etag(request.get_full_path(), request.accepted_media_type, *parts)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+        if response is None:
+            self.etag = etag
+            response = handler(request, *args, **kwargs)
+        response["ETag"] = etag
+        if timestamp:
+            response["Last-Modified"] = http_date(timestamp)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def cached_list(self, request, *args, **kwargs):
+        data = response_cache.lookup(self.etag)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            response_cache.store(self.etag, response.data)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        handler = self.cached_list if self.cache_list_responses else super().list
+        return self.conditional_response(request, handler, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
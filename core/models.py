@@ -1,5 +1,5 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
 User = settings.AUTH_USER_MODEL
@@ -40,9 +40,51 @@ class Fee(models.Model):
     status = models.CharField(max_length=8, choices=STATUS, default="ISSUED")
     issued_at = models.DateTimeField(auto_now_add=True)
     due_date = models.DateField(null=True, blank=True)
+    # Total pagado desnormalizado; lo mantienen los servicios de pagos con F()
+    paid_total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    balance = models.GeneratedField(
+        expression=models.F("amount") - models.F("paid_total"),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+    )
     class Meta:
         unique_together = ("unit", "expense_type", "period")
+        indexes = [
+            models.Index(fields=["balance"], name="fee_balance_idx"),
+            # Solo las cuotas emitidas son candidatas a vencer
+            models.Index(fields=["due_date"], condition=models.Q(status="ISSUED"), name="fee_issued_due_idx"),
+            models.Index(fields=["period"], name="fee_period_idx"),
+            models.Index(fields=["-issued_at", "-id"], name="fee_issued_at_idx"),
+        ]
     def __str__(self): return f"{self.unit} {self.period} {self.expense_type}"
+    def save(self, *args, **kwargs):
+        # paid_total solo lo escriben los servicios de pagos con UPDATE ... F(): un save con la
+        # instancia desactualizada (PUT/PATCH, admin) no debe pisar los pagos concurrentes.
+        # La transacción permite a la señal pre_save bloquear la fila hasta el commit.
+        if not self._state.adding:
+            fields = kwargs.get("update_fields")
+            if fields is None:
+                fields = [f.name for f in self._meta.concrete_fields if not f.primary_key and not f.generated]
+            kwargs["update_fields"] = [name for name in fields if name != "paid_total"]
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+class FinanceRollup(models.Model):
+    """Totales precalculados por (periodo, tipo de gasto, estado) para los reportes financieros."""
+    period = models.CharField(max_length=7)
+    expense_type = models.ForeignKey(ExpenseType, on_delete=models.CASCADE, related_name="rollups")
+    status = models.CharField(max_length=8, choices=Fee.STATUS)
+    issued_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    paid_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    fee_count = models.PositiveIntegerField(default=0)
+    payment_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    class Meta:
+        ordering = ["period", "expense_type", "status"]
+        constraints = [
+            models.UniqueConstraint(fields=["period", "expense_type", "status"], name="uniq_finance_rollup"),
+        ]
+    def __str__(self): return f"{self.period} {self.expense_type} {self.status}"
 
 class Payment(models.Model):
     fee = models.ForeignKey(Fee, on_delete=models.CASCADE, related_name="payments")
@@ -50,6 +92,8 @@ class Payment(models.Model):
     paid_at = models.DateTimeField(auto_now_add=True)
     method = models.CharField(max_length=30, default="cash")
     note = models.TextField(blank=True)
+    # Identificador del pago en el proveedor (ej. "mercadopago:123"); evita registrarlo dos veces
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
 
 class NoticeCategory(models.Model):
     name = models.CharField(max_length=50, unique=True)
@@ -64,8 +108,11 @@ class Notice(models.Model):
     publish_date = models.DateTimeField(default=timezone.now)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT)
     category = models.ForeignKey(NoticeCategory, on_delete=models.SET_NULL, null=True, blank=True, related_name="notices")
+    # Momento en que se encoló el envío "Nuevo aviso"; null mientras no se haya anunciado
+    notified_at = models.DateTimeField(null=True, blank=True, editable=False)
     class Meta:
         ordering = ["-publish_date"]
+        indexes = [models.Index(fields=["publish_date"], condition=models.Q(notified_at__isnull=True), name="notice_unannounced_idx")]
 
 class CommonArea(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -81,6 +128,8 @@ class Reservation(models.Model):
     end_time = models.DateTimeField()
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    class Meta:
+        indexes = [models.Index(fields=["area", "start_time", "end_time"], name="reservation_area_time_idx")]
     def __str__(self): return f"{self.area.name} - {self.user.username} ({self.start_time.strftime('%Y-%m-%d %H:%M')})"
 
 class MaintenanceRequest(models.Model):
@@ -101,11 +150,13 @@ class MaintenanceRequest(models.Model):
 class ActivityLog(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     action = models.CharField(max_length=255)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # default (no auto_now_add) para conservar la hora del evento al insertar en lote
+    timestamp = models.DateTimeField(default=timezone.now)
     details = models.TextField(blank=True, null=True)
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [models.Index(fields=["-timestamp", "-id"], name="activitylog_timestamp_idx")]
     def __str__(self): return f'{self.user.username} - {self.action} at {self.timestamp.strftime("%Y-%m-%d %H:%M")}'
 
 class MaintenanceRequestComment(models.Model):
@@ -149,10 +200,94 @@ class Notification(models.Model):
     link = models.CharField(max_length=255, blank=True, null=True, help_text="URL a la que debe dirigir la notificación")
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=["user", "-created_at", "-id"], name="notification_user_created_idx")]
     def __str__(self): return f"Notificación para {self.user.username}: {self.message}"
 
+class NotificationCounter(models.Model):
+    """Notificaciones no leídas por usuario, mantenidas de forma incremental (badge del frontend)."""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="notification_counter")
+    unread = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    def __str__(self): return f"{self.user_id}: {self.unread} sin leer"
+
 class MaintenanceRequestAttachment(models.Model):
     request = models.ForeignKey(MaintenanceRequest, on_delete=models.CASCADE, related_name='attachments')
+    # Los adjuntos nuevos se guardan por contenido (core.services.attachments.blob_path)
     file = models.ImageField(upload_to=maintenance_attachment_path)
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    content_type = models.CharField(max_length=50, blank=True)
+    size = models.PositiveBigIntegerField(null=True, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    # Variantes reducidas generadas por el trabajo "attachment_variants"; vacías hasta entonces
+    thumbnail = models.ImageField(upload_to='maintenance/variants/', max_length=200, blank=True)
+    medium = models.ImageField(upload_to='maintenance/variants/', max_length=200, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
-    def __str__(self): return f"Adjunto para la solicitud {self.request.id}"
\ No newline at end of file
+    class Meta:
+        # Una misma foto se adjunta una sola vez por solicitud (los adjuntos sin hash quedan fuera)
+        constraints = [models.UniqueConstraint(fields=["request", "sha256"], condition=~models.Q(sha256=""), name="attachment_request_sha256_uniq")]
+    def __str__(self): return f"Adjunto para la solicitud {self.request.id}"
+
+class Job(models.Model):
+    STATUS_CHOICES = [("QUEUED", "En cola"), ("RUNNING", "En ejecución"), ("DONE", "Completado"), ("FAILED", "Fallido")]
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="QUEUED")
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="jobs")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    # Mientras está RUNNING: si vence sin que el worker avise progreso, otro worker lo retoma
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at"], condition=models.Q(status="QUEUED"), name="job_queued_idx"),
+            models.Index(fields=["lease_expires_at"], condition=models.Q(status="RUNNING"), name="job_running_lease_idx"),
+        ]
+    def __str__(self): return f"{self.kind} #{self.pk} ({self.status})"
+
+class DashboardCounter(models.Model):
+    """Contadores del dashboard mantenidos de forma incremental por señales y servicios."""
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    def __str__(self): return f"{self.name} = {self.value}"
+
+class WebhookEvent(models.Model):
+    """Notificación cruda de un proveedor de pagos, deduplicada por su id y aplicada por un worker."""
+    STATUS_CHOICES = [
+        ("PENDING", "Pendiente"), ("PROCESSING", "Procesando"), ("PROCESSED", "Procesado"),
+        ("IGNORED", "Ignorado"), ("FAILED", "Fallido"),
+    ]
+    provider = models.CharField(max_length=30)
+    event_id = models.CharField(max_length=100)
+    topic = models.CharField(max_length=50, blank=True)
+    resource_id = models.CharField(max_length=100, blank=True)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="PENDING")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    # PENDING: próximo reintento (backoff). PROCESSING: vencimiento del reclamo si el worker cae
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    class Meta:
+        ordering = ["-received_at"]
+        constraints = [models.UniqueConstraint(fields=["provider", "event_id"], name="uniq_webhook_event")]
+        indexes = [
+            models.Index(fields=["next_attempt_at"], condition=models.Q(status__in=["PENDING", "PROCESSING"]), name="webhook_due_idx"),
+        ]
+    def __str__(self): return f"{self.provider} {self.topic} {self.event_id} ({self.status})"
+
+class TableVersion(models.Model):
+    """Versión por tabla, incrementada en cada cambio; alimenta los ETag de los catálogos."""
+    name = models.CharField(max_length=100, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+    def __str__(self): return f"{self.name} v{self.version}"
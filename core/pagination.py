@@ -0,0 +1,106 @@
+# core/pagination.py
+import json
+
+from django.db.models import Q
+from rest_framework.pagination import Cursor, CursorPagination, PageNumberPagination, _reverse_ordering
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor por keyset sobre el orden completo de la vista (no solo el primer campo, como
+    ``CursorPagination``): la posición es la tupla de valores de la última fila y la página
+    siguiente es un ``WHERE (a, id) < (x, y)`` sin OFFSET. Los empates en el primer campo y
+    las filas nuevas que llegan mientras se pagina no repiten ni saltan filas.
+    """
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view))
+        # Desempate por id en el mismo sentido del primer campo si el orden no lo trae
+        if ordering[-1].lstrip("-") not in ("id", "pk"):
+            ordering.append("-id" if ordering[0].startswith("-") else "id")
+        return tuple(ordering)
+
+    def _get_position_from_instance(self, instance, ordering):
+        return json.dumps([str(getattr(instance, field.lstrip("-"))) for field in ordering])
+
+    def _after(self, ordering, position):
+        values = json.loads(position)
+        condition = Q(pk__in=[])
+        for i, field in enumerate(ordering):
+            step = Q(**{f"{field.lstrip('-')}__{'lt' if field.startswith('-') else 'gt'}": values[i]})
+            for previous, value in zip(ordering[:i], values):
+                step &= Q(**{previous.lstrip("-"): value})
+            condition |= step
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse, position = (self.cursor.reverse, self.cursor.position) if self.cursor else (False, None)
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        if self.page:
+            self.next_position = self._get_position_from_instance(self.page[-1], self.ordering)
+            self.previous_position = self._get_position_from_instance(self.page[0], self.ordering)
+        else:
+            self.has_next = self.has_previous = False
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self.next_position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self.previous_position))
+
+
+class CursorOrPageNumberPagination(PageNumberPagination):
+    """
+    Paginación por número de página (compatible con los clientes actuales) que pasa a
+    paginación por cursor/keyset cuando el request trae ``?cursor=`` o ``?pagination=cursor``.
+    El orden del cursor sale de ``ordering`` de la vista; si no termina en ``id`` se agrega.
+    """
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def use_cursor(self, request):
+        params = request.query_params
+        return KeysetCursorPagination.cursor_query_param in params or params.get("pagination") == "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.cursor_paginator = KeysetCursorPagination()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + KeysetCursorPagination().get_schema_operation_parameters(view) + [{
+            "name": "pagination",
+            "required": False,
+            "in": "query",
+            "description": "Usa 'cursor' para paginar por cursor en lugar de por número de página.",
+            "schema": {"type": "string", "enum": ["cursor"]},
+        }]
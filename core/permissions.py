@@ -1,11 +1,25 @@
 from rest_framework.permissions import BasePermission
 
+
+def get_role(user):
+    """Rol del usuario: el claim del token si viene en él; si no, el del perfil (None si no tiene)."""
+    if hasattr(user, "token_role"):
+        return user.token_role
+    profile = getattr(user, "profile", None)
+    return profile.role if profile is not None else None
+
+
+def is_admin(user):
+    role = get_role(user)
+    if role is not None: return role == "ADMIN"
+    return user.is_staff or user.is_superuser
+
+
 class IsAdmin(BasePermission):
     def has_permission(self, request, view):
         u = request.user
         if not u or not u.is_authenticated: return False
-        if hasattr(u, "profile"): return u.profile.role == "ADMIN"
-        return u.is_staff or u.is_superuser
+        return is_admin(u)
 
 class IsOwnerOrAdmin(BasePermission):
     """
@@ -13,9 +27,9 @@ class IsOwnerOrAdmin(BasePermission):
     """
     def has_object_permission(self, request, view, obj):
         # Los admins pueden hacer todo
-        if request.user and (request.user.is_staff or getattr(request.user, 'profile', {}).get('role') == 'ADMIN'):
+        if request.user and (request.user.is_staff or get_role(request.user) == 'ADMIN'):
             return True
         
         # El dueño del objeto puede hacer todo sobre su objeto
         # Asume que el objeto tiene un campo 'user'.
-        return obj.user == request.user
\ No newline at end of file
+        return obj.user_id == request.user.pk
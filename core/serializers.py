@@ -1,5 +1,10 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.reverse import reverse
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 from django.utils import timezone
 from django.db.models import Q
 from django.db.models import Sum
@@ -7,8 +12,15 @@ from django.db import transaction # 👈 Asegúrate de que este import esté al
 from .models import (
     Profile, Unit, ExpenseType, Fee, Payment, Notice,
     CommonArea, Reservation, MaintenanceRequest, ActivityLog, MaintenanceRequestComment,
-    Vehicle, Pet, FamilyMember, NoticeCategory, Notification, MaintenanceRequestAttachment  # <-- ¡Añadido aquí!
+    Vehicle, Pet, FamilyMember, NoticeCategory, Notification, MaintenanceRequestAttachment,  # <-- ¡Añadido aquí!
+    Job,
 )
+from .authentication import set_role_claims
+from .exceptions import Conflict
+from .mixins import SparseFieldsSerializerMixin
+from .permissions import get_role
+from .services import attachments, notifications
+from .services.reservations import ReservationConflict, book
 User = get_user_model()
 
 # --- Serializers para modelos relacionados ---
@@ -47,7 +59,7 @@ class MeSerializer(serializers.Serializer):
     last_name = serializers.CharField(allow_blank=True)
     profile = ProfileSerializer(allow_null=True)
 
-class UserWithProfileSerializer(UserSerializer):
+class UserWithProfileSerializer(SparseFieldsSerializerMixin, UserSerializer):
     profile = ProfileSerializer(read_only=True)
     vehicles = VehicleSerializer(many=True, read_only=True)
     pets = PetSerializer(many=True, read_only=True)
@@ -106,7 +118,7 @@ class AdminUserWriteSerializer(serializers.ModelSerializer):
 
         return instance
 
-class UnitSerializer(serializers.ModelSerializer):
+class UnitSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     owner_username = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
@@ -127,13 +139,14 @@ class PaymentSerializer(serializers.ModelSerializer):
         model = Payment
         fields = ["id", "amount", "paid_at", "method", "note"]
 
-class FeeSerializer(serializers.ModelSerializer):
+class FeeSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     # Campos de solo lectura para mostrar información extra
     unit_code = serializers.CharField(source="unit.code", read_only=True)
     owner_username = serializers.CharField(source="unit.owner.username", read_only=True)
     expense_type_name = serializers.CharField(source="expense_type.name", read_only=True)
     payments = PaymentSerializer(many=True, read_only=True)
     total_paid = serializers.SerializerMethodField()
+    balance = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
 
     class Meta:
         model = Fee
@@ -152,13 +165,14 @@ class FeeSerializer(serializers.ModelSerializer):
             "due_date",
             "payments",
             "total_paid",
+            "balance",
         ]
         # Campos que el backend debe calcular y el usuario no debe poder enviar
         read_only_fields = ["id", "status", "issued_at"]
 
     def get_total_paid(self, obj):
-        """Calcula el total pagado para una cuota."""
-        return obj.payments.aggregate(total=Sum('amount'))['total'] or 0
+        """Total pagado de la cuota (columna desnormalizada paid_total)."""
+        return obj.paid_total or 0
 
 # 👇 AÑADE ESTE NUEVO SERIALIZADOR
 class NoticeCategorySerializer(serializers.ModelSerializer):
@@ -172,7 +186,7 @@ class NotificationSerializer(serializers.ModelSerializer):
         fields = ['id', 'message', 'is_read', 'created_at', 'link']
 
 # 👇 MODIFICA EL NoticeSerializer
-class NoticeSerializer(serializers.ModelSerializer):
+class NoticeSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     # ... (el resto de tu NoticeSerializer se queda igual)
     created_by_username = serializers.CharField(source="created_by.username", read_only=True)
     category_name = serializers.CharField(source="category.name", read_only=True, allow_null=True)
@@ -193,7 +207,7 @@ class CommonAreaSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "description", "capacity", "is_active"]
 
 # 👇 REEMPLAZA ESTA CLASE COMPLETA
-class ReservationSerializer(serializers.ModelSerializer):
+class ReservationSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     area_name = serializers.CharField(source="area.name", read_only=True)
     user_username = serializers.CharField(source="user.username", read_only=True)
 
@@ -219,22 +233,28 @@ class ReservationSerializer(serializers.ModelSerializer):
         if start_time < timezone.now():
             raise serializers.ValidationError("No se pueden crear o modificar reservas en el pasado.")
 
-        # Lógica para detectar solapamiento
-        conflicting = Reservation.objects.filter(
-            area=area,
-            start_time__lt=end_time,
-            end_time__gt=start_time
-        )
-        
-        if self.instance: # Si es una actualización, excluimos la propia reserva
-            conflicting = conflicting.exclude(pk=self.instance.pk)
-
-        if conflicting.exists():
-            raise serializers.ValidationError("Este horario ya está ocupado. Por favor, elige otro.")
-            
+        # El solapamiento se verifica al guardar, con el área bloqueada (services.reservations.book)
         return data
 
-class ActivityLogSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        return self._book(validated_data)
+
+    def update(self, instance, validated_data):
+        return self._book(validated_data, instance)
+
+    def _book(self, validated_data, instance=None):
+        def value(name, default=None):
+            return validated_data.get(name, getattr(instance, name, default))
+        try:
+            return book(
+                area=value("area"), user=value("user"),
+                start_time=value("start_time"), end_time=value("end_time"),
+                notes=value("notes", ""), instance=instance,
+            )
+        except ReservationConflict as e:
+            raise Conflict(str(e))
+
+class ActivityLogSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     user_username = serializers.CharField(source="user.username", read_only=True)
 
     class Meta:
@@ -253,11 +273,43 @@ class MaintenanceRequestCommentSerializer(serializers.ModelSerializer):
 
 # 👇 AÑADE ESTA NUEVA CLASE
 class MaintenanceRequestAttachmentSerializer(serializers.ModelSerializer):
+    """
+    ``file``, ``thumbnail`` y ``medium`` apuntan a la vista protegida
+    (``/api/maintenance-attachments/<id>/file/``), no a MEDIA_URL. Las variantes quedan en
+    null hasta que el trabajo de variantes las genera.
+    """
     class Meta:
         model = MaintenanceRequestAttachment
-        fields = ['id', 'file', 'uploaded_at']
+        fields = ['id', 'request', 'file', 'thumbnail', 'medium', 'content_type', 'size', 'width', 'height', 'uploaded_at']
+        read_only_fields = ['thumbnail', 'medium', 'content_type', 'size', 'width', 'height']
+
+    def validate_request(self, value):
+        user = self.context['request'].user
+        if not (user.is_staff or get_role(user) == 'ADMIN') and value.reported_by_id != user.id:
+            raise serializers.ValidationError("Solo puedes adjuntar archivos a tus solicitudes.")
+        return value
+
+    def validate_file(self, value):
+        try:
+            value.content_type = attachments.check_upload(value)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+        return value
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        url = reverse('maintenanceattachment-file', args=[instance.pk], request=self.context.get('request'))
+        for name in ('file', 'thumbnail', 'medium'):
+            if data.get(name):
+                data[name] = url if name == 'file' else f"{url}?variant={name}"
+        return data
+
+    def create(self, validated_data):
+        file = validated_data['file']
+        attachment, self.created = attachments.store(validated_data['request'], file, file.content_type)
+        return attachment
 
-class MaintenanceRequestSerializer(serializers.ModelSerializer):
+class MaintenanceRequestSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     unit_code = serializers.CharField(source="unit.code", read_only=True)
     reported_by_username = serializers.CharField(source="reported_by.username", read_only=True)
     assigned_to_username = serializers.CharField(source="assigned_to.username", read_only=True)
@@ -273,4 +325,96 @@ class MaintenanceRequestSerializer(serializers.ModelSerializer):
         model = MaintenanceRequest
         fields = '__all__' # fields = '__all__' ya incluye el nuevo campo 'attachments'
         read_only_fields = ['reported_by']
-      
\ No newline at end of file
+      
+
+# --- Parámetros de cada tipo de trabajo (se validan al encolar, no en el worker) ---
+class IssueFeesJobParams(serializers.Serializer):
+    period = serializers.RegexField(r"^\d{4}-(0[1-9]|1[0-2])$", error_messages={"invalid": "period debe ser 'YYYY-MM'"})
+    expense_type_id = serializers.IntegerField(required=False, allow_null=True)
+    amount = serializers.FloatField(required=False, allow_null=True, min_value=0)
+
+
+class SweepOverdueFeesJobParams(serializers.Serializer):
+    batch_size = serializers.IntegerField(required=False, allow_null=True, min_value=1)
+
+
+class NotifyAudienceJobParams(serializers.Serializer):
+    message = serializers.CharField()
+    audience = serializers.ChoiceField(choices=notifications.AUDIENCES, default="all")
+    value = serializers.JSONField(required=False, allow_null=True)
+    link = serializers.CharField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        if attrs["audience"] in ("role", "tower") and not attrs.get("value"):
+            raise serializers.ValidationError({"value": f"La audiencia '{attrs['audience']}' requiere value."})
+        return attrs
+
+
+class AttachmentVariantsJobParams(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_null=True)
+
+
+JOB_PARAMS_SERIALIZERS = {
+    "issue_fees": IssueFeesJobParams,
+    "sweep_overdue_fees": SweepOverdueFeesJobParams,
+    "reconcile_dashboard_counters": serializers.Serializer,
+    "notify_audience": NotifyAudienceJobParams,
+    "attachment_variants": AttachmentVariantsJobParams,
+}
+
+
+class JobSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
+    created_by_username = serializers.CharField(source="created_by.username", read_only=True, allow_null=True)
+
+    class Meta:
+        model = Job
+        fields = [
+            "id", "kind", "params", "status", "progress", "total", "result", "error", "attempts",
+            "created_by", "created_by_username", "created_at", "started_at", "finished_at",
+        ]
+        read_only_fields = [
+            "id", "status", "progress", "total", "result", "error", "attempts",
+            "created_by", "created_at", "started_at", "finished_at",
+        ]
+
+    def validate_kind(self, value):
+        from .services.jobs import JOB_HANDLERS
+        if value not in JOB_HANDLERS:
+            raise serializers.ValidationError(f"Tipo de trabajo desconocido: {value}")
+        return value
+
+    def validate(self, attrs):
+        params = attrs.get("params") or {}
+        if not isinstance(params, dict):
+            raise serializers.ValidationError({"params": "Debe ser un objeto."})
+        params_serializer = JOB_PARAMS_SERIALIZERS.get(attrs["kind"])
+        if params_serializer is None:
+            return attrs
+        checker = params_serializer(data=params)
+        if not checker.is_valid():
+            raise serializers.ValidationError({"params": checker.errors})
+        attrs["params"] = dict(checker.validated_data)
+        return attrs
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Par de tokens de /api/auth/token/ con los mismos claims de rol que emite LoginView."""
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        set_role_claims(token, user)
+        return token
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    """Al refrescar, vuelve a leer rol y flags para que un cambio de rol no espere al próximo login."""
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        refresh = RefreshToken(data.get("refresh", attrs["refresh"]), verify=False)
+        user = User.objects.select_related("profile").filter(pk=refresh[jwt_settings.USER_ID_CLAIM], is_active=True).first()
+        if user is None:
+            raise AuthenticationFailed("Usuario inactivo o inexistente.")
+        access = refresh.access_token
+        set_role_claims(access, user)
+        data["access"] = str(access)
+        return data
@@ -0,0 +1,217 @@
+# core/services/activity.py
+from __future__ import annotations
+import atexit
+import datetime
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from core.models import ActivityLog
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityLogBuffer:
+    """
+    Acumula registros de ActivityLog en memoria; un hilo por proceso los inserta con
+    ``bulk_create`` cada ``flush_interval`` segundos o en cuanto se juntan ``flush_size``
+    entradas. El request solo escribe si el buffer llega a ``max_size`` (el hilo no da abasto).
+    """
+
+    def __init__(self, flush_size: int, flush_interval: float, max_size: int):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: list[ActivityLog] = []
+        self._wake = threading.Event()
+        self._pid = None
+
+    def add(self, user_id: int, action: str, details: str | None = None) -> None:
+        entry = ActivityLog(user_id=user_id, action=action, details=details, timestamp=timezone.now())
+        if self.flush_size <= 1:
+            entry.save()
+            return
+        self._ensure_flusher()
+        with self._lock:
+            self._entries.append(entry)
+            pending = len(self._entries)
+        if pending >= self.max_size:
+            self.flush()
+        elif pending >= self.flush_size:
+            self._wake.set()
+
+    def flush(self) -> int:
+        with self._lock:
+            entries, self._entries = self._entries, []
+        if not entries:
+            return 0
+        try:
+            ActivityLog.objects.bulk_create(entries)
+        except Exception:
+            logger.exception("No se pudieron guardar %s registros de actividad", len(entries))
+            with self._lock:
+                self._entries[:0] = entries[: max(self.max_size - len(self._entries), 0)]
+            return 0
+        return len(entries)
+
+    def _ensure_flusher(self) -> None:
+        # Un hilo por proceso (los workers de gunicorn se crean con fork)
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._wake = threading.Event()
+        threading.Thread(target=self._flush_periodically, name="activity-log-flusher", daemon=True).start()
+
+    def _flush_periodically(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            close_old_connections()
+
+
+activity_buffer = ActivityLogBuffer(
+    flush_size=settings.ACTIVITY_LOG_FLUSH_SIZE,
+    flush_interval=settings.ACTIVITY_LOG_FLUSH_SECONDS,
+    max_size=settings.ACTIVITY_LOG_MAX_BUFFER,
+)
+atexit.register(activity_buffer.flush)
+
+
+def log_activity(user, action: str, details: str | None = None) -> None:
+    """Registra una acción del usuario sin agregar una escritura a la base en el request."""
+    activity_buffer.add(user.pk, action, details)
+
+
+# --- Particiones mensuales y retención (ver migración 0017) ---
+
+ACTIVITY_TABLE = ActivityLog._meta.db_table
+_PARTITION_RE = re.compile(rf"^{ACTIVITY_TABLE}_p(\d{{4}})(\d{{2}})$")
+
+
+def _add_months(month: datetime.date, count: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def _bounds(month: datetime.date) -> tuple[datetime.datetime, datetime.datetime]:
+    start = datetime.datetime(month.year, month.month, 1, tzinfo=datetime.timezone.utc)
+    end_month = _add_months(month, 1)
+    return start, datetime.datetime(end_month.year, end_month.month, 1, tzinfo=datetime.timezone.utc)
+
+
+def is_partitioned() -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = %s", [ACTIVITY_TABLE])
+        return cursor.fetchone() is not None
+
+
+def monthly_partitions() -> dict[datetime.date, str]:
+    """Particiones mensuales existentes, por primer día del mes."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = %s", [ACTIVITY_TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        if match := _PARTITION_RE.match(name):
+            partitions[datetime.date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+def ensure_partitions(months_ahead: int = 2) -> list[str]:
+    """
+    Crea las particiones del mes actual y de los ``months_ahead`` siguientes. Si la
+    partición por defecto ya tiene filas de ese mes, se mueven a la nueva partición.
+    """
+    if not is_partitioned():
+        return []
+    existing = monthly_partitions()
+    current = timezone.now().date().replace(day=1)
+    created = []
+    for offset in range(months_ahead + 1):
+        month = _add_months(current, offset)
+        if month in existing:
+            continue
+        name = f"{ACTIVITY_TABLE}_p{month:%Y%m}"
+        start, end = _bounds(month)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"CREATE TABLE {name} (LIKE {ACTIVITY_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {ACTIVITY_TABLE}_default WHERE timestamp >= %s AND timestamp < %s RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved", [start, end],
+            )
+            cursor.execute(f"ALTER TABLE {ACTIVITY_TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", [start, end])
+        created.append(name)
+    return created
+
+
+def _archive_range(start: datetime.datetime, end: datetime.datetime, path: Path) -> int:
+    """Vuelca las filas del rango a ``path`` (JSONL comprimido) leyendo por lotes."""
+    rows = (
+        ActivityLog.objects.filter(timestamp__gte=start, timestamp__lt=end)
+        .order_by().values("id", "user_id", "action", "timestamp", "details")
+        .iterator(chunk_size=5000)
+    )
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    count = 0
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as archive:
+        for row in rows:
+            archive.write(json.dumps(row, default=str, ensure_ascii=False) + "\n")
+            count += 1
+    tmp_path.replace(path)
+    return count
+
+
+def archive_old_activity(keep_months: int, archive_dir, dry_run: bool = False) -> list[dict]:
+    """
+    Exporta a ``archive_dir/activitylog-YYYY-MM.jsonl.gz`` los meses anteriores a los
+    últimos ``keep_months`` y luego los elimina: en PostgreSQL se desprende y borra la
+    partición completa; en otros motores se borran las filas del rango.
+    """
+    archive_dir = Path(archive_dir)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    cutoff = _add_months(timezone.now().date().replace(day=1), -keep_months)
+    partitioned = is_partitioned()
+    if partitioned:
+        months = {month: name for month, name in monthly_partitions().items() if month < cutoff}
+    else:
+        oldest = ActivityLog.objects.order_by("timestamp").values_list("timestamp", flat=True).first()
+        months = {}
+        month = oldest.date().replace(day=1) if oldest else cutoff
+        while month < cutoff:
+            months[month] = None
+            month = _add_months(month, 1)
+
+    results = []
+    for month, partition in sorted(months.items()):
+        start, end = _bounds(month)
+        path = archive_dir / f"activitylog-{month:%Y-%m}.jsonl.gz"
+        if dry_run:
+            results.append({"month": f"{month:%Y-%m}", "rows": None, "archive": str(path)})
+            continue
+        count = _archive_range(start, end, path)
+        if partition:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE {ACTIVITY_TABLE} DETACH PARTITION {partition}")
+                cursor.execute(f"DROP TABLE {partition}")
+        else:
+            ActivityLog.objects.filter(timestamp__gte=start, timestamp__lt=end).delete()
+        if not count and path.exists():
+            path.unlink()
+        results.append({"month": f"{month:%Y-%m}", "rows": count, "archive": str(path) if count else None})
+    return results
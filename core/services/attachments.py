@@ -0,0 +1,194 @@
+# core/services/attachments.py
+from __future__ import annotations
+import hashlib
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from PIL import Image, ImageOps
+from core.models import MaintenanceRequestAttachment
+
+# Tipo detectado por los primeros bytes -> extensión del archivo guardado
+ALLOWED_TYPES = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp"}
+# Variante -> lado mayor en píxeles; se guardan en JPEG
+VARIANTS = {"thumbnail": 320, "medium": 1280}
+VARIANT_QUALITY = 82
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def sniff_type(head: bytes) -> str | None:
+    """Tipo de imagen según la firma del archivo; no confía en el Content-Type del cliente."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def detect_type(file) -> str | None:
+    file.seek(0)
+    head = file.read(16)
+    file.seek(0)
+    return sniff_type(head)
+
+
+def content_hash(file) -> str:
+    """sha256 del archivo; usa el calculado durante la subida si el upload handler lo dejó."""
+    digest = getattr(file, "sha256", None)
+    if digest:
+        return digest
+    hasher = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks(HASH_CHUNK_SIZE):
+        hasher.update(chunk)
+    file.seek(0)
+    return hasher.hexdigest()
+
+
+def check_upload(file) -> str:
+    """Valida tamaño y tipo; devuelve el tipo detectado o lanza ``ValueError``."""
+    if file.size > settings.ATTACHMENT_MAX_UPLOAD_SIZE:
+        raise ValueError(f"El archivo supera el máximo de {settings.ATTACHMENT_MAX_UPLOAD_SIZE // (1024 * 1024)} MB.")
+    content_type = detect_type(file)
+    if content_type not in ALLOWED_TYPES:
+        raise ValueError("Formato no permitido: solo JPEG, PNG o WebP.")
+    return content_type
+
+
+def blob_path(sha256: str, content_type: str) -> str:
+    return f"maintenance/blobs/{sha256[:2]}/{sha256}{ALLOWED_TYPES[content_type]}"
+
+
+def variant_path(sha256: str, name: str) -> str:
+    return f"maintenance/variants/{sha256[:2]}/{sha256}-{name}.jpg"
+
+
+@transaction.atomic
+def store(maintenance_request, file, content_type: str) -> tuple[MaintenanceRequestAttachment, bool]:
+    """
+    Guarda ``file`` como adjunto de ``maintenance_request`` direccionado por su sha256.
+
+    El contenido se escribe una sola vez en ``blob_path``: otra subida de la misma foto,
+    en cualquier solicitud, reutiliza el archivo y las variantes ya generadas. Repetir la
+    subida en la misma solicitud devuelve el adjunto existente con ``created=False``; si dos
+    subidas iguales compiten, la restricción única decide y la perdedora recibe el de la ganadora.
+    """
+    sha256 = content_hash(file)
+    existing = MaintenanceRequestAttachment.objects.filter(request=maintenance_request, sha256=sha256).first()
+    if existing is not None:
+        return existing, False
+
+    attachment = MaintenanceRequestAttachment(
+        request=maintenance_request, sha256=sha256, content_type=content_type, size=file.size,
+    )
+    name = blob_path(sha256, content_type)
+    if not default_storage.exists(name):
+        name = default_storage.save(name, file)
+    attachment.file.name = name
+    done = (
+        MaintenanceRequestAttachment.objects.filter(sha256=sha256).exclude(thumbnail="")
+        .values("thumbnail", "medium", "width", "height").first()
+    )
+    if done:
+        attachment.thumbnail.name, attachment.medium.name = done["thumbnail"], done["medium"]
+        attachment.width, attachment.height = done["width"], done["height"]
+    try:
+        with transaction.atomic():
+            attachment.save()
+    except IntegrityError:
+        return MaintenanceRequestAttachment.objects.get(request=maintenance_request, sha256=sha256), False
+    return attachment, True
+
+
+def _flatten(image):
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image if image.mode in ("RGB", "L") else image.convert("RGB")
+
+
+def _oriented_size(image) -> tuple[int, int]:
+    width, height = image.size
+    # Orientaciones EXIF 5-8 giran la imagen 90°
+    return (height, width) if image.getexif().get(0x0112) in (5, 6, 7, 8) else (width, height)
+
+
+def render_variants(source) -> tuple[dict[str, bytes], tuple[int, int]]:
+    """
+    Genera las ``VARIANTS`` en JPEG y devuelve ``({nombre: bytes}, (ancho, alto))`` del original
+    ya orientado. En JPEG ``draft`` decodifica directamente a escala reducida, así una foto de
+    12 MP no se descomprime completa para producir una miniatura.
+    """
+    with Image.open(source) as image:
+        width, height = _oriented_size(image)
+        largest = max(VARIANTS.values())
+        image.draft("RGB", (largest, largest))
+        image = _flatten(ImageOps.exif_transpose(image))
+        rendered = {}
+        # De mayor a menor: cada variante se reduce desde la anterior
+        for name, side in sorted(VARIANTS.items(), key=lambda item: -item[1]):
+            image.thumbnail((side, side), Image.Resampling.LANCZOS)
+            out = BytesIO()
+            image.save(out, "JPEG", quality=VARIANT_QUALITY, optimize=True, progressive=True)
+            rendered[name] = out.getvalue()
+    return rendered, (width, height)
+
+
+def build_variants(attachment: MaintenanceRequestAttachment) -> bool:
+    """
+    Genera (o reutiliza) las variantes de ``attachment`` y las asigna a todos los adjuntos
+    con el mismo sha256. Los adjuntos anteriores al direccionamiento por contenido se
+    hashean aquí sin mover su archivo. Devuelve False si el original no es una imagen legible.
+    """
+    with attachment.file.open("rb") as source:
+        if not attachment.sha256:
+            attachment.sha256 = content_hash(source)
+            attachment.size = attachment.file.size
+            attachment.content_type = detect_type(source) or ""
+            try:
+                with transaction.atomic():
+                    attachment.save(update_fields=["sha256", "size", "content_type"])
+            except IntegrityError:
+                # Copia idéntica de otro adjunto de la misma solicitud: sobra (el archivo no se toca)
+                attachment.delete()
+                return True
+        sha256 = attachment.sha256
+        names = {name: variant_path(sha256, name) for name in VARIANTS}
+        missing = [name for name, path in names.items() if not default_storage.exists(path)]
+        try:
+            if missing:
+                rendered, (width, height) = render_variants(source)
+                for name in missing:
+                    names[name] = default_storage.save(names[name], ContentFile(rendered[name]))
+            else:
+                # Variantes ya generadas para este contenido: solo se leen las dimensiones de la cabecera
+                source.seek(0)
+                with Image.open(source) as image:
+                    width, height = _oriented_size(image)
+        except (OSError, Image.DecompressionBombError):
+            return False
+    MaintenanceRequestAttachment.objects.filter(sha256=sha256).update(width=width, height=height, **names)
+    return True
+
+
+def build_pending_variants(ids=None, progress=None) -> dict:
+    """Procesa los adjuntos sin miniatura (todos o los de ``ids``), un original por hash."""
+    pending = MaintenanceRequestAttachment.objects.filter(thumbnail="").order_by("id")
+    if ids is not None:
+        pending = pending.filter(id__in=ids)
+    total, built, failed, seen = pending.count(), 0, 0, set()
+    for done, attachment in enumerate(pending.iterator(), start=1):
+        if not attachment.sha256 or attachment.sha256 not in seen:
+            if build_variants(attachment):
+                built += 1
+            else:
+                failed += 1
+            seen.add(attachment.sha256)
+        if progress:
+            progress(done, total)
+    return {"pending": total, "built": built, "failed": failed}
@@ -0,0 +1,70 @@
+# core/services/counters.py
+from __future__ import annotations
+from decimal import Decimal
+from functools import partial
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from core.models import DashboardCounter, Fee, MaintenanceRequest, Unit
+
+UNPAID_STATUSES = ("ISSUED", "OVERDUE")
+OPEN_MAINTENANCE_STATUSES = ("PENDING", "IN_PROGRESS")
+
+
+def _compute() -> dict:
+    User = get_user_model()
+    return {
+        "total_users": User.objects.count(),
+        "active_units": Unit.objects.count(),
+        "pending_fees_total": Fee.objects.filter(status__in=UNPAID_STATUSES).aggregate(total=Sum("balance"))["total"] or 0,
+        "open_maintenance_requests": MaintenanceRequest.objects.filter(status__in=OPEN_MAINTENANCE_STATUSES).count(),
+    }
+
+
+def reconcile() -> dict:
+    """Recalcula todos los contadores desde las tablas de origen y los guarda."""
+    values = _compute()
+    DashboardCounter.objects.bulk_create(
+        [DashboardCounter(name=name, value=value) for name, value in values.items()],
+        update_conflicts=True, unique_fields=["name"], update_fields=["value", "updated_at"],
+    )
+    return values
+
+
+def _apply(name: str, delta: Decimal) -> None:
+    if not DashboardCounter.objects.filter(name=name).update(value=F("value") + delta, updated_at=timezone.now()):
+        reconcile()
+
+
+def bump(name: str, delta) -> None:
+    """
+    Suma ``delta`` al contador con un UPDATE atómico al confirmar la transacción en curso.
+    Todos los escritores comparten la fila del contador: aplicarlo en ``on_commit`` evita
+    retener su bloqueo durante la transacción del llamador. Si la transacción se revierte el
+    delta se descarta; si el proceso cae entre el commit y el UPDATE, ``reconcile`` lo corrige.
+    """
+    if not delta:
+        return
+    transaction.on_commit(partial(_apply, name, Decimal(str(delta))))
+
+
+def snapshot() -> dict:
+    """Contadores actuales leídos de ``DashboardCounter`` (una consulta de cuatro filas)."""
+    values = dict(DashboardCounter.objects.values_list("name", "value"))
+    if len(values) < 4:
+        values = reconcile()
+    return {
+        "total_users": int(values["total_users"]),
+        "active_units": int(values["active_units"]),
+        "pending_fees_total": values["pending_fees_total"],
+        "open_maintenance_requests": int(values["open_maintenance_requests"]),
+        "generated_at": timezone.now(),
+    }
+
+
+def pending_contribution(status: str, amount, paid_total) -> Decimal:
+    """Aporte de una cuota a ``pending_fees_total``: su saldo si está impaga, si no cero."""
+    if status not in UNPAID_STATUSES:
+        return Decimal("0")
+    return Decimal(amount or 0) - Decimal(paid_total or 0)
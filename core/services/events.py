@@ -0,0 +1,121 @@
+# core/services/events.py
+from __future__ import annotations
+import asyncio
+import logging
+import threading
+import weakref
+from collections import defaultdict
+from contextlib import contextmanager
+from django.db import connection, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "core_notifications"
+# NOTIFY admite payloads de hasta 8000 bytes; los ids se reparten en varios avisos
+PAYLOAD_LIMIT = 7000
+
+
+def _payloads(user_ids):
+    chunk, size = [], 0
+    for user_id in user_ids:
+        if chunk and size + len(user_id) + 1 > PAYLOAD_LIMIT:
+            yield ",".join(chunk)
+            chunk, size = [], 0
+        chunk.append(user_id)
+        size += len(user_id) + 1
+    if chunk:
+        yield ",".join(chunk)
+
+
+def publish(user_ids) -> None:
+    """
+    Avisa a los streams de los usuarios ``user_ids`` que tienen notificaciones nuevas.
+
+    En PostgreSQL usa ``pg_notify``, que se entrega al confirmar la transacción actual y llega a
+    todos los procesos que escuchan el canal. En otros motores solo avisa a los streams del
+    proceso actual, después del commit.
+    """
+    user_ids = [str(user_id) for user_id in dict.fromkeys(user_ids)]
+    if not user_ids:
+        return
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            for payload in _payloads(user_ids):
+                cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, payload])
+    else:
+        transaction.on_commit(lambda: broker.wake(int(user_id) for user_id in user_ids))
+
+
+def _listen_params() -> dict:
+    params = connections["default"].get_connection_params()
+    for key in ("context", "cursor_factory", "prepare_threshold"):
+        params.pop(key, None)
+    return params
+
+
+class NotificationBroker:
+    """
+    Reparte los avisos de ``publish`` entre los streams abiertos del proceso. Cada suscripción es
+    un ``asyncio.Event`` en el loop de la conexión, así miles de clientes inactivos son solo
+    corrutinas en espera. Con PostgreSQL, una tarea por loop mantiene un ``LISTEN`` en una
+    conexión asíncrona dedicada y se reconecta sola si la pierde.
+    """
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        self.listeners = weakref.WeakKeyDictionary()
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def subscribe(self, user_id: int):
+        loop = asyncio.get_running_loop()
+        self._ensure_listener(loop)
+        entry = (loop, asyncio.Event())
+        with self.lock:
+            self.subscribers[user_id].add(entry)
+        try:
+            yield entry[1]
+        finally:
+            with self.lock:
+                self.subscribers[user_id].discard(entry)
+                if not self.subscribers[user_id]:
+                    del self.subscribers[user_id]
+
+    def wake(self, user_ids) -> None:
+        """Despierta los streams de ``user_ids``; se puede llamar desde cualquier hilo."""
+        with self.lock:
+            entries = [entry for user_id in user_ids for entry in self.subscribers.get(user_id, ())]
+        for loop, event in entries:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(event.set)
+
+    def _ensure_listener(self, loop) -> None:
+        if connections["default"].vendor != "postgresql":
+            return
+        task = self.listeners.get(loop)
+        if task is None or task.done():
+            self.listeners[loop] = loop.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        import psycopg
+
+        delay = 1
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(autocommit=True, **_listen_params()) as conn:
+                    await conn.execute(f"LISTEN {CHANNEL}")
+                    delay = 1
+                    # Lo publicado mientras no se escuchaba se recupera despertando a todos
+                    with self.lock:
+                        user_ids = list(self.subscribers)
+                    self.wake(user_ids)
+                    async for notify in conn.notifies():
+                        self.wake(int(user_id) for user_id in notify.payload.split(",") if user_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Se perdió la conexión LISTEN %s; reintento en %ss", CHANNEL, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+
+broker = NotificationBroker()
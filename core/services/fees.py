@@ -1,60 +1,249 @@
 # core/services/fees.py
 from __future__ import annotations
+from decimal import Decimal
 from django.db import transaction
-from django.db.models import Sum
+from django.db.models import Case, Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from core.models import Unit, ExpenseType, Fee, Payment
+from core.services import counters, rollups
+from core.services.rollups import rebuild_rollups
 
+ISSUE_BATCH_SIZE = 1000
 
-@transaction.atomic
-def issue_fees(period: str, expense_type_id: int | None = None, amount: float | None = None) -> int:
+
+def issue_fees(period: str, expense_type_id: int | None = None, amount: float | None = None,
+               batch_size: int = ISSUE_BATCH_SIZE, progress=None) -> dict:
+    """
+    Emite las cuotas de un periodo para todas las unidades en operaciones por lotes.
+
+    El número de consultas crece por lote, no por unidad: se leen los tipos, las
+    unidades y las cuotas ya existentes, se insertan las faltantes con
+    ``bulk_create(ignore_conflicts=True)`` y, si se indica ``amount``, los montos
+    distintos se corrigen con un único UPDATE. Cada lote se confirma por separado para
+    no retener bloqueos; la operación es idempotente, así que repetirla completa lo que
+    haya quedado pendiente. ``created`` cuenta solo las cuotas insertadas por esta
+    llamada (no las que otra emisión creó en paralelo). ``progress(done, total)`` se
+    llama tras cada lote.
+    """
     if not period or len(period) != 7 or period[4] != "-":
         raise ValueError("period debe ser 'YYYY-MM'")
 
     types = ExpenseType.objects.filter(active=True)
     if expense_type_id:
         types = types.filter(id=expense_type_id)
+    type_amounts = {
+        et_id: Decimal(str(amount)) if amount is not None else (default or Decimal("0"))
+        for et_id, default in types.values_list("id", "amount_default")
+    }
+    if not type_amounts:
+        return {"period": period, "created": 0, "updated": 0, "unchanged": 0}
 
-    created = 0
-    for et in types:
-        default_amount = float(et.amount_default or 0)
-        for u in Unit.objects.only("id"):
-            fee, was_created = Fee.objects.get_or_create(
-                unit=u,
-                expense_type=et,
-                period=period,
-                defaults={"amount": float(amount if amount is not None else default_amount)},
+    unit_ids = list(Unit.objects.values_list("id", flat=True))
+    existing = set(
+        Fee.objects.filter(period=period, expense_type_id__in=type_amounts)
+        .values_list("unit_id", "expense_type_id")
+    )
+    missing = [
+        Fee(unit_id=unit_id, expense_type_id=et_id, period=period, amount=et_amount)
+        for et_id, et_amount in type_amounts.items()
+        for unit_id in unit_ids
+        if (unit_id, et_id) not in existing
+    ]
+    created, pending_delta = 0, Decimal("0")
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        with transaction.atomic():
+            # Bloquear los tipos frena cualquier otro INSERT de cuotas de esos tipos (la FK toma
+            # FOR KEY SHARE): las que ya existan se descartan aquí y el lote creado es exacto
+            list(ExpenseType.objects.select_for_update().filter(id__in=type_amounts).order_by("id").values_list("id", flat=True))
+            taken = set(
+                Fee.objects.filter(period=period, expense_type_id__in=type_amounts, unit_id__in={fee.unit_id for fee in batch})
+                .values_list("unit_id", "expense_type_id")
             )
-            if not was_created and amount is not None and float(fee.amount) != float(amount):
-                fee.amount = float(amount)
-                fee.save(update_fields=["amount"])
-            if was_created:
-                created += 1
-    return created
+            batch = [fee for fee in batch if (fee.unit_id, fee.expense_type_id) not in taken]
+            Fee.objects.bulk_create(batch, ignore_conflicts=True)
+            # bulk_create no dispara señales: el lote suma a FinanceRollup por tipo de gasto
+            issued = {}
+            for fee in batch:
+                total, count = issued.get(fee.expense_type_id, (Decimal("0"), 0))
+                issued[fee.expense_type_id] = (total + fee.amount, count + 1)
+            for et_id, (total, count) in issued.items():
+                rollups.apply_delta(period, et_id, "ISSUED", issued=total, fees=count)
+        created += len(batch)
+        pending_delta += sum((fee.amount for fee in batch), Decimal("0"))
+        if progress:
+            progress(min(start + batch_size, len(missing)), len(missing))
+
+    updated = 0
+    if amount is not None and existing:
+        new_amount = Decimal(str(amount))
+        with transaction.atomic():
+            changing = Fee.objects.filter(period=period, expense_type_id__in=type_amounts).exclude(amount=new_amount)
+            # Bloquea solo las cuotas que cambian: ningún pago las mueve de estado antes del UPDATE
+            changed = Fee.objects.filter(pk__in=list(changing.select_for_update().values_list("pk", flat=True)))
+            groups = list(changed.order_by().values("expense_type_id", "status").annotate(old=Sum("amount"), n=Count("id")))
+            updated = changed.update(amount=new_amount)
+            for group in groups:
+                delta = group["n"] * new_amount - group["old"]
+                rollups.apply_delta(period, group["expense_type_id"], group["status"], issued=delta)
+                if group["status"] in counters.UNPAID_STATUSES:
+                    pending_delta += delta
+    counters.bump("pending_fees_total", pending_delta)
+
+    return {
+        "period": period,
+        "created": created,
+        "updated": updated,
+        "unchanged": len(existing) - updated,
+    }
+
+
+def _overdue_groups(fees) -> list[tuple]:
+    """
+    Totales de ``fees`` por (periodo, tipo): ``(period, expense_type_id, issued, paid, fees, payments)``.
+    Se calculan antes del UPDATE, sobre las filas ya bloqueadas.
+    """
+    payments = {
+        (row["fee__period"], row["fee__expense_type_id"]): row["n"]
+        for row in Payment.objects.filter(fee__in=fees).values("fee__period", "fee__expense_type_id").annotate(n=Count("id"))
+    }
+    return [
+        (row["period"], row["expense_type_id"], row["issued"], row["paid"], row["fees"], payments.get((row["period"], row["expense_type_id"]), 0))
+        for row in fees.order_by().values("period", "expense_type_id").annotate(issued=Sum("amount"), paid=Sum("paid_total"), fees=Count("id"))
+    ]
+
+
+def _move_to_overdue(groups) -> None:
+    for period, expense_type_id, issued, paid, fees, payments in groups:
+        rollups.apply_delta(period, expense_type_id, "ISSUED", issued=-issued, paid=-paid, fees=-fees, payments=-payments)
+        rollups.apply_delta(period, expense_type_id, "OVERDUE", issued=issued, paid=paid, fees=fees, payments=payments)
+
+
+def sweep_overdue_fees(today=None, batch_size: int | None = None) -> int:
+    """
+    Pasa a OVERDUE toda cuota ISSUED con ``due_date`` anterior a ``today``
+    (usa el índice parcial ``fee_issued_due_idx``). Sin ``batch_size`` es un único
+    UPDATE; con ``batch_size`` se actualiza por lotes para acortar los bloqueos.
+    Solo se bloquean las cuotas que cambian, y sus totales pasan de la fila ISSUED a la
+    OVERDUE de ``FinanceRollup`` por (periodo, tipo). Devuelve la cantidad de cuotas que
+    cambiaron.
+    """
+    today = today or timezone.localdate()
+    overdue = Fee.objects.filter(status="ISSUED", due_date__lt=today)
+    if not batch_size:
+        with transaction.atomic():
+            # El UPDATE bloquearía estas filas igual; tomarlas antes fija el conjunto que se resume
+            bound = max(overdue.select_for_update().order_by().values_list("pk", flat=True).iterator(chunk_size=10000), default=None)
+            if bound is None:
+                return 0
+            fees = overdue.filter(pk__lte=bound)
+            groups = _overdue_groups(fees)
+            changed = fees.update(status="OVERDUE")
+            _move_to_overdue(groups)
+        return changed
+
+    changed = 0
+    while True:
+        with transaction.atomic():
+            pks = list(overdue.select_for_update().order_by("pk").values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                return changed
+            fees = Fee.objects.filter(pk__in=pks)
+            groups = _overdue_groups(fees)
+            changed += fees.update(status="OVERDUE")
+            _move_to_overdue(groups)
+
+
+def reopened_status(due_date, today=None) -> str:
+    """Estado de una cuota PAID que vuelve a tener saldo: OVERDUE si ya venció, si no ISSUED."""
+    today = today or timezone.localdate()
+    return "OVERDUE" if due_date and due_date < today else "ISSUED"
+
+
+@transaction.atomic
+def apply_payment_delta(fee_id: int, delta, payments: int = 0) -> int:
+    """
+    Suma ``delta`` a ``Fee.paid_total`` con un UPDATE atómico y ajusta el estado:
+    PAID cuando el saldo llega a cero y, si un pago se revierte, de vuelta a ISSUED u
+    OVERDUE según el vencimiento. ``payments`` es el cambio en la cantidad de pagos de la
+    cuota (+1 alta, -1 baja) y, con el delta, se aplica a ``FinanceRollup`` sin recalcular
+    el periodo.
+    """
+    delta = Decimal(str(delta))
+    before = (
+        Fee.objects.select_for_update().filter(pk=fee_id)
+        .values_list("period", "expense_type_id", "status", "amount", "paid_total", "due_date").first()
+    )
+    if before is None:
+        return 0
+    today = timezone.localdate()
+    new_total = F("paid_total") + delta
+    updated = Fee.objects.filter(pk=fee_id).update(
+        paid_total=new_total,
+        status=Case(
+            When(Q(amount__lte=new_total), then=Value("PAID")),
+            When(status="PAID", due_date__lt=today, then=Value("OVERDUE")),
+            When(status="PAID", then=Value("ISSUED")),
+            default=F("status"),
+        ),
+    )
+    # Mismo cálculo que el UPDATE, sobre la fila bloqueada, para ajustar el dashboard y los totales
+    period, expense_type_id, status, amount, paid_total, due_date = before
+    new_status = "PAID" if amount <= paid_total + delta else (reopened_status(due_date, today) if status == "PAID" else status)
+    counters.bump(
+        "pending_fees_total",
+        counters.pending_contribution(new_status, amount, paid_total + delta)
+        - counters.pending_contribution(status, amount, paid_total),
+    )
+    if new_status == status:
+        rollups.apply_delta(period, expense_type_id, status, paid=delta, payments=payments)
+    else:
+        # La cuota cambia de fila en FinanceRollup: se mueve con todos sus pagos
+        count = Payment.objects.filter(fee_id=fee_id).count()
+        rollups.move_fee(
+            (period, expense_type_id, status, amount, paid_total, count - payments),
+            (period, expense_type_id, new_status, amount, paid_total + delta, count),
+        )
+    return updated
+
+
+def rebuild_paid_totals() -> dict:
+    """Recalcula ``paid_total`` desde ``Payment`` y corrige los estados que quedaron desfasados."""
+    totals = Payment.objects.filter(fee=OuterRef("pk")).values("fee").annotate(s=Sum("amount")).values("s")
+    expected = Coalesce(Subquery(totals), Value(Decimal("0")), output_field=DecimalField(max_digits=10, decimal_places=2))
+    fixed = Fee.objects.exclude(paid_total=expected).update(paid_total=expected)
+    paid = Fee.objects.filter(status__in=["ISSUED", "OVERDUE"], balance__lte=0).update(status="PAID")
+    today = timezone.localdate()
+    reopened = Fee.objects.filter(status="PAID", balance__gt=0).update(
+        status=Case(When(due_date__lt=today, then=Value("OVERDUE")), default=Value("ISSUED")),
+    )
+    rebuild_rollups()
+    counters.reconcile()
+    return {"fixed": fixed, "paid": paid, "reopened": reopened}
 
 
 @transaction.atomic
-def register_payment(fee_id: int, amount: float, method: str | None = None, note: str | None = None) -> dict:
+def register_payment(fee_id: int, amount: float, method: str | None = None, note: str | None = None,
+                     external_id: str | None = None) -> dict:
     if amount is None:
         raise ValueError("amount es requerido")
 
-    fee = Fee.objects.select_for_update().get(id=fee_id)
+    fee = Fee.objects.only("id").get(id=fee_id)
+    # La señal post_save de Payment incrementa paid_total y actualiza el estado
     Payment.objects.create(
         fee=fee,
-        amount=float(amount),
+        amount=Decimal(str(amount)),
         method=(method or "manual"),
         note=(note or "Pago manual"),
+        external_id=external_id,
     )
-    total_paid = Payment.objects.filter(fee=fee).aggregate(s=Sum("amount"))["s"] or 0
-
-    target_paid_value = getattr(Fee.Status, "PAID", "PAID")  # por si usas enum o string
-    if float(total_paid) >= float(fee.amount) and fee.status != target_paid_value:
-        fee.status = target_paid_value
-        fee.save(update_fields=["status"])
+    fee.refresh_from_db(fields=["period", "amount", "paid_total", "status"])
 
     return {
         "fee_id": fee.id,
         "period": fee.period,
         "amount": float(fee.amount),
-        "paid": float(total_paid),
+        "paid": float(fee.paid_total),
         "status": fee.status,
     }
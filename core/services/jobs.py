@@ -0,0 +1,115 @@
+# core/services/jobs.py
+from __future__ import annotations
+import datetime
+import traceback
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from core.models import Job
+from core.services import counters
+from core.services.attachments import build_pending_variants
+from core.services.fees import issue_fees, sweep_overdue_fees
+from core.services.notifications import notify_audience
+
+JOB_HANDLERS = {}
+
+
+def job_handler(kind: str):
+    """Registra ``func(params, progress)`` como el manejador de los trabajos ``kind``."""
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+
+def enqueue(kind: str, params: dict | None = None, user=None) -> Job:
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Tipo de trabajo desconocido: {kind}")
+    return Job.objects.create(kind=kind, params=params or {}, created_by=user)
+
+
+def lease() -> datetime.datetime:
+    return timezone.now() + datetime.timedelta(seconds=settings.JOB_RUNNING_TIMEOUT)
+
+
+def claim_next() -> Job | None:
+    """
+    Toma el trabajo más antiguo en cola, o uno RUNNING cuyo worker dejó vencer la concesión
+    (se cayó a mitad de camino), con SELECT ... FOR UPDATE SKIP LOCKED. Un trabajo abandonado
+    ``JOB_MAX_ATTEMPTS`` veces queda FAILED en lugar de retomarse.
+    """
+    while True:
+        with transaction.atomic():
+            job = (
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(Q(status="QUEUED") | Q(status="RUNNING", lease_expires_at__lt=timezone.now()))
+                .order_by("created_at").first()
+            )
+            if job is None:
+                return None
+            if job.status == "RUNNING" and job.attempts >= settings.JOB_MAX_ATTEMPTS:
+                job.status, job.finished_at, job.lease_expires_at = "FAILED", timezone.now(), None
+                job.error = f"El worker se detuvo durante la ejecución {job.attempts} veces; no se reintenta."
+                job.save(update_fields=["status", "finished_at", "lease_expires_at", "error"])
+                continue
+            job.status = "RUNNING"
+            job.started_at = timezone.now()
+            job.attempts += 1
+            job.lease_expires_at = lease()
+            job.save(update_fields=["status", "started_at", "attempts", "lease_expires_at"])
+        return job
+
+
+def run_job(job: Job) -> Job:
+    def progress(done: int, total: int | None = None):
+        # Cada aviso de progreso renueva la concesión del trabajo
+        Job.objects.filter(pk=job.pk).update(progress=done, total=total, lease_expires_at=lease())
+
+    try:
+        job.result = JOB_HANDLERS[job.kind](job.params, progress)
+        job.status = "DONE"
+    except Exception:
+        job.error = traceback.format_exc()
+        job.status = "FAILED"
+    job.finished_at = timezone.now()
+    job.lease_expires_at = None
+    job.save(update_fields=["result", "status", "error", "finished_at", "lease_expires_at"])
+    return job
+
+
+@job_handler("issue_fees")
+def issue_fees_job(params: dict, progress) -> dict:
+    return issue_fees(
+        params["period"],
+        expense_type_id=params.get("expense_type_id"),
+        amount=params.get("amount"),
+        progress=progress,
+    )
+
+
+@job_handler("sweep_overdue_fees")
+def sweep_overdue_fees_job(params: dict, progress) -> dict:
+    return {"overdue": sweep_overdue_fees(batch_size=params.get("batch_size"))}
+
+
+@job_handler("reconcile_dashboard_counters")
+def reconcile_dashboard_counters_job(params: dict, progress) -> dict:
+    return {name: str(value) for name, value in counters.reconcile().items()}
+
+
+@job_handler("notify_audience")
+def notify_audience_job(params: dict, progress) -> dict:
+    sent = notify_audience(
+        params["message"],
+        audience=params.get("audience", "all"),
+        value=params.get("value"),
+        link=params.get("link"),
+        progress=progress,
+    )
+    return {"sent": sent}
+
+
+@job_handler("attachment_variants")
+def attachment_variants_job(params: dict, progress) -> dict:
+    return build_pending_variants(ids=params.get("ids"), progress=progress)
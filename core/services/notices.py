@@ -0,0 +1,28 @@
+# core/services/notices.py
+from __future__ import annotations
+from django.db import transaction
+from django.utils import timezone
+from core.models import Notice
+from core.services.jobs import enqueue
+
+
+def announce_due_notices(ids=None, now=None) -> int:
+    """
+    Encola el envío "Nuevo aviso" de los avisos ya publicados (``publish_date <= now``) que aún
+    no se anunciaron, y los marca con ``notified_at`` en la misma transacción: cada aviso se
+    anuncia una sola vez aunque varios workers barran a la vez. Los programados a futuro esperan
+    a que el worker de trabajos los encuentre al llegar su fecha.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        due = (
+            Notice.objects.select_for_update(skip_locked=True, of=("self",)).select_related("created_by")
+            .filter(notified_at__isnull=True, publish_date__lte=now).order_by("publish_date")
+        )
+        if ids is not None:
+            due = due.filter(id__in=ids)
+        due = list(due)
+        for notice in due:
+            enqueue("notify_audience", {"message": f"Nuevo aviso: {notice.title}", "audience": "all", "link": f"/notices/{notice.pk}"}, user=notice.created_by)
+        Notice.objects.filter(id__in=[notice.pk for notice in due]).update(notified_at=now)
+    return len(due)
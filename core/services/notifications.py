@@ -0,0 +1,110 @@
+# core/services/notifications.py
+from __future__ import annotations
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from core.models import Notification, NotificationCounter, Unit
+from core.services import events
+
+User = get_user_model()
+
+AUDIENCES = ("all", "role", "tower", "owners")
+FAN_OUT_CHUNK_SIZE = 1000
+
+
+def audience_user_ids(audience: str, value=None) -> list[int]:
+    """
+    Ids de los destinatarios de una audiencia:
+
+    - ``all``: todos los usuarios activos.
+    - ``role``: usuarios activos con ``Profile.role == value``.
+    - ``tower``: propietarios de las unidades de la torre ``value``.
+    - ``owners``: propietarios de las unidades ``value`` (lista de ids); sin ``value``, de todas.
+    """
+    if audience == "all":
+        qs = User.objects.filter(is_active=True)
+    elif audience == "role":
+        if not value:
+            raise ValueError("La audiencia 'role' requiere un rol.")
+        qs = User.objects.filter(is_active=True, profile__role=value)
+    elif audience == "tower":
+        if not value:
+            raise ValueError("La audiencia 'tower' requiere una torre.")
+        qs = User.objects.filter(is_active=True, units__tower=value)
+    elif audience == "owners":
+        units = Unit.objects.filter(id__in=value) if value else Unit.objects.all()
+        qs = User.objects.filter(is_active=True, id__in=units.values("owner_id"))
+    else:
+        raise ValueError(f"Audiencia desconocida: {audience}")
+    return list(qs.order_by("id").values_list("id", flat=True).distinct())
+
+
+def bump_unread(user_ids, delta: int) -> None:
+    """
+    Suma ``delta`` al contador de no leídas de cada usuario. Solo los incrementos crean las filas
+    que falten; un descuento sobre una fila inexistente no hace nada (``unread_count`` la calcula).
+    """
+    user_ids = list(user_ids)
+    if not user_ids or not delta:
+        return
+    if delta > 0:
+        NotificationCounter.objects.bulk_create(
+            [NotificationCounter(user_id=user_id) for user_id in user_ids], ignore_conflicts=True
+        )
+    NotificationCounter.objects.filter(user_id__in=user_ids).update(unread=F("unread") + delta, updated_at=timezone.now())
+
+
+def fan_out(message: str, user_ids, link: str | None = None, chunk_size: int = FAN_OUT_CHUNK_SIZE, progress=None) -> int:
+    """
+    Crea una notificación por destinatario con ``bulk_create`` por lotes; cada lote, junto con
+    el incremento de los contadores de no leídas y el aviso a los streams, se confirma en su
+    propia transacción.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    for start in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[start:start + chunk_size]
+        with transaction.atomic():
+            Notification.objects.bulk_create(
+                [Notification(user_id=user_id, message=message, link=link) for user_id in chunk]
+            )
+            bump_unread(chunk, 1)
+            events.publish(chunk)
+        if progress:
+            progress(start + len(chunk), len(user_ids))
+    return len(user_ids)
+
+
+def notify_audience(message: str, audience: str = "all", value=None, link: str | None = None, progress=None) -> int:
+    return fan_out(message, audience_user_ids(audience, value), link=link, progress=progress)
+
+
+@transaction.atomic
+def mark_as_read(user, ids=None) -> int:
+    """Marca como leídas las notificaciones del usuario (todas o ``ids``) y descuenta el contador."""
+    qs = Notification.objects.filter(user=user, is_read=False)
+    if ids is not None:
+        qs = qs.filter(id__in=ids)
+    changed = qs.update(is_read=True)
+    bump_unread([user.pk], -changed)
+    return changed
+
+
+def unread_count(user) -> int:
+    count = NotificationCounter.objects.filter(user_id=user.pk).values_list("unread", flat=True).first()
+    if count is None:
+        # Sin fila aún: se calcula una vez y queda guardado
+        count = Notification.objects.filter(user_id=user.pk, is_read=False).count()
+        NotificationCounter.objects.bulk_create([NotificationCounter(user_id=user.pk, unread=count)], ignore_conflicts=True)
+    return count
+
+
+def rebuild_unread_counters() -> int:
+    """Recalcula todos los contadores desde ``Notification`` (para reparar desvíos)."""
+    rows = User.objects.annotate(n=Count("notifications", filter=Q(notifications__is_read=False))).values_list("id", "n")
+    with transaction.atomic():
+        NotificationCounter.objects.bulk_create(
+            [NotificationCounter(user_id=user_id, unread=n) for user_id, n in rows],
+            update_conflicts=True, unique_fields=["user"], update_fields=["unread"],
+        )
+    return NotificationCounter.objects.count()
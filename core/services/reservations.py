@@ -0,0 +1,128 @@
+# core/services/reservations.py
+from __future__ import annotations
+import datetime
+from itertools import groupby
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from core.models import CommonArea, Reservation
+
+MAX_AVAILABILITY_DAYS = 62
+
+
+class ReservationConflict(Exception):
+    """El horario pedido se solapa con otra reserva del área."""
+
+
+@transaction.atomic
+def book(area, user, start_time, end_time, notes: str = "", instance: Reservation | None = None) -> Reservation:
+    """
+    Crea (o modifica, con ``instance``) una reserva sin carreras entre solicitudes concurrentes.
+
+    Bloquea con SELECT ... FOR UPDATE la fila de cada ``CommonArea`` involucrada (en orden de id
+    para no generar deadlocks), de modo que las reservas de una misma área se serializan y la
+    verificación de solapamiento ve siempre las reservas ya confirmadas. Las de otras áreas
+    siguen en paralelo. Lanza ``ReservationConflict`` si el horario está ocupado.
+    """
+    area_ids = {area.pk} | ({instance.area_id} if instance else set())
+    list(CommonArea.objects.select_for_update().filter(pk__in=area_ids).order_by("pk").values_list("pk", flat=True))
+
+    conflicting = Reservation.objects.filter(area=area, start_time__lt=end_time, end_time__gt=start_time)
+    if instance:
+        conflicting = conflicting.exclude(pk=instance.pk)
+    if conflicting.exists():
+        raise ReservationConflict("Este horario ya está ocupado. Por favor, elige otro.")
+
+    reservation = instance or Reservation(user=user)
+    reservation.area, reservation.start_time, reservation.end_time, reservation.notes = area, start_time, end_time, notes
+    reservation.save()
+    return reservation
+
+
+def merge_busy(intervals, start, end) -> list:
+    """Une intervalos ordenados por inicio que se solapan o se tocan, recortados a [start, end)."""
+    merged = []
+    for busy_start, busy_end in intervals:
+        busy_start, busy_end = max(busy_start, start), min(busy_end, end)
+        if busy_start >= busy_end:
+            continue
+        if merged and busy_start <= merged[-1][1]:
+            if busy_end > merged[-1][1]:
+                merged[-1][1] = busy_end
+        else:
+            merged.append([busy_start, busy_end])
+    return [tuple(interval) for interval in merged]
+
+
+def free_intervals(busy, start, end) -> list:
+    """Huecos libres de [start, end) dados los intervalos ocupados ya unidos y ordenados."""
+    free, cursor = [], start
+    for busy_start, busy_end in busy:
+        if busy_start > cursor:
+            free.append((cursor, busy_start))
+        cursor = max(cursor, busy_end)
+    if cursor < end:
+        free.append((cursor, end))
+    return free
+
+
+def availability(start: datetime.datetime, end: datetime.datetime, area_ids=None) -> list[dict]:
+    """
+    Intervalos ocupados y libres de cada área activa entre ``start`` y ``end``.
+
+    Las reservas del rango salen de una sola consulta ordenada por (área, inicio), que usa el
+    índice ``reservation_area_time_idx``; luego un barrido por área une los solapes y
+    calcula los huecos.
+    """
+    if start >= end:
+        raise ValueError("El fin del rango debe ser posterior al inicio.")
+    if end - start > datetime.timedelta(days=MAX_AVAILABILITY_DAYS):
+        raise ValueError(f"El rango no puede superar {MAX_AVAILABILITY_DAYS} días.")
+
+    areas = CommonArea.objects.filter(is_active=True).order_by("name")
+    if area_ids:
+        areas = areas.filter(id__in=area_ids)
+    areas = list(areas.values_list("id", "name"))
+
+    rows = (
+        Reservation.objects
+        .filter(area_id__in=[area_id for area_id, _ in areas], start_time__lt=end, end_time__gt=start)
+        .order_by("area_id", "start_time")
+        .values_list("area_id", "start_time", "end_time")
+    )
+    busy_by_area = {
+        area_id: merge_busy(((s, e) for _, s, e in group), start, end)
+        for area_id, group in groupby(rows, key=lambda row: row[0])
+    }
+    return [
+        {
+            "area": area_id,
+            "name": name,
+            "busy": busy_by_area.get(area_id, []),
+            "free": free_intervals(busy_by_area.get(area_id, []), start, end),
+        }
+        for area_id, name in areas
+    ]
+
+
+def parse_range(raw_from: str | None, raw_to: str | None):
+    """``from``/``to`` como fecha (día completo en la zona local) o fecha-hora ISO; por defecto hoy."""
+    def _parse(raw, end_of_day=False):
+        if not raw:
+            return None
+        try:
+            # La fecha sola va primero: parse_datetime también la acepta (como medianoche)
+            day = parse_date(raw)
+            value = None if day else parse_datetime(raw)
+        except ValueError:
+            # Bien formada pero imposible (2024-13-45): mismo mensaje que una mal formada
+            value = day = None
+        if day is not None:
+            value = datetime.datetime.combine(day + datetime.timedelta(days=1 if end_of_day else 0), datetime.time.min)
+        elif value is None:
+            raise ValueError(f"Fecha inválida: {raw}")
+        return timezone.make_aware(value) if timezone.is_naive(value) else value
+
+    start = _parse(raw_from) or timezone.make_aware(datetime.datetime.combine(timezone.localdate(), datetime.time.min))
+    end = _parse(raw_to, end_of_day=True) or start + datetime.timedelta(days=1)
+    return start, end
@@ -0,0 +1,46 @@
+# core/services/response_cache.py
+from __future__ import annotations
+from django.conf import settings
+from django.core.cache import caches
+
+STATS_KEYS = ("response-cache:hits", "response-cache:misses")
+
+
+def _cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def _count(key: str) -> None:
+    cache = _cache()
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # La clave fue desalojada entre add e incr; se pierde una sola cuenta
+        pass
+
+
+def lookup(etag: str):
+    """Datos ya serializados para ``etag`` (que incluye la versión de las tablas) o None."""
+    data = _cache().get(f"response:{etag}")
+    _count(STATS_KEYS[0] if data is not None else STATS_KEYS[1])
+    return data
+
+
+def store(etag: str, data) -> None:
+    _cache().set(f"response:{etag}", data, None)
+
+
+def stats() -> dict:
+    values = _cache().get_many(STATS_KEYS)
+    hits, misses = values.get(STATS_KEYS[0], 0), values.get(STATS_KEYS[1], 0)
+    return {
+        "backend": settings.CACHES[settings.RESPONSE_CACHE_ALIAS]["BACKEND"].rsplit(".", 1)[-1],
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+    }
+
+
+def reset_stats() -> None:
+    _cache().delete_many(STATS_KEYS)
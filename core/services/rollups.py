@@ -0,0 +1,92 @@
+# core/services/rollups.py
+from __future__ import annotations
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+from core.models import Fee, FinanceRollup, Payment
+
+
+def _rollup_rows(fees, payments) -> list[FinanceRollup]:
+    payment_counts = {
+        (row["fee__period"], row["fee__expense_type_id"], row["fee__status"]): row["n"]
+        for row in payments.values("fee__period", "fee__expense_type_id", "fee__status").annotate(n=Count("id"))
+    }
+    return [
+        FinanceRollup(
+            period=row["period"],
+            expense_type_id=row["expense_type_id"],
+            status=row["status"],
+            issued_amount=row["issued"] or Decimal("0"),
+            paid_amount=row["paid"] or Decimal("0"),
+            fee_count=row["fees"],
+            payment_count=payment_counts.get((row["period"], row["expense_type_id"], row["status"]), 0),
+        )
+        for row in fees.values("period", "expense_type_id", "status").annotate(
+            issued=Sum("amount"), paid=Sum("paid_total"), fees=Count("id"),
+        )
+    ]
+
+
+@transaction.atomic
+def refresh_periods(periods) -> int:
+    """
+    Recalcula las filas de ``FinanceRollup`` de los periodos indicados (para reparar desvíos).
+
+    Bloquea antes las cuotas de esos periodos: espera a que confirmen los pagos en curso,
+    cuyos deltas quedan incluidos en el recálculo, y los que lleguen después suman sobre él.
+    Las filas se escriben con upsert, así dos recálculos del mismo periodo no chocan con
+    ``uniq_finance_rollup``.
+    """
+    periods = sorted(set(periods))
+    if not periods:
+        return 0
+    list(Fee.objects.select_for_update().filter(period__in=periods).order_by("pk").values_list("pk", flat=True))
+    rows = _rollup_rows(Fee.objects.filter(period__in=periods), Payment.objects.filter(fee__period__in=periods))
+    FinanceRollup.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=["period", "expense_type", "status"],
+        update_fields=["issued_amount", "paid_amount", "fee_count", "payment_count", "updated_at"],
+    )
+    keep = Q(pk__in=[])
+    for row in rows:
+        keep |= Q(period=row.period, expense_type_id=row.expense_type_id, status=row.status)
+    FinanceRollup.objects.filter(period__in=periods).exclude(keep).delete()
+    return len(rows)
+
+
+@transaction.atomic
+def rebuild_rollups() -> int:
+    """Reconstruye la tabla completa de ``FinanceRollup``."""
+    rows = _rollup_rows(Fee.objects.all(), Payment.objects.all())
+    FinanceRollup.objects.all().delete()
+    FinanceRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def apply_delta(period: str, expense_type_id: int, status: str, issued=0, paid=0, fees: int = 0, payments: int = 0) -> None:
+    """Suma los deltas a la fila (periodo, tipo, estado) con un UPDATE atómico; la crea en cero si falta."""
+    if not (issued or paid or fees or payments):
+        return
+    key = {"period": period, "expense_type_id": expense_type_id, "status": status}
+    FinanceRollup.objects.bulk_create([FinanceRollup(**key)], ignore_conflicts=True)
+    FinanceRollup.objects.filter(**key).update(
+        issued_amount=F("issued_amount") + Decimal(str(issued)),
+        paid_amount=F("paid_amount") + Decimal(str(paid)),
+        fee_count=F("fee_count") + fees,
+        payment_count=F("payment_count") + payments,
+        updated_at=timezone.now(),
+    )
+
+
+def move_fee(before, after) -> None:
+    """
+    Aplica a los totales el cambio de una cuota. ``before`` y ``after`` son
+    ``(period, expense_type_id, status, amount, paid_total, payment_count)`` o None en altas y bajas.
+    """
+    if before and after and before[:3] == after[:3]:
+        apply_delta(*after[:3], issued=after[3] - before[3], paid=after[4] - before[4], payments=after[5] - before[5])
+        return
+    if before:
+        apply_delta(*before[:3], issued=-before[3], paid=-before[4], fees=-1, payments=-before[5])
+    if after:
+        apply_delta(*after[:3], issued=after[3], paid=after[4], fees=1, payments=after[5])
@@ -0,0 +1,29 @@
+# core/services/versions.py
+from __future__ import annotations
+import hashlib
+from django.db.models import F
+from django.utils import timezone
+from core.models import TableVersion
+
+
+def label(model) -> str:
+    return model._meta.label_lower
+
+
+def bump(model) -> None:
+    """Incrementa la versión de la tabla de ``model`` con un UPDATE atómico (la crea si falta)."""
+    name, now = label(model), timezone.now()
+    if not TableVersion.objects.filter(name=name).update(version=F("version") + 1, updated_at=now):
+        TableVersion.objects.bulk_create([TableVersion(name=name, version=1, updated_at=now)], ignore_conflicts=True)
+
+
+def current(models) -> dict:
+    """``{label: (version, updated_at)}`` de las tablas indicadas, en una sola consulta."""
+    names = [label(model) for model in models]
+    rows = {name: (version, updated_at) for name, version, updated_at in
+            TableVersion.objects.filter(name__in=names).values_list("name", "version", "updated_at")}
+    return {name: rows.get(name, (0, None)) for name in names}
+
+
+def make_etag(*parts) -> str:
+    return '"%s"' % hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
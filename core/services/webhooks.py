@@ -0,0 +1,105 @@
+# core/services/webhooks.py
+from __future__ import annotations
+import datetime
+import traceback
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from core.models import Payment, WebhookEvent
+from core.services.fees import register_payment
+
+
+def ingest_mercadopago(payload: dict, params) -> None:
+    """
+    Guarda la notificación tal como llega, deduplicada por (proveedor, id del evento).
+    Es un único INSERT ... ON CONFLICT DO NOTHING para responder al proveedor enseguida.
+    """
+    data = payload.get("data") if isinstance(payload.get("data"), dict) else {}
+    resource_id = str(data.get("id") or params.get("data.id") or params.get("id") or "")
+    topic = str(payload.get("type") or payload.get("topic") or params.get("type") or params.get("topic") or "")
+    event_id = str(payload.get("id") or f"{topic}:{resource_id}")
+    WebhookEvent.objects.bulk_create(
+        [WebhookEvent(provider="mercadopago", event_id=event_id, topic=topic, resource_id=resource_id, payload=payload)],
+        ignore_conflicts=True,
+    )
+
+
+def fetch_mercadopago_payment(payment_id: str) -> dict:
+    import mercadopago
+    sdk = mercadopago.SDK(settings.MERCADOPAGO_ACCESS_TOKEN)
+    result = sdk.payment().get(payment_id)
+    if result.get("status") != 200:
+        raise RuntimeError(f"MercadoPago respondió {result.get('status')} para el pago {payment_id}")
+    return result["response"]
+
+
+def apply_event(event: WebhookEvent) -> str:
+    """Aplica un evento vía ``register_payment``; devuelve el estado final del evento."""
+    if event.provider != "mercadopago" or event.topic != "payment" or not event.resource_id:
+        return "IGNORED"
+    external_id = f"mercadopago:{event.resource_id}"
+    if Payment.objects.filter(external_id=external_id).exists():
+        return "IGNORED"
+    payment = fetch_mercadopago_payment(event.resource_id)
+    if payment.get("status") != "approved" or not payment.get("external_reference"):
+        return "IGNORED"
+    try:
+        register_payment(
+            int(payment["external_reference"]),
+            payment["transaction_amount"],
+            method="mercadopago",
+            note=f"MercadoPago {event.resource_id}",
+            external_id=external_id,
+        )
+    except IntegrityError:
+        # Otro worker registró el mismo pago mientras este consultaba al proveedor
+        return "IGNORED"
+    return "PROCESSED"
+
+
+def retry_delay(attempts: int) -> datetime.timedelta:
+    """Espera antes del siguiente intento: base * 2^(intentos-1), con tope."""
+    seconds = settings.WEBHOOK_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    return datetime.timedelta(seconds=min(seconds, settings.WEBHOOK_RETRY_MAX_SECONDS))
+
+
+def claim_next() -> WebhookEvent | None:
+    """
+    Reclama el evento vencido más antiguo (SKIP LOCKED) en una transacción corta y lo deja
+    PROCESSING hasta ``WEBHOOK_PROCESSING_TIMEOUT``; si el worker cae, otro lo retoma.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        event = (
+            WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(status__in=["PENDING", "PROCESSING"], next_attempt_at__lte=now)
+            .order_by("next_attempt_at").first()
+        )
+        if event is None:
+            return None
+        event.status = "PROCESSING"
+        event.attempts += 1
+        event.next_attempt_at = now + datetime.timedelta(seconds=settings.WEBHOOK_PROCESSING_TIMEOUT)
+        event.save(update_fields=["status", "attempts", "next_attempt_at"])
+    return event
+
+
+def process_next() -> WebhookEvent | None:
+    """
+    Reclama un evento y lo aplica fuera de la transacción del reclamo: la consulta HTTP al
+    proveedor no retiene bloqueos. Un fallo reprograma el evento con ``retry_delay`` y no
+    bloquea la cola; al agotar ``WEBHOOK_MAX_ATTEMPTS`` queda FAILED.
+    """
+    event = claim_next()
+    if event is None:
+        return None
+    try:
+        event.status = apply_event(event)
+        event.error = ""
+    except Exception:
+        event.error = traceback.format_exc()
+        event.status = "FAILED" if event.attempts >= settings.WEBHOOK_MAX_ATTEMPTS else "PENDING"
+        event.next_attempt_at = timezone.now() + retry_delay(event.attempts)
+    event.processed_at = timezone.now()
+    event.save(update_fields=["status", "error", "processed_at", "next_attempt_at"])
+    return event
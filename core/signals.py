@@ -0,0 +1,168 @@
+# core/signals.py
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import CommonArea, ExpenseType, Fee, MaintenanceRequest, Notice, NoticeCategory, Notification, Payment, Unit
+from .services import counters, events, notifications, rollups, versions
+from .services.fees import apply_payment_delta
+
+
+FEE_STATE_FIELDS = ("period", "expense_type_id", "status", "amount", "paid_total")
+
+
+@receiver(pre_save, sender=Payment)
+def remember_previous_payment(sender, instance, **kwargs):
+    # Guarda el estado anterior para poder revertirlo si el pago se edita
+    instance._previous = None
+    if instance.pk:
+        instance._previous = Payment.objects.filter(pk=instance.pk).values_list("fee_id", "amount").first()
+
+
+@receiver(post_save, sender=Payment)
+def payment_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous", None)
+    if previous:
+        fee_id, amount = previous
+        if fee_id == instance.fee_id:
+            apply_payment_delta(fee_id, instance.amount - amount)
+            return
+        apply_payment_delta(fee_id, -amount, payments=-1)
+    apply_payment_delta(instance.fee_id, instance.amount, payments=1)
+
+
+@receiver(post_delete, sender=Payment)
+def payment_deleted(sender, instance, origin=None, **kwargs):
+    # Borrado en cascada de la cuota: fee_deleted descuenta su estado original con todos sus pagos
+    if isinstance(origin, Payment) or (isinstance(origin, QuerySet) and origin.model is Payment):
+        apply_payment_delta(instance.fee_id, -instance.amount, payments=-1)
+
+
+@receiver(pre_save, sender=Fee)
+def remember_previous_fee(sender, instance, **kwargs):
+    # Fila bloqueada (Fee.save abre la transacción): ningún pago cambia paid_total entre medio
+    instance._previous = None
+    if instance.pk:
+        instance._previous = Fee.objects.select_for_update().filter(pk=instance.pk).values_list(*FEE_STATE_FIELDS).first()
+
+
+@receiver(post_save, sender=Fee)
+def fee_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous", None)
+    after = tuple(getattr(instance, name) for name in FEE_STATE_FIELDS)
+    if previous:
+        # Fee.save no escribe paid_total: sigue siendo el de la base, no el de la instancia
+        after = (*after[:4], previous[4])
+        instance.paid_total = previous[4]
+    delta = counters.pending_contribution(*after[2:])
+    if previous:
+        delta -= counters.pending_contribution(*previous[2:])
+    counters.bump("pending_fees_total", delta)
+    # Los pagos solo cuentan si la cuota cambia de fila en FinanceRollup
+    moved = previous and previous[:3] != after[:3]
+    payments = Payment.objects.filter(fee_id=instance.pk).count() if moved else 0
+    rollups.move_fee(previous and (*previous, payments), (*after, payments))
+
+
+@receiver(pre_delete, sender=Fee)
+def remember_deleted_fee(sender, instance, **kwargs):
+    instance._previous = Fee.objects.filter(pk=instance.pk).values_list(*FEE_STATE_FIELDS).first()
+    instance._payments = Payment.objects.filter(fee_id=instance.pk).count()
+
+
+@receiver(post_delete, sender=Fee)
+def fee_deleted(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous", None)
+    if previous:
+        counters.bump("pending_fees_total", -counters.pending_contribution(*previous[2:]))
+        rollups.move_fee((*previous, instance._payments), None)
+
+
+# --- Contadores del dashboard ---
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.bump("total_users", 1)
+
+
+@receiver(post_delete, sender=get_user_model())
+def user_deleted(sender, instance, **kwargs):
+    counters.bump("total_users", -1)
+
+
+@receiver(post_save, sender=Unit)
+def unit_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.bump("active_units", 1)
+
+
+@receiver(post_delete, sender=Unit)
+def unit_deleted(sender, instance, **kwargs):
+    counters.bump("active_units", -1)
+
+
+def _is_open(status):
+    return 1 if status in counters.OPEN_MAINTENANCE_STATUSES else 0
+
+
+@receiver(pre_save, sender=MaintenanceRequest)
+def remember_previous_request_status(sender, instance, **kwargs):
+    instance._previous_status = None
+    if instance.pk:
+        instance._previous_status = MaintenanceRequest.objects.filter(pk=instance.pk).values_list("status", flat=True).first()
+
+
+@receiver(post_save, sender=MaintenanceRequest)
+def maintenance_request_saved(sender, instance, **kwargs):
+    previous_status = getattr(instance, "_previous_status", None)
+    counters.bump("open_maintenance_requests", _is_open(instance.status) - _is_open(previous_status))
+    if previous_status and previous_status != instance.status:
+        notifications.fan_out(
+            f"Tu solicitud de mantenimiento \"{instance.title}\" ahora está: {instance.get_status_display()}",
+            [instance.reported_by_id],
+            link=f"/maintenance-requests/{instance.pk}",
+        )
+
+
+@receiver(post_delete, sender=MaintenanceRequest)
+def maintenance_request_deleted(sender, instance, **kwargs):
+    counters.bump("open_maintenance_requests", -_is_open(instance.status))
+
+
+@receiver(pre_save, sender=Notification)
+def remember_previous_read_state(sender, instance, **kwargs):
+    instance._previous_unread = None
+    if instance.pk:
+        instance._previous_unread = Notification.objects.filter(pk=instance.pk, is_read=False).exists()
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, created, **kwargs):
+    # Las altas masivas (services.notifications.fan_out) ajustan el contador por su cuenta
+    was_unread = False if created else getattr(instance, "_previous_unread", None)
+    if was_unread is None:
+        return
+    if created:
+        events.publish([instance.user_id])
+    notifications.bump_unread([instance.user_id], int(not instance.is_read) - int(was_unread))
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    if not instance.is_read:
+        notifications.bump_unread([instance.user_id], -1)
+
+
+# Catálogos servidos con ETag: cada cambio incrementa la versión de su tabla
+VERSIONED_MODELS = (ExpenseType, NoticeCategory, CommonArea, Notice)
+
+
+def bump_table_version(sender, **kwargs):
+    versions.bump(sender)
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_table_version, sender=model, dispatch_uid=f"version_{model._meta.label_lower}_save")
+    post_delete.connect(bump_table_version, sender=model, dispatch_uid=f"version_{model._meta.label_lower}_delete")
@@ -1,3 +1,786 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import json
+import shutil
+import tempfile
+import threading
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import views_events
+from .authentication import token_user, tokens_for_user
+from .models import ActivityLog, CommonArea, ExpenseType, Fee, FinanceRollup, Job, MaintenanceRequest, MaintenanceRequestAttachment, Notice, Notification, Payment, Reservation, Unit, WebhookEvent
+from .services import activity, attachments, counters, jobs, reservations, response_cache, rollups, webhooks
+from .services.notices import announce_due_notices
+from .services.fees import issue_fees, sweep_overdue_fees
+
+User = get_user_model()
+
+
+class LoginTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("Vecino", email="Vecino@Example.com", password="secreto")
+
+    def test_email_or_username_logs_in_with_one_query(self):
+        for identifier in ({"email": "vecino@example.COM"}, {"username": "VECINO"}):
+            # Usuario y perfil en un JOIN; el registro de actividad queda en el buffer
+            with self.assertNumQueries(1):
+                response = self.client.post("/api/auth/login/", identifier | {"password": "secreto"})
+            self.assertEqual(response.status_code, 200, identifier)
+            self.assertEqual(int(AccessToken(response.data["access"])["user_id"]), self.user.pk)
+
+    def test_bad_credentials_return_401(self):
+        for identifier in ({"email": "vecino@example.com"}, {"username": "otro"}):
+            response = self.client.post("/api/auth/login/", identifier | {"password": "incorrecta"})
+            self.assertEqual(response.status_code, 401, identifier)
+        self.assertEqual(self.client.post("/api/auth/login/", {"username": "vecino"}).status_code, 400)
+
+
+class TokenUserTests(TestCase):
+    def test_staff_and_superuser_claims_are_not_swapped(self):
+        for is_staff, is_superuser in [(True, False), (False, True), (True, True), (False, False)]:
+            user = token_user("7", {"role": "ADMIN", "is_staff": is_staff, "is_superuser": is_superuser})
+            self.assertEqual(user.pk, 7)
+            self.assertIs(user.is_staff, is_staff)
+            self.assertIs(user.is_superuser, is_superuser)
+            self.assertIs(user.is_active, True)
+            self.assertEqual(user.token_role, "ADMIN")
+
+    def test_deferred_fields_load_from_db(self):
+        stored = User.objects.create(username="token-user", email="token@example.com")
+        user = token_user(str(stored.pk), {"role": "RESIDENT", "is_staff": False, "is_superuser": False})
+        self.assertEqual(user.username, "token-user")
+        self.assertEqual(user.email, "token@example.com")
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class ConcurrentBookingTests(TransactionTestCase):
+    THREADS = 12
+
+    def test_only_one_booking_wins_the_same_slot(self):
+        area = CommonArea.objects.create(name="Quincho")
+        users = [User.objects.create(username=f"booker-{i}") for i in range(self.THREADS)]
+        start = timezone.now().replace(microsecond=0) + datetime.timedelta(days=1)
+        end = start + datetime.timedelta(hours=2)
+        barrier = threading.Barrier(self.THREADS)
+        results, lock = [], threading.Lock()
+
+        def attempt(user):
+            try:
+                barrier.wait()
+                try:
+                    reservations.book(area, user, start, end)
+                    outcome = "ok"
+                except reservations.ReservationConflict:
+                    outcome = "conflict"
+                with lock:
+                    results.append(outcome)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=attempt, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count("ok"), 1)
+        self.assertEqual(results.count("conflict"), self.THREADS - 1)
+        self.assertEqual(Reservation.objects.filter(area=area).count(), 1)
+
+
+class FinanceRollupTests(TransactionTestCase):
+    """
+    Los deltas incrementales deben coincidir con un recálculo completo del periodo.
+    TransactionTestCase: los contadores del dashboard se aplican en on_commit.
+    """
+
+    def setUp(self):
+        owner = User.objects.create(username="owner")
+        self.units = [Unit.objects.create(code=f"A-{i}", tower="A", number=str(i), owner=owner) for i in range(3)]
+        self.expense_type = ExpenseType.objects.create(name="Expensas", amount_default=100)
+
+    def assertRollupsMatch(self):
+        stored = {
+            (row.period, row.expense_type_id, row.status): (row.issued_amount, row.paid_amount, row.fee_count, row.payment_count)
+            for row in FinanceRollup.objects.all()
+            if row.fee_count
+        }
+        expected = {
+            (row.period, row.expense_type_id, row.status): (row.issued_amount, row.paid_amount, row.fee_count, row.payment_count)
+            for row in rollups._rollup_rows(Fee.objects.all(), Payment.objects.all())
+        }
+        self.assertEqual(stored, expected)
+        self.assertEqual(counters.snapshot()["pending_fees_total"], counters._compute()["pending_fees_total"])
+
+    def test_payments_and_fee_changes_keep_rollups_in_sync(self):
+        issue_fees("2025-01")
+        first, second, third = Fee.objects.order_by("id")
+        payment = Payment.objects.create(fee=first, amount=40)
+        Payment.objects.create(fee=first, amount=60)
+        self.assertRollupsMatch()
+        payment.amount = 10
+        payment.save()
+        self.assertRollupsMatch()
+        payment.fee = second
+        payment.save()
+        self.assertRollupsMatch()
+        payment.delete()
+        self.assertRollupsMatch()
+        Payment.objects.create(fee=third, amount=100)
+        third.refresh_from_db()
+        third.delete()
+        self.assertRollupsMatch()
+        second.amount = 150
+        second.save()
+        Fee.objects.filter(pk=second.pk).update(due_date=datetime.date(2000, 1, 1))
+        sweep_overdue_fees()
+        self.assertRollupsMatch()
+        Payment.objects.filter(fee=first).delete()
+        self.assertRollupsMatch()
+
+    def test_stale_fee_save_keeps_paid_total(self):
+        issue_fees("2025-03")
+        stale = Fee.objects.first()
+        Payment.objects.create(fee=stale, amount=30)
+        stale.due_date = datetime.date(2030, 1, 1)
+        stale.save()
+        stale.refresh_from_db()
+        self.assertEqual(stale.paid_total, 30)
+        self.assertRollupsMatch()
+
+    def test_reverted_payment_reopens_overdue_fee(self):
+        issue_fees("2025-04")
+        fee = Fee.objects.first()
+        Fee.objects.filter(pk=fee.pk).update(due_date=datetime.date(2000, 1, 1))
+        payment = Payment.objects.create(fee=fee, amount=100)
+        fee.refresh_from_db()
+        self.assertEqual(fee.status, "PAID")
+        payment.delete()
+        fee.refresh_from_db()
+        self.assertEqual(fee.status, "OVERDUE")
+        self.assertRollupsMatch()
+
+    def test_issue_fees_counts_only_its_own_inserts(self):
+        def progress(done, total):
+            # Otra emisión crea la cuota de la última unidad entre dos lotes
+            if done == 1:
+                Fee.objects.create(unit=self.units[2], expense_type=self.expense_type, period="2025-05", amount=100)
+
+        result = issue_fees("2025-05", batch_size=1, progress=progress)
+        self.assertEqual(result["created"], 2)
+        self.assertEqual(Fee.objects.filter(period="2025-05").count(), 3)
+        self.assertRollupsMatch()
+
+    def test_batched_sweep_and_amount_change_move_rollups_by_delta(self):
+        issue_fees("2025-06")
+        issue_fees("2025-07")
+        first = Fee.objects.filter(period="2025-06").order_by("id").first()
+        Payment.objects.create(fee=first, amount=30)
+        Fee.objects.filter(period="2025-06").update(due_date=datetime.date(2000, 1, 1))
+        self.assertEqual(sweep_overdue_fees(batch_size=2), 3)
+        self.assertRollupsMatch()
+        self.assertEqual(issue_fees("2025-06", amount=150)["updated"], 3)
+        self.assertRollupsMatch()
+        self.assertEqual(Fee.objects.filter(period="2025-07", status="ISSUED").count(), 3)
+
+    def test_refresh_periods_is_idempotent(self):
+        issue_fees("2025-02")
+        Payment.objects.create(fee=Fee.objects.first(), amount=100)
+        rollups.refresh_periods(["2025-02"])
+        rollups.refresh_periods(["2025-02"])
+        self.assertRollupsMatch()
+
+
+class DashboardCounterTests(TransactionTestCase):
+    def test_deltas_apply_on_commit_only(self):
+        counters.reconcile()
+        owner = User.objects.create(username="owner")
+        with transaction.atomic():
+            Unit.objects.create(code="B-1", tower="B", number="1", owner=owner)
+            self.assertEqual(counters.snapshot()["active_units"], 0)
+        self.assertEqual(counters.snapshot()["active_units"], 1)
+        try:
+            with transaction.atomic():
+                Unit.objects.create(code="B-2", tower="B", number="2", owner=owner)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(counters.snapshot()["active_units"], 1)
+        self.assertEqual(counters.snapshot()["total_users"], 1)
+
+
+class WebhookRetryTests(TestCase):
+    def event(self, resource_id):
+        return WebhookEvent.objects.create(provider="mercadopago", event_id=resource_id, topic="payment", resource_id=resource_id)
+
+    def test_failed_event_backs_off_without_blocking_the_queue(self):
+        poisoned, healthy = self.event("1"), self.event("2")
+
+        def fetch(payment_id):
+            if payment_id == "1":
+                raise RuntimeError("timeout")
+            return {"status": "rejected"}
+
+        with mock.patch.object(webhooks, "fetch_mercadopago_payment", side_effect=fetch):
+            first = webhooks.process_next()
+            second = webhooks.process_next()
+            self.assertIsNone(webhooks.process_next())
+
+        self.assertEqual((first.pk, first.status, first.attempts), (poisoned.pk, "PENDING", 1))
+        self.assertGreater(first.next_attempt_at, timezone.now() + datetime.timedelta(seconds=20))
+        self.assertEqual((second.pk, second.status), (healthy.pk, "IGNORED"))
+
+    def test_abandoned_claim_is_retaken_after_timeout(self):
+        event = self.event("3")
+        claimed = webhooks.claim_next()
+        self.assertEqual(claimed.status, "PROCESSING")
+        self.assertIsNone(webhooks.claim_next())
+        WebhookEvent.objects.filter(pk=event.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(webhooks.claim_next().attempts, 2)
+
+
+class NoticeAnnouncementTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_superuser("admin", password="x"))
+
+    def create(self, publish_date):
+        response = self.client.post("/api/notices/", {"title": "Corte de agua", "body": "...", "publish_date": publish_date.isoformat()})
+        self.assertEqual(response.status_code, 201, response.content)
+        return Notice.objects.get(pk=response.data["id"])
+
+    def test_published_notice_is_announced_once(self):
+        notice = self.create(timezone.now())
+        self.assertIsNotNone(notice.notified_at)
+        self.assertEqual(Job.objects.filter(kind="notify_audience").count(), 1)
+        self.assertEqual(announce_due_notices(), 0)
+
+    def test_scheduled_notice_waits_for_its_publish_date(self):
+        notice = self.create(timezone.now() + datetime.timedelta(days=1))
+        self.assertIsNone(notice.notified_at)
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(announce_due_notices(now=notice.publish_date), 1)
+        job = Job.objects.get(kind="notify_audience")
+        self.assertEqual(job.params["link"], f"/notices/{notice.pk}")
+        self.assertEqual(announce_due_notices(now=notice.publish_date), 0)
+
+
+
+class NoticeBackfillMigrationTests(TransactionTestCase):
+    before = [("core", "0023_webhookevent_backoff")]
+
+    def tearDown(self):
+        self.migrate_to_latest()
+
+    def migrate_to_latest(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_published_notices_are_not_announced_again(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        author = apps.get_model("auth", "User").objects.create(username="autor")
+        OldNotice = apps.get_model("core", "Notice")
+        now = timezone.now()
+        published = OldNotice.objects.create(title="Viejo", body="...", created_by=author, publish_date=now - datetime.timedelta(days=3))
+        scheduled = OldNotice.objects.create(title="Nuevo", body="...", created_by=author, publish_date=now + datetime.timedelta(days=1))
+
+        # El resto de las migraciones también: los servicios usan los modelos actuales
+        self.migrate_to_latest()
+
+        self.assertEqual(Notice.objects.get(pk=published.pk).notified_at, published.publish_date)
+        self.assertIsNone(Notice.objects.get(pk=scheduled.pk).notified_at)
+        self.assertEqual(announce_due_notices(), 0)
+        self.assertEqual(announce_due_notices(now=scheduled.publish_date), 1)
+        self.assertEqual(Job.objects.get().params["link"], f"/notices/{scheduled.pk}")
+
+class ActivityLogFilterTests(TestCase):
+    def setUp(self):
+        admin = get_user_model().objects.create_superuser("admin", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+        for day in (1, 2, 3):
+            ActivityLog.objects.create(user=admin, action=f"DAY_{day}", timestamp=timezone.make_aware(datetime.datetime(2024, 5, day, 0, 30)))
+
+    def actions(self, **params):
+        response = self.client.get("/api/activity-logs/", {"page_size": 50, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return sorted(row["action"] for row in response.data["results"])
+
+    def test_dates_start_at_local_midnight(self):
+        self.assertEqual(self.actions(since="2024-05-02", until="2024-05-03"), ["DAY_2"])
+        self.assertEqual(self.actions(since="2024-05-02T00:30"), ["DAY_2", "DAY_3"])
+
+    def test_invalid_dates_are_rejected(self):
+        for value in ("2024-13-45", "2024-05-02T25:00", "ayer"):
+            response = self.client.get("/api/activity-logs/", {"since": value})
+            self.assertEqual(response.status_code, 400, value)
+            self.assertIn("since", response.data)
+
+
+class NotificationEventsTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("vecino", password="x")
+        self.token = str(tokens_for_user(self.user).access_token)
+        self.last_id = Notification.objects.create(user=self.user, message="Anterior").id
+
+    def call(self, app, query, until=None, during=None):
+        """Corre ``app`` como lo haría el servidor ASGI; el cliente se desconecta cuando ``until(body)``."""
+        async def run():
+            disconnect, sent = asyncio.Event(), {"status": None, "body": b""}
+
+            async def receive():
+                await disconnect.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    sent["status"] = message["status"]
+                else:
+                    sent["body"] += message.get("body", b"")
+                    if until and until(sent["body"]):
+                        disconnect.set()
+
+            scope = {"type": "http", "method": "GET", "query_string": query.encode(), "headers": []}
+            task = asyncio.create_task(app(scope, receive, send))
+            if during:
+                await asyncio.sleep(0.2)
+                await sync_to_async(during, thread_sensitive=False)()
+            await asyncio.wait_for(task, 10)
+            return sent["status"], sent["body"]
+        return asyncio.run(run())
+
+    def notify(self):
+        try:
+            Notification.objects.create(user=self.user, message="Nueva")
+        finally:
+            # Corre en un hilo del executor: su conexión no debe quedar abierta
+            connection.close()
+
+    def test_requests_without_a_valid_token_are_rejected(self):
+        for query in ("", "token=basura"):
+            status, _ = self.call(views_events.notification_poll, query)
+            self.assertEqual(status, 401, query)
+
+    def test_poll_without_cursor_returns_the_last_id(self):
+        status, body = self.call(views_events.notification_poll, f"token={self.token}")
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body), {"results": [], "last_id": self.last_id})
+
+    def test_poll_returns_pending_rows_right_away(self):
+        status, body = self.call(views_events.notification_poll, f"token={self.token}&since=0")
+        data = json.loads(body)
+        self.assertEqual([row["message"] for row in data["results"]], ["Anterior"])
+        self.assertEqual((data["last_id"], data["unread"]), (self.last_id, 1))
+
+    def test_poll_wakes_up_on_a_new_notification(self):
+        status, body = self.call(views_events.notification_poll, f"token={self.token}&since={self.last_id}&timeout=8", during=self.notify)
+        self.assertEqual([row["message"] for row in json.loads(body)["results"]], ["Nueva"])
+
+    def test_poll_times_out_with_the_same_cursor(self):
+        status, body = self.call(views_events.notification_poll, f"token={self.token}&since={self.last_id}&timeout=1")
+        self.assertEqual(json.loads(body), {"results": [], "last_id": self.last_id, "unread": 1})
+
+    def test_stream_pushes_new_notifications(self):
+        status, body = self.call(
+            views_events.notification_stream, f"token={self.token}&since={self.last_id}",
+            until=lambda body: b"event: unread" in body, during=self.notify,
+        )
+        self.assertEqual(status, 200)
+        self.assertIn(b"event: notification", body)
+        self.assertIn(b'"message": "Nueva"', body)
+        self.assertIn(b'data: {"unread": 2}', body)
+
+class AttachmentStoreTests(TestCase):
+    def test_concurrent_duplicate_upload_returns_the_winner(self):
+        user = get_user_model().objects.create_user("vecino", password="x")
+        request = MaintenanceRequest.objects.create(title="Fuga", description="...", reported_by=user)
+        upload = SimpleUploadedFile("foto.jpg", b"\xff\xd8\xff" + b"0" * 64, content_type="image/jpeg")
+        sha256 = attachments.content_hash(upload)
+        winner = []
+
+        def exists(name):
+            # La otra subida guarda su fila entre la comprobación de duplicados y el INSERT
+            if not winner:
+                winner.append(MaintenanceRequestAttachment.objects.create(request=request, sha256=sha256, file=name))
+            return True
+
+        with mock.patch.object(attachments.default_storage, "exists", side_effect=exists):
+            attachment, created = attachments.store(request, upload, "image/jpeg")
+        self.assertFalse(created)
+        self.assertEqual(attachment.pk, winner[0].pk)
+        self.assertEqual(MaintenanceRequestAttachment.objects.filter(request=request).count(), 1)
+
+
+class AttachmentDownloadTests(TestCase):
+    CONTENT = bytes(range(20))
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root, MEDIA_SERVE_MODE="django"))
+        self.owner = User.objects.create_user("vecino", password="x")
+        request = MaintenanceRequest.objects.create(title="Fuga", description="...", reported_by=self.owner)
+        self.attachment = MaintenanceRequestAttachment.objects.create(request=request, sha256="abc", content_type="image/png")
+        self.attachment.file.save("foto.png", ContentFile(self.CONTENT))
+        self.url = f"/api/maintenance-attachments/{self.attachment.id}/file/"
+
+    def get(self, user, **headers):
+        response = self.client.get(self.url, {"token": str(tokens_for_user(user).access_token)}, headers=headers)
+        # Leer el stream lo cierra junto con el archivo (el cliente de pruebas envuelve el cierre)
+        response.body = b"".join(response.streaming_content) if response.streaming else response.content
+        return response
+
+    def test_owner_gets_the_whole_file(self):
+        response = self.get(self.owner)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.body, self.CONTENT)
+        self.assertEqual((response["Content-Type"], response["ETag"], response["Accept-Ranges"]), ("image/png", '"abc-file"', "bytes"))
+        self.assertEqual(self.get(self.owner, if_none_match='"abc-file"').status_code, 304)
+
+    def test_range_returns_206_with_only_those_bytes(self):
+        for header, start, end in (("bytes=2-5", 2, 5), ("bytes=15-", 15, 19), ("bytes=-4", 16, 19), ("bytes=10-99", 10, 19)):
+            response = self.get(self.owner, range=header)
+            self.assertEqual(response.status_code, 206, header)
+            self.assertEqual(response["Content-Range"], f"bytes {start}-{end}/20")
+            self.assertEqual(response.body, self.CONTENT[start:end + 1])
+
+    def test_range_past_the_end_returns_416(self):
+        response = self.get(self.owner, range="bytes=20-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */20")
+        # Si el cliente tiene otra versión (If-Range distinto) se ignora el rango
+        self.assertEqual(self.get(self.owner, range="bytes=2-5", if_range='"otro"').status_code, 200)
+
+    def test_other_residents_get_404(self):
+        self.assertEqual(self.get(User.objects.create_user("otro", password="x")).status_code, 404)
+        self.assertEqual(self.get(User.objects.create_superuser("admin", password="x")).status_code, 200)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_missing_or_unknown_variant(self):
+        token = str(tokens_for_user(self.owner).access_token)
+        self.assertEqual(self.client.get(self.url, {"token": token, "variant": "thumbnail"}).status_code, 404)
+        self.assertEqual(self.client.get(self.url, {"token": token, "variant": "original"}).status_code, 400)
+
+    def test_front_server_mode_only_sends_the_redirect(self):
+        with override_settings(MEDIA_SERVE_MODE="nginx"):
+            response = self.get(self.owner)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Accel-Redirect"], settings.MEDIA_ACCEL_PREFIX + self.attachment.file.name)
+        self.assertEqual(response.body, b"")
+
+class ActivityLogBufferTests(TestCase):
+    def test_request_only_writes_when_the_buffer_is_full(self):
+        user = get_user_model().objects.create_user("vecino", password="x")
+        buffer = activity.ActivityLogBuffer(flush_size=2, flush_interval=0, max_size=4)
+        with mock.patch.object(buffer, "_ensure_flusher"):
+            for n in range(3):
+                buffer.add(user.pk, f"A{n}")
+            # Con el intervalo vencido y flush_size alcanzado solo se despierta al hilo
+            self.assertTrue(buffer._wake.is_set())
+            self.assertFalse(ActivityLog.objects.exists())
+            buffer.add(user.pk, "A3")
+        self.assertEqual(ActivityLog.objects.count(), 4)
+        self.assertEqual(buffer.flush(), 0)
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_superuser("admin", password="x"))
+
+    def test_abandoned_job_is_retaken_until_max_attempts(self):
+        job = jobs.enqueue("reconcile_dashboard_counters")
+        self.assertEqual(jobs.claim_next().attempts, 1)
+        self.assertIsNone(jobs.claim_next())
+        with self.settings(JOB_MAX_ATTEMPTS=2):
+            Job.objects.filter(pk=job.pk).update(lease_expires_at=timezone.now())
+            self.assertEqual(jobs.claim_next().attempts, 2)
+            Job.objects.filter(pk=job.pk).update(lease_expires_at=timezone.now())
+            self.assertIsNone(jobs.claim_next())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.lease_expires_at), ("FAILED", None))
+
+    def test_params_are_validated_per_kind(self):
+        response = self.client.post("/api/jobs/", {"kind": "issue_fees", "params": {}}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("period", response.data["params"])
+        response = self.client.post("/api/jobs/", {"kind": "notify_audience", "params": {"message": "Hola", "audience": "role"}}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Job.objects.exists())
+        response = self.client.post("/api/jobs/", {"kind": "issue_fees", "params": {"period": "2025-08", "amount": 120}}, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(Job.objects.get().params, {"period": "2025-08", "amount": 120.0})
+
+
+class AvailabilityTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("vecino", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.area = CommonArea.objects.create(name="Piscina")
+
+    def test_invalid_parameters_are_rejected_with_a_message(self):
+        for params, message in (({"area": "abc"}, "area debe ser"), ({"area": "1,x"}, "area debe ser"), ({"from": "2024-13-45"}, "Fecha inválida")):
+            response = self.client.get("/api/common-areas/availability/", params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn(message, response.data["detail"])
+
+
+    def at(self, hour):
+        return timezone.make_aware(datetime.datetime.combine(self.day, datetime.time(hour)))
+
+    def test_free_slots_skip_merged_reservations(self):
+        self.day = timezone.localdate() + datetime.timedelta(days=1)
+        for start, end in ((10, 12), (11, 13), (18, 19)):
+            Reservation.objects.create(area=self.area, user=self.user, start_time=self.at(start), end_time=self.at(end))
+        CommonArea.objects.create(name="Quincho")
+        response = self.client.get("/api/common-areas/availability/", {"area": self.area.id, "from": self.day.isoformat(), "to": self.day.isoformat(), "busy": "1"})
+        self.assertEqual(response.status_code, 200)
+        [row] = response.data["areas"]
+        end_of_day = self.at(0) + datetime.timedelta(days=1)
+        self.assertEqual([(slot["start"], slot["end"]) for slot in row["busy"]], [(self.at(10), self.at(13)), (self.at(18), self.at(19))])
+        self.assertEqual([(slot["start"], slot["end"]) for slot in row["free"]], [(self.at(0), self.at(10)), (self.at(13), self.at(18)), (self.at(19), end_of_day)])
+
+    def test_overlapping_booking_returns_409(self):
+        self.day = timezone.localdate() + datetime.timedelta(days=1)
+        Reservation.objects.create(area=self.area, user=self.user, start_time=self.at(10), end_time=self.at(12))
+        response = self.client.post("/api/reservations/", {"area": self.area.id, "start_time": self.at(11), "end_time": self.at(13)}, format="json")
+        self.assertEqual(response.status_code, 409)
+        self.assertIn("ocupado", response.data["detail"])
+        response = self.client.post("/api/reservations/", {"area": self.area.id, "start_time": self.at(12), "end_time": self.at(13)}, format="json")
+        self.assertEqual(response.status_code, 201)
+
+class FeeListQueryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_superuser("admin", password="x"))
+        self.owner = User.objects.create(username="owner")
+        ExpenseType.objects.create(name="Expensas", amount_default=100)
+        self.add_units(2, "2025-01")
+
+    def add_units(self, count, period):
+        start = Unit.objects.count()
+        for i in range(start, start + count):
+            Unit.objects.create(code=f"A-{i}", tower="A", number=str(i), owner=self.owner)
+        issue_fees(period)
+        for fee in Fee.objects.filter(period=period):
+            Payment.objects.create(fee=fee, amount=30)
+            Payment.objects.create(fee=fee, amount=20)
+
+    def test_list_cost_does_not_depend_on_rows(self):
+        # Conteo de la página, cuotas con unidad, dueño y tipo (JOIN) y un prefetch de pagos
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/fees/")
+        self.assertEqual(response.status_code, 200)
+        self.add_units(5, "2025-02")
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/fees/")
+        rows = response.data["results"]
+        self.assertEqual(len(rows), 9)
+        self.assertTrue(all(row["total_paid"] == 50 and len(row["payments"]) == 2 for row in rows))
+        with self.assertNumQueries(2):
+            self.client.get("/api/fees/", {"payments": "0"})
+
+
+class MaintenanceRequestQueryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_superuser("admin", password="x"))
+        self.add_requests(2)
+
+    def add_requests(self, count):
+        for n in range(count):
+            owner = User.objects.create(username=f"vecino-{User.objects.count()}")
+            unit = Unit.objects.create(code=f"B-{owner.pk}", tower="B", number=str(owner.pk), owner=owner)
+            request = MaintenanceRequest.objects.create(title=f"Fuga {n}", description="...", unit=unit, reported_by=owner, assigned_to=owner)
+            for author in (owner, User.objects.create(username=f"tecnico-{owner.pk}")):
+                request.comments.create(user=author, body="Revisado")
+            MaintenanceRequestAttachment.objects.create(request=request, file=f"maintenance/{owner.pk}.jpg")
+
+    def test_list_cost_does_not_depend_on_rows(self):
+        # Conteo, solicitudes con unidad y usuarios (JOIN), comentarios con autor y adjuntos
+        with self.assertNumQueries(4):
+            self.client.get("/api/maintenance-requests/")
+        self.add_requests(4)
+        with self.assertNumQueries(4):
+            response = self.client.get("/api/maintenance-requests/")
+        rows = response.data["results"]
+        self.assertEqual(len(rows), 6)
+        self.assertTrue(all(len(row["comments"]) == 2 and len(row["attachments"]) == 1 for row in rows))
+        self.assertTrue(all(comment["user_username"] for row in rows for comment in row["comments"]))
+
+    def test_empty_include_skips_nested_relations(self):
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/maintenance-requests/", {"include": ""})
+        self.assertNotIn("comments", response.data["results"][0])
+        self.assertNotIn("attachments", response.data["results"][0])
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/maintenance-requests/", {"include": "comments"})
+        self.assertIn("comments", response.data["results"][0])
+        self.assertNotIn("attachments", response.data["results"][0])
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_superuser("admin", password="x"))
+        for n in range(3):
+            user = User.objects.create(username=f"vecino-{n}")
+            user.vehicles.create(plate=f"ABC-{n}")
+            user.pets.create(name="Firulais")
+            user.family_members.create(full_name="Ana", relationship="Hija")
+
+    def test_full_graph_by_default(self):
+        # Conteo, usuarios con perfil (JOIN) y un prefetch por relación anidada
+        with self.assertNumQueries(5):
+            response = self.client.get("/api/users/")
+        row = response.data["results"][-1]
+        self.assertEqual({"profile", "vehicles", "pets", "family_members"} - set(row), set())
+
+    def test_fields_prune_output_and_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/users/", {"fields": "id,username"})
+        self.assertEqual(set(response.data["results"][0]), {"id", "username"})
+
+    def test_expand_picks_nested_relations(self):
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/users/", {"fields": "id", "expand": "pets"})
+        row = response.data["results"][-1]
+        self.assertEqual(set(row), {"id", "pets"})
+        self.assertEqual(row["pets"][0]["name"], "Firulais")
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        ExpenseType.objects.create(name="Expensas", amount_default=100)
+
+    def test_matching_etag_answers_304_without_reading_the_table(self):
+        response = self.client.get("/api/expense-types/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Last-Modified", response)
+        # Solo la versión de la tabla: ni el listado ni el conteo
+        with self.assertNumQueries(1):
+            cached = self.client.get("/api/expense-types/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached["ETag"], response["ETag"])
+        self.assertEqual(cached.content, b"")
+
+    def test_change_in_the_table_changes_the_etag(self):
+        etag = self.client.get("/api/expense-types/")["ETag"]
+        ExpenseType.objects.create(name="Agua", amount_default=30)
+        response = self.client.get("/api/expense-types/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.data["results"]), 2)
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        CommonArea.objects.create(name="Piscina")
+
+    def test_second_request_is_served_from_the_cache(self):
+        first = self.client.get("/api/common-areas/")
+        # Solo la versión de la tabla: el listado sale de la caché
+        with self.assertNumQueries(1):
+            second = self.client.get("/api/common-areas/")
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(response_cache.stats()["hits"], 1)
+        self.assertEqual(response_cache.stats()["misses"], 1)
+
+    def test_version_bump_invalidates_the_entry(self):
+        self.client.get("/api/common-areas/")
+        CommonArea.objects.create(name="Quincho")
+        response = self.client.get("/api/common-areas/")
+        self.assertEqual([row["name"] for row in response.json()["results"]], ["Piscina", "Quincho"])
+        self.assertEqual(response_cache.stats()["misses"], 2)
+        CommonArea.objects.filter(name="Quincho").first().delete()
+        response = self.client.get("/api/common-areas/")
+        self.assertEqual([row["name"] for row in response.json()["results"]], ["Piscina"])
+
+class OverdueSweepTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create(username="owner")
+        for i in range(4):
+            Unit.objects.create(code=f"A-{i}", tower="A", number=str(i), owner=owner)
+        ExpenseType.objects.create(name="Expensas", amount_default=100)
+        issue_fees("2025-01")
+        self.past_due, self.paid, self.not_due, self.no_date = Fee.objects.order_by("id")
+        Fee.objects.filter(pk__in=[self.past_due.pk, self.paid.pk]).update(due_date=datetime.date(2025, 1, 10))
+        Fee.objects.filter(pk=self.not_due.pk).update(due_date=datetime.date(2025, 2, 10))
+        Payment.objects.create(fee=self.paid, amount=100)
+
+    def statuses(self):
+        return list(Fee.objects.order_by("id").values_list("status", flat=True))
+
+    def test_only_issued_past_due_fees_change(self):
+        self.assertEqual(sweep_overdue_fees(today=datetime.date(2025, 1, 10)), 0)
+        self.assertEqual(sweep_overdue_fees(today=datetime.date(2025, 1, 11)), 1)
+        self.assertEqual(self.statuses(), ["OVERDUE", "PAID", "ISSUED", "ISSUED"])
+        self.assertEqual(sweep_overdue_fees(today=datetime.date(2025, 1, 11)), 0)
+
+    def test_batches_give_the_same_result(self):
+        Fee.objects.filter(pk=self.not_due.pk).update(due_date=datetime.date(2025, 1, 5))
+        self.assertEqual(sweep_overdue_fees(today=datetime.date(2025, 1, 11), batch_size=1), 2)
+        self.assertEqual(self.statuses(), ["OVERDUE", "PAID", "OVERDUE", "ISSUED"])
+
+    def test_endpoint_is_admin_only(self):
+        Fee.objects.filter(pk=self.not_due.pk).update(due_date=datetime.date(2000, 1, 1))
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user("vecino", password="x"))
+        self.assertEqual(client.post("/api/fees/sweep-overdue/").status_code, 403)
+        client.force_authenticate(User.objects.create_superuser("admin", password="x"))
+        response = client.post("/api/fees/sweep-overdue/")
+        self.assertEqual(response.data, {"overdue": 2})
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser("admin", password="x")
+        self.client = APIClient()
+        # Token real: el rol viaja en los claims y la autenticación no consulta la base
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.admin).access_token}")
+        shared = timezone.now() - datetime.timedelta(hours=1)
+        # La mitad comparte timestamp: el desempate por id mantiene el orden estable
+        for n in range(25):
+            ActivityLog.objects.create(user=self.admin, action=f"A{n}", timestamp=shared if n % 2 else shared - datetime.timedelta(minutes=n))
+
+    def test_cursor_walk_returns_every_row_once_without_counting(self):
+        expected = list(ActivityLog.objects.order_by("-timestamp", "-id").values_list("id", flat=True))
+        seen, url, params = [], "/api/activity-logs/", {"pagination": "cursor"}
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url, params)
+            self.assertNotIn("count", response.data)
+            seen += [row["id"] for row in response.data["results"]]
+            if len(seen) == 10:
+                # Una fila nueva llega mientras se pagina: no desplaza las páginas siguientes
+                ActivityLog.objects.create(user=self.admin, action="NEW")
+            url, params = response.data["next"], None
+        self.assertEqual(seen, expected)
+
+    def test_previous_link_walks_back_over_the_tie(self):
+        first = self.client.get("/api/activity-logs/", {"pagination": "cursor"})
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+        self.assertEqual([row["id"] for row in back.data["results"]], [row["id"] for row in first.data["results"]])
+        self.assertIsNone(back.data["previous"])
+
+    def test_page_numbers_still_work(self):
+        response = self.client.get("/api/activity-logs/", {"page": 3})
+        self.assertEqual(response.data["count"], 25)
+        self.assertEqual(len(response.data["results"]), 5)
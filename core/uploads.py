@@ -0,0 +1,45 @@
+# core/uploads.py
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from rest_framework.exceptions import UnsupportedMediaType
+
+from .exceptions import PayloadTooLarge
+from .services import attachments
+
+
+class AttachmentUploadHandler(TemporaryFileUploadHandler):
+    """
+    Recibe los adjuntos directo a un archivo temporal (nunca en memoria) y calcula su sha256
+    a medida que llegan los bloques. Corta la subida en cuanto supera
+    ``ATTACHMENT_MAX_UPLOAD_SIZE`` (413) o si los primeros bytes no son de un tipo permitido
+    (415), sin escribir el resto del cuerpo a disco.
+    """
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        limit = settings.ATTACHMENT_MAX_UPLOAD_SIZE + (settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0)
+        if content_length > limit:
+            raise PayloadTooLarge()
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+        self.detected_type = None
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0:
+            self.detected_type = attachments.sniff_type(raw_data[:16])
+            if self.detected_type not in attachments.ALLOWED_TYPES:
+                self.upload_interrupted()
+                raise UnsupportedMediaType(self.content_type, detail="Formato no permitido: solo JPEG, PNG o WebP.")
+        if start + len(raw_data) > settings.ATTACHMENT_MAX_UPLOAD_SIZE:
+            self.upload_interrupted()
+            raise PayloadTooLarge()
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.digest.hexdigest()
+        file.content_type = self.detected_type
+        return file
@@ -1,22 +1,25 @@
 # condominio_backend/core/views.py
 
+import datetime
 from django.contrib.auth import authenticate, get_user_model
-from django.db.models import Sum
+from django.db.models import Count, Max, Prefetch, Sum
 from django.conf import settings
+from django.http import Http404
 from rest_framework import viewsets, permissions, filters, status, serializers # <--- CORRECCIÓN AQUÍ
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.exceptions import PermissionDenied
 import mercadopago
 from django.utils import timezone # <--- ESTA LÍNEA ES LA CORRECCIÓN
+from django.utils.dateparse import parse_date, parse_datetime
 
 from .models import (
     ActivityLog, CommonArea, ExpenseType, FamilyMember, Fee, MaintenanceRequest,
     MaintenanceRequestComment, Notice, NoticeCategory, Notification,
-    Payment, Pet, Profile, Reservation, Unit, Vehicle, MaintenanceRequestAttachment
+    Payment, Pet, Profile, Reservation, Unit, Vehicle, MaintenanceRequestAttachment, Job,
+    FinanceRollup,
 )
 from .serializers import (
     ActivityLogSerializer, AdminUserWriteSerializer, CommonAreaSerializer,
@@ -25,10 +28,20 @@ from .serializers import (
     NoticeCategorySerializer, NoticeSerializer,
     NotificationSerializer, MaintenanceRequestAttachmentSerializer,
     PaymentSerializer, PetSerializer, ProfileSerializer, ReservationSerializer,
-    UnitSerializer, UserWithProfileSerializer, VehicleSerializer
+    UnitSerializer, UserWithProfileSerializer, VehicleSerializer, JobSerializer
 )
-from .permissions import IsAdmin, IsOwnerOrAdmin
-from .services.fees import register_payment
+from .mixins import ConditionalGetMixin, SparseFieldsViewMixin
+from .pagination import CursorOrPageNumberPagination
+from .authentication import QueryTokenJWTAuthentication, tokens_for_user
+from .permissions import IsAdmin, IsOwnerOrAdmin, get_role
+from .services.fees import register_payment, sweep_overdue_fees
+from .services import attachments, counters, notifications, reservations, response_cache
+from .services.activity import log_activity
+from .services.jobs import enqueue
+from .services.notices import announce_due_notices
+from .services.webhooks import ingest_mercadopago
+from .uploads import AttachmentUploadHandler
+from .views_media import IgnoreClientContentNegotiation, serve_attachment
 
 User = get_user_model()
 
@@ -42,22 +55,19 @@ class LoginView(APIView):
         password = (data.get("password") or "").strip()
         if not identifier or not password:
             return Response({"detail": "Faltan credenciales"}, status=status.HTTP_400_BAD_REQUEST)
-        user_lookup = {"email__iexact": identifier} if "@" in identifier else {"username__iexact": identifier}
-        user_obj = User.objects.filter(**user_lookup).first()
-        if not user_obj:
-            return Response({"detail": "Credenciales inválidas"}, status=status.HTTP_401)
-        user = authenticate(request, username=user_obj.username, password=password)
+        # Una sola consulta indexada (core.backends.EmailOrUsernameBackend) y una verificación del hash
+        user = authenticate(request, username=identifier, password=password)
         if not user:
-            return Response({"detail": "Credenciales inválidas"}, status=status.HTTP_401)
-        ActivityLog.objects.create(user=user, action="USER_LOGIN_SUCCESS")
-        refresh = RefreshToken.for_user(user)
+            return Response({"detail": "Credenciales inválidas"}, status=status.HTTP_401_UNAUTHORIZED)
+        log_activity(user, "USER_LOGIN_SUCCESS")
+        refresh = tokens_for_user(user)
         return Response({"access": str(refresh.access_token), "refresh": str(refresh)})
 
 
 class LogoutView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     def post(self, request):
-        ActivityLog.objects.create(user=request.user, action="USER_LOGOUT")
+        log_activity(request.user, "USER_LOGOUT")
         return Response({"detail": "Sesión cerrada correctamente."})
 
 
@@ -75,26 +85,31 @@ class MeViewSet(viewsets.ViewSet):
         return Response(ser.data)
 
 
-class UserViewSet(viewsets.ModelViewSet):
-    queryset = User.objects.prefetch_related('profile', 'vehicles', 'pets', 'family_members').all().order_by("id")
+class UserViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
+    queryset = User.objects.all().order_by("id")
     permission_classes = [permissions.IsAdminUser]
+    select_related_fields = {"profile": ("profile",)}
+    prefetch_fields = {"vehicles": ("vehicles",), "pets": ("pets",), "family_members": ("family_members",)}
     def get_serializer_class(self):
         return AdminUserWriteSerializer if self.action in ("create", "update", "partial_update") else UserWithProfileSerializer
     @action(detail=False, methods=['get'])
     def staff_members(self, request):
-        staff_users = User.objects.filter(profile__role='STAFF').order_by('username')
+        staff_users = self.get_queryset().filter(profile__role='STAFF').order_by('username')
         serializer = self.get_serializer(staff_users, many=True)
         return Response(serializer.data)
 
 
-class UnitViewSet(viewsets.ModelViewSet):
-    queryset = Unit.objects.select_related("owner").all().order_by("id")
+class UnitViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
+    queryset = Unit.objects.all().order_by("id")
+    select_related_fields = {"owner_username": ("owner",)}
     serializer_class = UnitSerializer
     permission_classes = [IsAdmin]
 
 
-class ExpenseTypeViewSet(viewsets.ModelViewSet):
+class ExpenseTypeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = ExpenseType.objects.all().order_by("id")
+    version_models = (ExpenseType,)
+    cache_list_responses = True
     serializer_class = ExpenseTypeSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     def get_permissions(self):
@@ -103,23 +118,56 @@ class ExpenseTypeViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
 
-class FeeViewSet(viewsets.ModelViewSet):
-    queryset = Fee.objects.select_related("unit", "expense_type", "unit__owner").all()
+class FeeViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
+    queryset = Fee.objects.all()
     serializer_class = FeeSerializer
-    ordering = ["-issued_at"]
+    pagination_class = CursorOrPageNumberPagination
+    ordering = ["-issued_at", "-id"]
+    select_related_fields = {
+        "unit_code": ("unit",),
+        "owner_username": ("unit__owner",),
+        "expense_type_name": ("expense_type",),
+    }
+    prefetch_fields = {"payments": (Prefetch("payments", queryset=Payment.objects.order_by("paid_at")),)}
     def get_permissions(self):
         return [permissions.IsAuthenticated()] if self.action in ("list", "retrieve") else [IsAdmin()]
+    def expanded_fields(self):
+        # ?payments=0 se mantiene como atajo para omitir la lista anidada de pagos
+        expand = super().expanded_fields()
+        if self.request is not None and self.request.query_params.get("payments") == "0":
+            expand.discard("payments")
+        return expand
     def get_queryset(self):
         qs = super().get_queryset()
         if self.request.query_params.get("mine") == "1" and self.request.user.is_authenticated:
             qs = qs.filter(unit__owner=self.request.user)
         if period := self.request.query_params.get("period"):
             qs = qs.filter(period=period)
+        if self.request.query_params.get("unpaid") == "1":
+            qs = qs.filter(balance__gt=0)
         return qs
-
-
-class NoticeCategoryViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=["post"])
+    def issue(self, request):
+        """Encola la emisión de cuotas de un periodo; el avance se consulta en /api/jobs/<id>/."""
+        period = request.data.get("period")
+        if not period or len(period) != 7 or period[4] != "-":
+            return Response({"detail": "period debe ser 'YYYY-MM'"}, status=status.HTTP_400_BAD_REQUEST)
+        params = {"period": period}
+        for key in ("expense_type_id", "amount"):
+            if request.data.get(key) not in (None, ""):
+                params[key] = request.data[key]
+        job = enqueue("issue_fees", params, user=request.user)
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+    @action(detail=False, methods=["post"], url_path="sweep-overdue")
+    def sweep_overdue(self, request):
+        """Marca como vencidas las cuotas emitidas cuya fecha de vencimiento ya pasó."""
+        return Response({"overdue": sweep_overdue_fees()})
+
+
+class NoticeCategoryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = NoticeCategory.objects.all()
+    version_models = (NoticeCategory,)
+    cache_list_responses = True
     serializer_class = NoticeCategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     def get_permissions(self):
@@ -128,47 +176,107 @@ class NoticeCategoryViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
 
-class NoticeViewSet(viewsets.ModelViewSet):
+class NoticeViewSet(ConditionalGetMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
+    queryset = Notice.objects.all()
     serializer_class = NoticeSerializer
+    version_models = (Notice, NoticeCategory)
+    cache_list_responses = True
+    select_related_fields = {
+        "created_by_username": ("created_by",),
+        "category_name": ("category",),
+        "category_color": ("category",),
+    }
     def get_queryset(self):
-        return Notice.objects.filter(publish_date__lte=timezone.now()).select_related("created_by").order_by("-publish_date")
+        return super().get_queryset().filter(publish_date__lte=timezone.now()).order_by("-publish_date")
+    def get_version_parts(self):
+        # Los avisos programados se vuelven visibles sin que cambie la tabla
+        parts, last_modified = super().get_version_parts()
+        visible = Notice.objects.filter(publish_date__lte=timezone.now()).aggregate(latest=Max("publish_date"), total=Count("id"))
+        parts.append(f"visible:{visible['total']}:{visible['latest']}")
+        if visible["latest"]:
+            last_modified = max(filter(None, [last_modified, visible["latest"]]))
+        return parts, last_modified
     def get_permissions(self):
         return [permissions.IsAuthenticated()] if self.action in ("list", "retrieve") else [IsAdmin()]
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        notice = serializer.save(created_by=self.request.user)
+        # El envío a todos los residentes corre en el worker de trabajos; un aviso programado
+        # se anuncia cuando el worker lo encuentra publicado (antes su enlace daría 404)
+        announce_due_notices(ids=[notice.pk])
 
 
-class CommonAreaViewSet(viewsets.ModelViewSet):
+class CommonAreaViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = CommonArea.objects.filter(is_active=True).order_by("name")
+    version_models = (CommonArea,)
+    cache_list_responses = True
     serializer_class = CommonAreaSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     def get_permissions(self):
         if self.action in ("create", "update", "partial_update", "destroy"):
             return [IsAdmin()]
         return super().get_permissions()
+    @action(detail=False, methods=["get"], permission_classes=[permissions.IsAuthenticated])
+    def availability(self, request):
+        """
+        Huecos libres por área entre ?from= y ?to= (fecha o fecha-hora ISO; por defecto hoy).
+        ?area=<id> (repetible o separado por comas) limita las áreas consultadas y ?busy=1
+        agrega los intervalos ocupados.
+        """
+        area_ids = [a.strip() for raw in request.query_params.getlist("area") for a in raw.split(",") if a.strip()]
+        if not all(a.isdigit() for a in area_ids):
+            return Response({"detail": "area debe ser uno o más ids numéricos, ej. ?area=1,2."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start, end = reservations.parse_range(request.query_params.get("from"), request.query_params.get("to"))
+            areas = reservations.availability(start, end, [int(a) for a in area_ids])
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        fields = ("free", "busy") if request.query_params.get("busy") == "1" else ("free",)
+        return Response({
+            "from": start,
+            "to": end,
+            "areas": [
+                {"area": row["area"], "name": row["name"]}
+                | {field: [{"start": s, "end": e} for s, e in row[field]] for field in fields}
+                for row in areas
+            ],
+        })
 
 
-class ReservationViewSet(viewsets.ModelViewSet):
-    queryset = Reservation.objects.select_related("area", "user").all()
+class ReservationViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
+    queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
+    select_related_fields = {"area_name": ("area",), "user_username": ("user",)}
     permission_classes = [IsOwnerOrAdmin]
     def get_queryset(self):
-        if self.request.user.profile.role == "ADMIN":
+        if get_role(self.request.user) == "ADMIN":
             return super().get_queryset().order_by("-start_time")
         return super().get_queryset().filter(user=self.request.user).order_by("-start_time")
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class MaintenanceRequestViewSet(viewsets.ModelViewSet):
-    queryset = MaintenanceRequest.objects.all().order_by('-created_at')
+class MaintenanceRequestViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
+    queryset = MaintenanceRequest.objects.order_by('-created_at')
     serializer_class = MaintenanceRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
+    select_related_fields = {
+        "unit_code": ("unit",),
+        "reported_by_username": ("reported_by",),
+        "assigned_to_username": ("assigned_to",),
+        "completed_by_username": ("completed_by",),
+    }
+    prefetch_fields = {
+        "comments": (Prefetch("comments", queryset=MaintenanceRequestComment.objects.select_related("user")),),
+        "attachments": ("attachments",),
+    }
+    # ?include= es el nombre anterior de ?expand=; ?include= vacío no incluye ninguna relación
+    expand_params = ("expand", "include")
     def get_queryset(self):
         user = self.request.user
-        if not (user.is_staff or getattr(user.profile, 'role', 'RESIDENT') == 'ADMIN'):
-            return self.queryset.filter(reported_by=user)
-        return self.queryset
+        qs = super().get_queryset()
+        if not (user.is_staff or get_role(user) == 'ADMIN'):
+            return qs.filter(reported_by=user)
+        return qs
     def perform_create(self, serializer):
         serializer.save(reported_by=self.request.user)
 
@@ -182,23 +290,73 @@ class MaintenanceRequestCommentViewSet(viewsets.ModelViewSet):
 
 
 class MaintenanceRequestAttachmentViewSet(viewsets.ModelViewSet):
-    queryset = MaintenanceRequestAttachment.objects.all()
+    queryset = MaintenanceRequestAttachment.objects.order_by('-uploaded_at')
     serializer_class = MaintenanceRequestAttachmentSerializer
     parser_classes = [MultiPartParser, FormParser]
     permission_classes = [permissions.IsAuthenticated]
-    def perform_create(self, serializer):
-        serializer.save()
+    # Un adjunto no se reemplaza: se borra y se sube otro
+    http_method_names = ['get', 'post', 'delete', 'head', 'options']
+    def get_queryset(self):
+        user = self.request.user
+        qs = super().get_queryset()
+        if not (user.is_staff or get_role(user) == 'ADMIN'):
+            return qs.filter(request__reported_by=user)
+        return qs
+    def create(self, request, *args, **kwargs):
+        """
+        La subida va a disco por ``AttachmentUploadHandler`` (límite de tamaño, tipo y sha256);
+        las variantes se generan en segundo plano. Repetir la misma foto en la solicitud
+        devuelve 200 con el adjunto existente.
+        """
+        request._request.upload_handlers = [AttachmentUploadHandler(request._request)]
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        attachment = serializer.save()
+        if serializer.created and not attachment.thumbnail:
+            enqueue("attachment_variants", {"ids": [attachment.id]}, user=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED if serializer.created else status.HTTP_200_OK)
+    @action(detail=True, methods=['get'], url_path='file', url_name='file',
+            authentication_classes=[QueryTokenJWTAuthentication],
+            content_negotiation_class=IgnoreClientContentNegotiation)
+    def download(self, request, pk=None):
+        """Original o ``?variant=thumbnail|medium``; 404 si el usuario no ve la solicitud o la variante no existe aún."""
+        field = request.query_params.get('variant', 'file')
+        if field not in ('file', *attachments.VARIANTS):
+            return Response({"detail": "variant debe ser thumbnail o medium."}, status=status.HTTP_400_BAD_REQUEST)
+        attachment = self.get_object()
+        if not getattr(attachment, field):
+            raise Http404
+        return serve_attachment(request._request, attachment, field)
 
 
 class NotificationViewSet(viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CursorOrPageNumberPagination
+    ordering = ["-created_at", "-id"]
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
     @action(detail=False, methods=['post'])
     def mark_all_as_read(self, request):
-        self.get_queryset().update(is_read=True)
+        notifications.mark_as_read(request.user)
         return Response(status=status.HTTP_204_NO_CONTENT)
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """Contador de no leídas para el badge, sin listar las notificaciones."""
+        return Response({"unread": notifications.unread_count(request.user)})
+    @action(detail=False, methods=['post'], permission_classes=[IsAdmin])
+    def broadcast(self, request):
+        """Encola el envío de una notificación a una audiencia: all, role, tower u owners."""
+        message = (request.data.get("message") or "").strip()
+        audience = request.data.get("audience", "all")
+        if not message or audience not in notifications.AUDIENCES:
+            return Response({"detail": f"Se requiere message y audience en {notifications.AUDIENCES}."}, status=status.HTTP_400_BAD_REQUEST)
+        params = {"message": message, "audience": audience}
+        for key in ("value", "link"):
+            if request.data.get(key) not in (None, ""):
+                params[key] = request.data[key]
+        job = enqueue("notify_audience", params, user=request.user)
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
 
 class VehicleViewSet(viewsets.ModelViewSet):
@@ -219,10 +377,47 @@ class FamilyMemberViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAdmin]
 
 
-class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
+class ActivityLogViewSet(SparseFieldsViewMixin, viewsets.ReadOnlyModelViewSet):
     queryset = ActivityLog.objects.all()
     serializer_class = ActivityLogSerializer
+    select_related_fields = {"user_username": ("user",)}
     permission_classes = [IsAdmin]
+    pagination_class = CursorOrPageNumberPagination
+    ordering = ["-timestamp", "-id"]
+    def _bound(self, name):
+        """Fecha u hora ISO de ``?name=`` como datetime con zona; una fecha sola cuenta desde las 00:00."""
+        raw = self.request.query_params.get(name)
+        if not raw:
+            return None
+        try:
+            value = parse_datetime(raw)
+            if value is None:
+                day = parse_date(raw)
+                value = day and datetime.datetime.combine(day, datetime.time.min)
+        except ValueError:
+            value = None
+        if value is None:
+            raise serializers.ValidationError({name: "Fecha inválida: use YYYY-MM-DD o YYYY-MM-DDTHH:MM[:SS][±HH:MM]."})
+        return timezone.make_aware(value) if timezone.is_naive(value) else value
+    def get_queryset(self):
+        # ?since= / ?until= (ISO) acotan el rango y limitan la lectura a esas particiones
+        qs = super().get_queryset()
+        since, until = self._bound("since"), self._bound("until")
+        if since:
+            qs = qs.filter(timestamp__gte=since)
+        if until:
+            qs = qs.filter(timestamp__lt=until)
+        return qs
+
+
+class JobViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    select_related_fields = {"created_by_username": ("created_by",)}
+    permission_classes = [IsAdmin]
+    http_method_names = ["get", "post", "head", "options"]
+    def perform_create(self, serializer):
+        serializer.instance = enqueue(serializer.validated_data["kind"], serializer.validated_data.get("params"), user=self.request.user)
 
 
 class PageAccessLogView(APIView):
@@ -230,25 +425,69 @@ class PageAccessLogView(APIView):
     def post(self, request):
         page_name = request.data.get('page_name')
         if page_name:
-            ActivityLog.objects.create(user=request.user, action="PAGE_ACCESS", details=f"Accedió a: {page_name}")
+            log_activity(request.user, "PAGE_ACCESS", details=f"Accedió a: {page_name}")
         return Response(status=status.HTTP_201_CREATED)
 
 
 class DashboardStatsView(APIView):
     permission_classes = [IsAdmin]
     def get(self, request):
-        return Response({
-            "total_users": User.objects.count(),
-            "active_units": Unit.objects.count(),
-            "pending_fees_total": Fee.objects.filter(status__in=["ISSUED", "OVERDUE"]).aggregate(total=Sum('amount'))['total'] or 0,
-            "open_maintenance_requests": MaintenanceRequest.objects.filter(status__in=["PENDING", "IN_PROGRESS"]).count(),
-        })
+        # Contadores incrementales (core.services.counters): una lectura de DashboardCounter
+        return Response(counters.snapshot())
+
+
+class ResponseCacheStatsView(APIView):
+    """Aciertos y fallos de la caché de respuestas de catálogos y avisos."""
+    permission_classes = [IsAdmin]
+    def get(self, request):
+        return Response(response_cache.stats())
+    def delete(self, request):
+        response_cache.reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class FinanceReportView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
+    """
+    Reporte financiero leído de FinanceRollup (una sola consulta sin importar cuántas
+    cuotas haya). Filtros: ?from=YYYY-MM&to=YYYY-MM&expense_type=<id>&status=<estado>.
+    """
+    permission_classes = [IsAdmin]
+    METRICS = ("issued_amount", "paid_amount", "fee_count", "payment_count")
+
     def get(self, request):
-        return Response({})
+        params = request.query_params
+        # Los deltas dejan en cero las filas que se vacían; no aportan al reporte
+        rows = FinanceRollup.objects.select_related("expense_type").filter(fee_count__gt=0)
+        if period_from := params.get("from"):
+            rows = rows.filter(period__gte=period_from)
+        if period_to := params.get("to"):
+            rows = rows.filter(period__lte=period_to)
+        if expense_type := params.get("expense_type"):
+            rows = rows.filter(expense_type_id=expense_type)
+        if fee_status := params.get("status"):
+            rows = rows.filter(status=fee_status)
+
+        totals = dict.fromkeys(self.METRICS, 0)
+        by_period, by_type, by_status = {}, {}, {}
+        for row in rows:
+            groups = (
+                by_period.setdefault(row.period, {"period": row.period}),
+                by_type.setdefault(row.expense_type_id, {"expense_type": row.expense_type_id, "expense_type_name": row.expense_type.name}),
+                by_status.setdefault(row.status, {"status": row.status}),
+                totals,
+            )
+            for group in groups:
+                for metric in self.METRICS:
+                    group[metric] = group.get(metric, 0) + getattr(row, metric)
+
+        return Response({
+            "from": params.get("from"),
+            "to": params.get("to"),
+            "totals": totals,
+            "by_period": sorted(by_period.values(), key=lambda g: g["period"]),
+            "by_expense_type": sorted(by_type.values(), key=lambda g: g["expense_type_name"]),
+            "by_status": sorted(by_status.values(), key=lambda g: g["status"]),
+        })
 
 
 class FeePaymentPreferenceView(APIView):
@@ -258,7 +497,7 @@ class FeePaymentPreferenceView(APIView):
         try:
             # Esta validación se mantiene igual
             fee_lookup = {'pk': fee_id}
-            if not (hasattr(request.user, 'profile') and request.user.profile.role == 'ADMIN'):
+            if get_role(request.user) != 'ADMIN':
                 fee_lookup['unit__owner'] = request.user
             Fee.objects.get(**fee_lookup)
         except Fee.DoesNotExist:
@@ -285,5 +524,9 @@ class FeePaymentPreferenceView(APIView):
 
 class MercadoPagoWebhookView(APIView):
     permission_classes = [permissions.AllowAny]
+    authentication_classes = []
     def post(self, request, *args, **kwargs):
+        # Solo se guarda el evento; process_webhooks lo aplica fuera del request
+        payload = request.data.dict() if hasattr(request.data, "dict") else request.data
+        ingest_mercadopago(payload if isinstance(payload, dict) else {}, request.query_params)
         return Response(status=status.HTTP_200_OK)
\ No newline at end of file
@@ -0,0 +1,210 @@
+# condominio_backend/core/views_events.py
+#
+# Notificaciones en vivo: stream SSE y long-poll como aplicación ASGI mínima que config/asgi.py
+# atiende antes de Django. No pasan por el handler de Django a propósito: este abre un hilo por
+# request mientras la conexión siga abierta (ThreadSensitiveContext), y aquí cada cliente debe ser
+# solo una corrutina esperando un aviso del broker (core.services.events).
+
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.db.models import Max
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import ROLE_CLAIMS, RoleJWTAuthentication
+from .models import Notification
+from .services import notifications
+from .services.events import broker
+
+BATCH_SIZE = 50
+NOTIFICATION_FIELDS = ("id", "message", "is_read", "created_at", "link")
+
+
+def _fetch(user_id, after_id):
+    rows = Notification.objects.filter(user_id=user_id, id__gt=after_id).order_by("id").values(*NOTIFICATION_FIELDS)
+    return list(rows[:BATCH_SIZE])
+
+
+def _last_id(user_id):
+    return Notification.objects.filter(user_id=user_id).aggregate(last=Max("id"))["last"] or 0
+
+
+def _db(func):
+    """
+    Corre ``func`` en el pool de hilos del loop (solo al despertar, no por conexión inactiva).
+    Aquí no llegan request_started/request_finished de Django: se cierran antes y después las
+    conexiones vencidas (CONN_MAX_AGE) o que dieron error, como haría el ciclo de un request.
+    """
+    def call(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(call, thread_sensitive=False)
+
+
+fetch = _db(_fetch)
+last_id_for = _db(_last_id)
+unread_count = _db(notifications.unread_count)
+
+
+class EventRequest:
+    def __init__(self, scope):
+        self.params = {k: v[-1] for k, v in parse_qs(scope["query_string"].decode("latin-1")).items()}
+        self.headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+
+    def cursor(self, value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    def response_headers(self, content_type):
+        headers = [(b"content-type", content_type), (b"cache-control", b"no-cache")]
+        origin = self.headers.get("origin")
+        if origin and origin in settings.CORS_ALLOWED_ORIGINS:
+            headers += [(b"access-control-allow-origin", origin.encode("latin-1")), (b"vary", b"Origin")]
+        return headers
+
+    async def authenticate(self):
+        """JWT de ``Authorization: Bearer`` o de ``?token=`` (EventSource no permite cabeceras)."""
+        raw = self.params.get("token")
+        header = self.headers.get("authorization", "")
+        if header.startswith("Bearer "):
+            raw = header[len("Bearer "):]
+        if not raw:
+            return None
+        try:
+            token = AccessToken(raw)
+        except TokenError:
+            return None
+        auth = RoleJWTAuthentication()
+        if all(claim in token for claim in ROLE_CLAIMS):
+            return auth.get_user(token)
+        try:
+            return await _db(auth.get_user)(token)
+        except Exception:
+            return None
+
+
+async def _send_json(send, request, status, data):
+    await send({"type": "http.response.start", "status": status, "headers": request.response_headers(b"application/json")})
+    await send({"type": "http.response.body", "body": json.dumps(data, cls=DjangoJSONEncoder).encode()})
+
+
+def _sse(event, data, event_id=None):
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n".encode()
+
+
+async def _watch_disconnect(receive, wakeup, closed):
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            closed.set()
+            wakeup.set()
+            return
+
+
+async def notification_stream(scope, receive, send):
+    """
+    GET /api/notifications/stream/ — Server-Sent Events con las notificaciones nuevas del usuario.
+    Retoma desde ``Last-Event-ID`` (o ``?since=<id>``); sin cursor, solo envía las nuevas.
+    """
+    request = EventRequest(scope)
+    user = await request.authenticate()
+    if user is None:
+        return await _send_json(send, request, 401, {"detail": "Token inválido o ausente."})
+    last_id = request.cursor(request.headers.get("last-event-id"))
+    if last_id is None:
+        last_id = request.cursor(request.params.get("since"))
+    if last_id is None:
+        last_id = await last_id_for(user.pk)
+
+    headers = request.response_headers(b"text/event-stream") + [(b"x-accel-buffering", b"no")]
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+    closed = asyncio.Event()
+    with broker.subscribe(user.pk) as wakeup:
+        watcher = asyncio.create_task(_watch_disconnect(receive, wakeup, closed))
+        try:
+            await send({"type": "http.response.body", "body": b"retry: 5000\n\n", "more_body": True})
+            while not closed.is_set():
+                wakeup.clear()
+                rows = await fetch(user.pk, last_id)
+                chunks = []
+                for row in rows:
+                    last_id = row["id"]
+                    chunks.append(_sse("notification", row, event_id=last_id))
+                if rows:
+                    chunks.append(_sse("unread", {"unread": await unread_count(user)}))
+                    await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": True})
+                    if len(rows) == BATCH_SIZE:
+                        continue
+                try:
+                    await asyncio.wait_for(wakeup.wait(), settings.NOTIFICATION_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # Comentario SSE: mantiene viva la conexión a través de proxies
+                    await send({"type": "http.response.body", "body": b": ping\n\n", "more_body": True})
+        except OSError:
+            # El cliente cerró la conexión mientras se escribía
+            pass
+        finally:
+            watcher.cancel()
+
+
+async def notification_poll(scope, receive, send):
+    """
+    GET /api/notifications/poll/?since=<id>&timeout=<s> — long-poll para clientes sin SSE.
+    Responde apenas hay notificaciones con id mayor a ``since`` o al vencer el timeout; sin
+    ``since`` devuelve de inmediato el último id para usarlo como cursor.
+    """
+    request = EventRequest(scope)
+    user = await request.authenticate()
+    if user is None:
+        return await _send_json(send, request, 401, {"detail": "Token inválido o ausente."})
+    since = request.cursor(request.params.get("since"))
+    if since is None:
+        return await _send_json(send, request, 200, {"results": [], "last_id": await last_id_for(user.pk)})
+    timeout = request.cursor(request.params.get("timeout")) or settings.NOTIFICATION_POLL_TIMEOUT
+    timeout = max(1, min(timeout, settings.NOTIFICATION_POLL_TIMEOUT))
+
+    closed = asyncio.Event()
+    with broker.subscribe(user.pk) as wakeup:
+        watcher = asyncio.create_task(_watch_disconnect(receive, wakeup, closed))
+        try:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            rows = await fetch(user.pk, since)
+            # Un aviso sin filas nuevas (p. ej. el broker al reconectar despierta a todos) no corta la espera
+            while not rows and not closed.is_set():
+                try:
+                    await asyncio.wait_for(wakeup.wait(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    rows = await fetch(user.pk, since)
+                    break
+                if closed.is_set():
+                    break
+                wakeup.clear()
+                rows = await fetch(user.pk, since)
+            if closed.is_set():
+                return
+        finally:
+            watcher.cancel()
+    await _send_json(send, request, 200, {
+        "results": rows,
+        "last_id": rows[-1]["id"] if rows else since,
+        "unread": await unread_count(user),
+    })
+
+
+EVENT_ROUTES = {
+    "/api/notifications/stream/": notification_stream,
+    "/api/notifications/poll/": notification_poll,
+}
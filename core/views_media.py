@@ -0,0 +1,134 @@
+# condominio_backend/core/views_media.py
+#
+# Entrega de adjuntos de mantenimiento después de validar el acceso (lo hace la vista que llama,
+# con su queryset). Según MEDIA_SERVE_MODE la transferencia la hace el servidor de adelante
+# (X-Accel-Redirect / X-Sendfile) o Django con FileResponse, que bajo gunicorn usa sendfile.
+
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.negotiation import BaseContentNegotiation
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+STREAM_BLOCK_SIZE = 64 * 1024
+# Un adjunto nunca cambia de contenido (se borra y se sube otro): la caché del cliente no expira
+CACHE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """Los archivos no pasan por renderers; evita el 406 ante ``Accept: image/*``."""
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    ``(inicio, fin)`` inclusivos para un único rango ``bytes=``; None si la cabecera no aplica
+    (sintaxis inválida o varios rangos: se responde el archivo completo).
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+class FileRange:
+    """
+    Lectura limitada a ``length`` bytes desde ``start``. Expone ``fileno`` del archivo real para
+    que ``wsgi.file_wrapper`` (gunicorn) use sendfile desde la posición actual, acotado por el
+    Content-Length de la respuesta.
+    """
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file, self.remaining = file, length
+
+    @property
+    def fileno(self):
+        return self.file.fileno
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _file_response(request, fieldfile, content_type, etag, last_modified):
+    file = fieldfile.storage.open(fieldfile.name, "rb")
+    size = file.size
+    byte_range = None
+    header = request.headers.get("Range")
+    # If-Range distinto a la versión actual: el cliente tiene otro contenido, va el archivo completo
+    if header and request.headers.get("If-Range", etag) in (etag, http_date(last_modified)):
+        try:
+            byte_range = parse_range(header, size)
+        except RangeNotSatisfiable:
+            file.close()
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(FileRange(file, start, end - start + 1), status=206, content_type=content_type)
+        response["Content-Length"] = end - start + 1
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response.block_size = STREAM_BLOCK_SIZE
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def serve_attachment(request, attachment, field):
+    """
+    Responde el archivo ``field`` (``file``, ``thumbnail`` o ``medium``) de ``attachment``.
+    ``request`` es el HttpRequest de Django. ETag y Last-Modified salen de la fila (sha256 y
+    fecha de subida), así un 304 no toca el almacenamiento.
+    """
+    fieldfile = getattr(attachment, field)
+    content_type = "image/jpeg" if field != "file" else (attachment.content_type or "application/octet-stream")
+    tag = attachment.sha256 or f"{attachment.pk}-{int(attachment.uploaded_at.timestamp())}"
+    etag = f'"{tag}-{field}"'
+    last_modified = int(attachment.uploaded_at.timestamp())
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        if settings.MEDIA_SERVE_MODE == "nginx":
+            response = HttpResponse(content_type=content_type)
+            response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_PREFIX.rstrip("/") + "/" + quote(fieldfile.name)
+        elif settings.MEDIA_SERVE_MODE == "sendfile":
+            response = HttpResponse(content_type=content_type)
+            response["X-Sendfile"] = fieldfile.path
+        else:
+            response = _file_response(request, fieldfile, content_type, etag, last_modified)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    patch_cache_control(response, private=True, max_age=CACHE_MAX_AGE, immutable=True)
+    return response